@@ -0,0 +1,190 @@
+"""
+Vectorized batch engine that plays many Battleship games in lockstep.
+
+N games are held as stacked NumPy arrays: the ship occupying each cell
+(N x size*size), the cells shot so far, per-ship hit counts and the number of
+ships afloat. fire() resolves one shot for every game in a single vectorized
+step with the same rules as Board.receive_shot and Board.all_ships_sunk.
+
+NumPy is optional for the rest of the game; only this module needs it.
+"""
+
+from functools import lru_cache
+from typing import List, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - exercised only without NumPy
+    np = None
+
+from battleship import DEFAULT_SHIPS_CONFIG, Board, Ship
+from placement import placement_table
+
+
+def _require_numpy():
+    if np is None:
+        raise ImportError("The batch engine requires NumPy (pip install numpy)")
+
+
+@lru_cache(maxsize=None)
+def _placement_matrix(board_size: int, ship_size: int):
+    """Placements of a ship as a (placements x cells) float32 0/1 matrix"""
+    table = placement_table(board_size, ship_size)
+    matrix = np.zeros((len(table), board_size * board_size), dtype=np.float32)
+    for index, cells in enumerate(table.cells):
+        matrix[index, list(cells)] = 1.0
+    return matrix
+
+
+def generate_fleets(n_games: int, board_size: int = 10,
+                    ships_config: Optional[List[Tuple[str, int]]] = None, rng=None):
+    """Random fleets for n_games boards as an (n_games x cells) int16 array
+
+    Cell values are 0 for water and k for the k-th ship of ships_config.
+    Ships are placed in order, each drawn uniformly from the placements that
+    don't overlap the ships already placed (the same distribution as
+    placement.draw_fleet). Boards that run out of room are redrawn.
+    """
+    _require_numpy()
+    if ships_config is None:
+        ships_config = DEFAULT_SHIPS_CONFIG
+    if rng is None:
+        rng = np.random.default_rng()
+
+    n_cells = board_size * board_size
+    matrices = [_placement_matrix(board_size, size) for _, size in ships_config]
+    if any(matrix.shape[0] == 0 for matrix in matrices):
+        raise ValueError("A ship is larger than the board")
+
+    ship_ids = np.zeros((n_games, n_cells), dtype=np.int16)
+    pending = np.arange(n_games)
+    for _ in range(100):
+        if not pending.size:
+            return ship_ids
+        ids = np.zeros((pending.size, n_cells), dtype=np.int16)
+        placed = np.ones(pending.size, dtype=bool)
+        for ship_number, matrix in enumerate(matrices, start=1):
+            # A placement fits if it covers none of the occupied cells
+            overlaps = (ids != 0).astype(np.float32) @ matrix.T
+            fits = overlaps == 0
+            placed &= fits.any(axis=1)
+            scores = rng.random(fits.shape)
+            scores[~fits] = -1.0
+            chosen = matrix[scores.argmax(axis=1)] != 0
+            chosen[~placed] = False
+            ids[chosen] = ship_number
+        ship_ids[pending[placed]] = ids[placed]
+        pending = pending[~placed]
+    raise RuntimeError("Could not place fleets")
+
+
+class BatchEngine:
+    """N games of one fleet each, resolved in lockstep
+
+    Each game tracks one board being shot at. fire(rows, cols) takes one
+    target per game and returns per-game (hit, ship index, sunk) arrays.
+    """
+    def __init__(self, ship_ids, board_size: int = 10,
+                 ships_config: Optional[List[Tuple[str, int]]] = None):
+        _require_numpy()
+        if ships_config is None:
+            ships_config = DEFAULT_SHIPS_CONFIG
+        self.board_size = board_size
+        self.ships_config = list(ships_config)
+        self.n_games = ship_ids.shape[0]
+        self.ship_ids = ship_ids
+        self.ship_sizes = np.array([size for _, size in ships_config], dtype=np.int16)
+        self.shots = np.zeros(ship_ids.shape, dtype=bool)
+        self.ship_hits = np.zeros((self.n_games, len(ships_config)), dtype=np.int16)
+        self.ships_afloat = np.full(self.n_games, len(ships_config), dtype=np.int16)
+        self.shots_fired = np.zeros(self.n_games, dtype=np.int32)
+
+    @classmethod
+    def random_fleets(cls, n_games: int, board_size: int = 10,
+                      ships_config: Optional[List[Tuple[str, int]]] = None, rng=None) -> "BatchEngine":
+        """Engine with a freshly generated random fleet in every game"""
+        ship_ids = generate_fleets(n_games, board_size, ships_config, rng)
+        return cls(ship_ids, board_size, ships_config)
+
+    @property
+    def occupancy(self):
+        """(N x size x size) boolean ship occupancy"""
+        return (self.ship_ids != 0).reshape(self.n_games, self.board_size, self.board_size)
+
+    @property
+    def shot_mask(self):
+        """(N x size x size) boolean mask of cells shot so far"""
+        return self.shots.reshape(self.n_games, self.board_size, self.board_size)
+
+    def fire(self, rows, cols, active=None):
+        """Fire one shot in every game (or every active game)
+
+        Returns (hit, ship, sunk) arrays of length N: whether the shot hit,
+        the index in ships_config of the ship hit (-1 for none) and whether
+        that hit sank it. Off-board and repeated shots are ignored and count
+        as misses, like Board.receive_shot.
+        """
+        size = self.board_size
+        rows = np.asarray(rows)
+        cols = np.asarray(cols)
+        games = np.arange(self.n_games)
+
+        valid = (rows >= 0) & (rows < size) & (cols >= 0) & (cols < size)
+        if active is not None:
+            valid &= active
+        cells = np.where(valid, rows * size + cols, 0)
+        valid &= ~self.shots[games, cells]
+
+        games = games[valid]
+        cells = cells[valid]
+        self.shots[games, cells] = True
+        self.shots_fired[games] += 1
+
+        ship_numbers = self.ship_ids[games, cells]
+        on_ship = ship_numbers > 0
+        hit_games = games[on_ship]
+        hit_ships = ship_numbers[on_ship] - 1
+        # At most one shot per game per step, so the indices are unique
+        self.ship_hits[hit_games, hit_ships] += 1
+        sinks = self.ship_hits[hit_games, hit_ships] == self.ship_sizes[hit_ships]
+        self.ships_afloat[hit_games[sinks]] -= 1
+
+        hit = np.zeros(self.n_games, dtype=bool)
+        ship = np.full(self.n_games, -1, dtype=np.int16)
+        sunk = np.zeros(self.n_games, dtype=bool)
+        hit[hit_games] = True
+        ship[hit_games] = hit_ships
+        sunk[hit_games[sinks]] = True
+        return hit, ship, sunk
+
+    def all_ships_sunk(self):
+        """Per-game game over flags"""
+        return self.ships_afloat == 0
+
+    def play_random(self, rng=None):
+        """Fire at uniformly random unshot cells until every fleet is sunk
+
+        Firing at a random unshot cell each turn is the same as firing in
+        the order of a random permutation of the cells, so each game's
+        permutation is drawn up front. Returns the shots each game needed.
+        """
+        if rng is None:
+            rng = np.random.default_rng()
+        order = np.argsort(rng.random(self.shots.shape), axis=1)
+        for step in range(order.shape[1]):
+            active = ~self.all_ships_sunk()
+            if not active.any():
+                break
+            cells = order[:, step]
+            self.fire(cells // self.board_size, cells % self.board_size, active)
+        return self.shots_fired.copy()
+
+    def to_board(self, game: int, board_class=Board):
+        """Rebuild one game's fleet (not its shots) as a regular board"""
+        board = board_class(self.board_size)
+        ship_cells = self.ship_ids[game]
+        for ship_number, (name, size) in enumerate(self.ships_config, start=1):
+            cells = np.flatnonzero(ship_cells == ship_number)
+            positions = [divmod(int(cell), self.board_size) for cell in cells]
+            board.place_ship(Ship(name, size), positions)
+        return board
@@ -1,19 +1,35 @@
 import random
-import os
+import sys
 import time
+from array import array
 from typing import List, Tuple, Optional
 
+from coordinates import column_label, coordinate_grid, format_coordinate, parse_coordinate
+from engine import GAME_OVER, MISS, SHOT_HIT, SHOT_SUNK, SUNK, GameEngine, GameEvent, Salvo, parse_salvo
+from openings import BOOK_STRATEGIES, OpeningLine, get_opening_book
+from placement import MAX_TABLE_CELLS, draw_fleet, sample_uniform_fleet, solve_fleet
+from renderer import (LEGEND_LINES, TerminalRenderer, clear_screen, column_header,
+                      fleet_row, guess_row, ship_status_lines)
+from strategies import STRATEGIES, ComputerPlayer, Strategy
+
 class Ship:
-    """Represents a ship in the battleship game"""
+    """Represents a ship in the battleship game
+    
+    Hits are kept as a bitmask over the ship's positions; `hits` rebuilds
+    the hit positions, as a read-only frozenset, when it is asked for.
+    """
+    __slots__ = ('name', 'size', 'positions', 'hit_count', '_hit_mask')
+    
     def __init__(self, name: str, size: int):
         self.name = name
         self.size = size
         self.positions = []
-        self.hits = set()
+        self.hit_count = 0
+        self._hit_mask = 0
     
     def is_sunk(self) -> bool:
         """Check if the ship is completely sunk"""
-        return len(self.hits) == self.size
+        return self.hit_count == self.size
     
     def place_ship(self, positions: List[Tuple[int, int]]):
         """Place the ship on the board"""
@@ -21,25 +37,139 @@ class Ship:
     
     def hit(self, position: Tuple[int, int]) -> bool:
         """Record a hit on the ship"""
-        if position in self.positions:
-            self.hits.add(position)
-            return True
-        return False
+        try:
+            bit = 1 << self.positions.index(position)
+        except ValueError:
+            return False
+        if not self._hit_mask & bit:
+            self._hit_mask |= bit
+            self.hit_count += 1
+        return True
+    
+    @property
+    def hits(self) -> frozenset:
+        """Positions of the ship that have been hit (read-only; record hits with hit())"""
+        mask = self._hit_mask
+        return frozenset(position for i, position in enumerate(self.positions) if mask >> i & 1)
+
+# Target pools for boards up to this many cells use flat arrays
+ARRAY_POOL_CELLS = 1024
+
+class _IdentityMap(dict):
+    """Dict that maps every key missing from it to itself"""
+    __slots__ = ()
+    
+    def __missing__(self, key):
+        return key
+
+class TargetPool:
+    """The cells of a board that haven't been shot yet
+    
+    Works like a Fisher-Yates shuffle over the cell indices: the first
+    `count` slots hold the remaining cells and a removed cell is swapped
+    with the last one, so removing a cell and picking a uniformly random
+    remaining cell are both O(1). Small boards keep the slot/cell maps in
+    two flat integer arrays; large boards only store the slots and cells
+    that have moved, so memory grows with the number of shots, not the
+    board area.
+    """
+    __slots__ = ('size', 'count', '_cell_at', '_slot_of')
+    
+    def __init__(self, size: int, shots_fired=()):
+        self.size = size
+        self.count = size * size
+        if self.count <= ARRAY_POOL_CELLS:
+            self._cell_at = array('i', range(self.count))  # slot -> cell
+            self._slot_of = array('i', range(self.count))  # cell -> slot (-1 once removed)
+        else:
+            self._cell_at = _IdentityMap()
+            self._slot_of = _IdentityMap()
+        for row, col in shots_fired:
+            self.remove(row, col)
+    
+    def __len__(self) -> int:
+        return self.count
+    
+    def __contains__(self, position: Tuple[int, int]) -> bool:
+        row, col = position
+        return self._slot_of[row * self.size + col] >= 0
+    
+    def remove(self, row: int, col: int):
+        """Remove a cell from the pool (no-op if it is already gone)"""
+        cell = row * self.size + col
+        slot_of = self._slot_of
+        slot = slot_of[cell]
+        if slot < 0:
+            return
+        last_slot = self.count - 1
+        last_cell = self._cell_at[last_slot]
+        if last_cell != cell:
+            self._cell_at[slot] = last_cell
+            slot_of[last_cell] = slot
+        slot_of[cell] = -1
+        self.count = last_slot
+    
+    def choose(self, rng=random) -> Tuple[int, int]:
+        """Pick a random remaining cell without removing it"""
+        if not self.count:
+            raise ValueError("No cells left to shoot at")
+        return divmod(self._cell_at[rng.randrange(self.count)], self.size)
+    
+    def sample(self, count: int, rng=random, exclude=()) -> List[Tuple[int, int]]:
+        """Pick `count` distinct random remaining cells, none of them in exclude, without removing them"""
+        if count <= 0:
+            return []
+        if count == 1 and not exclude:
+            return [self.choose(rng)]
+        size = self.size
+        excluded = {row * size + col for row, col in exclude}
+        cell_at = self._cell_at
+        slots = rng.sample(range(self.count), min(self.count, count + len(excluded)))
+        cells = [cell for cell in (cell_at[slot] for slot in slots) if cell not in excluded][:count]
+        if len(cells) < count:
+            raise ValueError("Not enough cells left to shoot at")
+        return [divmod(cell, size) for cell in cells]
 
 class Board:
-    """Represents a battleship game board"""
+    """Represents a battleship game board
+    
+    Shot sets hold the shared coordinate tuples from coordinate_grid rather
+    than a new tuple per shot, and misses are derived from the shots and
+    hits (as a read-only frozenset), to keep the memory of a live game small.
+    """
+    __slots__ = ('size', 'grid', 'ships', 'ship_at', 'ships_afloat', 'shots_fired', 'hits',
+                 '_coordinates', '_target_pool')
+    
     def __init__(self, size: int = 10):
         self.size = size
         self.grid = [[' ' for _ in range(size)] for _ in range(size)]
         self.ships = []
+        self.ship_at = {}  # (row, col) -> Ship occupying that cell
+        self.ships_afloat = 0
         self.shots_fired = set()
         self.hits = set()
-        self.misses = set()
+        self._coordinates = coordinate_grid(size)
+        self._target_pool = None
+    
+    @property
+    def misses(self) -> frozenset:
+        """Shots that missed, derived from the shots and hits (read-only)"""
+        return frozenset(self.shots_fired - self.hits)
     
     def is_valid_position(self, row: int, col: int) -> bool:
         """Check if a position is within the board boundaries"""
         return 0 <= row < self.size and 0 <= col < self.size
     
+    def has_been_shot(self, row: int, col: int) -> bool:
+        """Check if a shot has already been fired at a position"""
+        return (row, col) in self.shots_fired
+    
+    def target_pool(self) -> TargetPool:
+        """Pool of unshot cells, created on first use and kept up to date"""
+        if self._target_pool is None:
+            self._target_pool = TargetPool(self.size, self.shots_fired)
+        return self._target_pool
+    
     def is_valid_placement(self, positions: List[Tuple[int, int]]) -> bool:
         """Check if ship placement is valid (within bounds and not overlapping)"""
         for row, col in positions:
@@ -56,10 +186,14 @@ class Board:
         
         ship.place_ship(positions)
         self.ships.append(ship)
+        self.ships_afloat += 1
         
         # Mark ship positions on the grid
+        symbol = sys.intern(ship.name[0].upper())  # One shared string per letter
+        coordinates = self._coordinates
         for row, col in positions:
-            self.grid[row][col] = ship.name[0].upper()
+            self.grid[row][col] = symbol
+            self.ship_at[coordinates[row][col]] = ship
         
         return True
     
@@ -68,130 +202,557 @@ class Board:
         if not self.is_valid_position(row, col):
             return False, None
         
-        if (row, col) in self.shots_fired:
+        position = self._coordinates[row][col]
+        if position in self.shots_fired:
             return False, None  # Already shot here
         
-        self.shots_fired.add((row, col))
+        self.shots_fired.add(position)
+        if self._target_pool is not None:
+            self._target_pool.remove(row, col)
         
-        if self.grid[row][col] != ' ':
+        ship = self.ship_at.get(position)
+        if ship is not None:
             # Hit a ship
-            self.hits.add((row, col))
+            self.hits.add(position)
             self.grid[row][col] = 'X'
-            
-            # Find which ship was hit
-            for ship in self.ships:
-                if ship.hit((row, col)):
-                    return True, ship
+            ship.hit(position)
+            if ship.is_sunk():
+                self.ships_afloat -= 1
+            return True, ship
         else:
             # Miss
-            self.misses.add((row, col))
             self.grid[row][col] = 'O'
         
         return False, None
     
+    def receive_shots(self, cells) -> Tuple[bytes, List[Ship]]:
+        """Process a salvo and return (results, ships_hit)
+        
+        results holds one code per cell (engine.SHOT_MISS, SHOT_HIT or
+        SHOT_SUNK) and ships_hit the ship of every hit, in salvo order. The
+        whole salvo is checked first: a cell off the board, already shot or
+        repeated raises ValueError and no shot lands.
+        """
+        size = self.size
+        coordinates = self._coordinates
+        positions = []
+        for row, col in cells:
+            if not (0 <= row < size and 0 <= col < size):
+                raise ValueError("Shot is off the board")
+            positions.append(coordinates[row][col])
+        salvo = set(positions)
+        if len(salvo) != len(positions):
+            raise ValueError("A salvo cannot fire twice at one cell")
+        if not self.shots_fired.isdisjoint(salvo):
+            raise ValueError("Cell has already been shot")
+        
+        self.shots_fired |= salvo
+        pool = self._target_pool
+        if pool is not None:
+            for row, col in positions:
+                pool.remove(row, col)
+        ship_at = self.ship_at
+        grid = self.grid
+        if salvo.isdisjoint(ship_at):
+            for row, col in positions:
+                grid[row][col] = 'O'
+            return bytes(len(positions)), []
+        
+        results = bytearray(len(positions))
+        ships_hit = []
+        for index, position in enumerate(positions):
+            ship = ship_at.get(position)
+            row, col = position
+            if ship is None:
+                grid[row][col] = 'O'
+                continue
+            self.hits.add(position)
+            grid[row][col] = 'X'
+            ship.hit(position)
+            ships_hit.append(ship)
+            if ship.is_sunk():
+                self.ships_afloat -= 1
+                results[index] = SHOT_SUNK
+            else:
+                results[index] = SHOT_HIT
+        return bytes(results), ships_hit
+    
     def all_ships_sunk(self) -> bool:
         """Check if all ships are sunk"""
-        return all(ship.is_sunk() for ship in self.ships)
+        return self.ships_afloat == 0
     
     def display(self, show_ships: bool = False):
         """Display the board"""
-        # Print column headers
-        print("   " + " ".join([chr(65 + i) for i in range(self.size)]))
-        
+        print(column_header(self.size))
         for row in range(self.size):
-            # Print row header
-            print(f"{row:2d} ", end="")
-            
-            for col in range(self.size):
-                cell = self.grid[row][col]
-                if not show_ships and cell not in ['X', 'O'] and cell != ' ':
-                    cell = ' '  # Hide ships when not showing them
-                
-                # Enhanced display with better symbols
-                if cell == 'X':
-                    print("💥 ", end="")  # Hit
-                elif cell == 'O':
-                    print("💨 ", end="")  # Miss
-                elif cell == ' ':
-                    print("🌊 ", end="")  # Water
-                else:
-                    # Ship display
-                    ship_symbols = {
-                        'C': '🚢',  # Carrier
-                        'B': '🛥️ ',  # Battleship
-                        'S': '🚤',  # Submarine/Cruiser
-                        'D': '⛵'   # Destroyer
-                    }
-                    symbol = ship_symbols.get(cell, cell)
-                    print(f"{symbol} ", end="")
-            print()
+            print(fleet_row(row, self.grid[row], show_ships))
     
     def display_guess_board(self):
         """Display the board for guessing (opponent's board)"""
-        # Print column headers
-        print("   " + " ".join([chr(65 + i) for i in range(self.size)]))
-        
+        print(column_header(self.size))
         for row in range(self.size):
-            # Print row header
-            print(f"{row:2d} ", end="")
-            
-            for col in range(self.size):
-                if (row, col) in self.shots_fired:
-                    if (row, col) in self.hits:
-                        print("💥 ", end="")  # Hit
-                    else:
-                        print("💨 ", end="")  # Miss
-                else:
-                    print("❓ ", end="")  # Unknown/Unshot
-            print()
+            print(guess_row(row, self.grid[row]))
+
+class BitBoard:
+    """Board backend that stores ship occupancy and shots as integer bitmasks
+    
+    Cell (row, col) is bit row * size + col. Hits are the shots that land on
+    occupied cells, so placement checks, hit tests and the sunk check are all
+    single AND/OR operations. The public methods match Board; grid,
+    shots_fired, hits and misses are derived on demand for display code.
+    """
+    __slots__ = ('size', 'ships', 'ship_at', 'ships_afloat', 'occupied', 'shots', '_target_pool')
+    
+    def __init__(self, size: int = 10):
+        self.size = size
+        self.ships = []
+        self.ship_at = {}  # bit index -> Ship occupying that cell
+        self.ships_afloat = 0
+        self.occupied = 0
+        self.shots = 0
+        self._target_pool = None
+    
+    def is_valid_position(self, row: int, col: int) -> bool:
+        """Check if a position is within the board boundaries"""
+        return 0 <= row < self.size and 0 <= col < self.size
+    
+    def has_been_shot(self, row: int, col: int) -> bool:
+        """Check if a shot has already been fired at a position"""
+        return bool(self.shots >> (row * self.size + col) & 1)
+    
+    def target_pool(self) -> TargetPool:
+        """Pool of unshot cells, created on first use and kept up to date"""
+        if self._target_pool is None:
+            self._target_pool = TargetPool(self.size, self.shots_fired)
+        return self._target_pool
+    
+    def _positions_mask(self, positions: List[Tuple[int, int]]) -> Optional[int]:
+        """Bitmask for a list of positions, or None if any is off the board"""
+        mask = 0
+        for row, col in positions:
+            if not self.is_valid_position(row, col):
+                return None
+            mask |= 1 << (row * self.size + col)
+        return mask
+    
+    def is_valid_placement(self, positions: List[Tuple[int, int]]) -> bool:
+        """Check if ship placement is valid (within bounds and not overlapping)"""
+        mask = self._positions_mask(positions)
+        return mask is not None and not (mask & self.occupied)
+    
+    def place_ship(self, ship: Ship, positions: List[Tuple[int, int]]) -> bool:
+        """Place a ship on the board"""
+        mask = self._positions_mask(positions)
+        if mask is None or mask & self.occupied:
+            return False
+        
+        ship.place_ship(positions)
+        self.ships.append(ship)
+        self.ships_afloat += 1
+        self.occupied |= mask
+        for row, col in positions:
+            self.ship_at[row * self.size + col] = ship
+        return True
+    
+    def receive_shot(self, row: int, col: int) -> Tuple[bool, Optional[Ship]]:
+        """Process a shot and return (hit, ship_hit)"""
+        if not self.is_valid_position(row, col):
+            return False, None
+        
+        index = row * self.size + col
+        bit = 1 << index
+        if self.shots & bit:
+            return False, None  # Already shot here
+        
+        self.shots |= bit
+        if self._target_pool is not None:
+            self._target_pool.remove(row, col)
+        
+        if self.occupied & bit:
+            ship = self.ship_at[index]
+            ship.hit((row, col))
+            if ship.is_sunk():
+                self.ships_afloat -= 1
+            return True, ship
+        
+        return False, None
+    
+    def receive_shots(self, cells) -> Tuple[bytes, List[Ship]]:
+        """Process a salvo and return (results, ships_hit), like Board.receive_shots
+        
+        A salvo that hits nothing costs a few mask operations whatever its size.
+        """
+        size = self.size
+        indices = []
+        mask = 0
+        for row, col in cells:
+            if not (0 <= row < size and 0 <= col < size):
+                raise ValueError("Shot is off the board")
+            index = row * size + col
+            bit = 1 << index
+            if mask & bit:
+                raise ValueError("A salvo cannot fire twice at one cell")
+            mask |= bit
+            indices.append(index)
+        if self.shots & mask:
+            raise ValueError("Cell has already been shot")
+        
+        self.shots |= mask
+        pool = self._target_pool
+        if pool is not None:
+            for index in indices:
+                pool.remove(*divmod(index, size))
+        hit_mask = mask & self.occupied
+        if not hit_mask:
+            return bytes(len(indices)), []
+        
+        results = bytearray(len(indices))
+        ships_hit = []
+        ship_at = self.ship_at
+        for position, index in enumerate(indices):
+            if not hit_mask >> index & 1:
+                continue
+            ship = ship_at[index]
+            ship.hit(divmod(index, size))
+            ships_hit.append(ship)
+            if ship.is_sunk():
+                self.ships_afloat -= 1
+                results[position] = SHOT_SUNK
+            else:
+                results[position] = SHOT_HIT
+        return bytes(results), ships_hit
+    
+    def all_ships_sunk(self) -> bool:
+        """Check if all ships are sunk"""
+        return self.ships_afloat == 0
+    
+    def _cells(self, mask: int) -> frozenset:
+        """Convert a bitmask into a read-only set of (row, col) tuples"""
+        cells = []
+        while mask:
+            low = mask & -mask
+            index = low.bit_length() - 1
+            cells.append(divmod(index, self.size))
+            mask ^= low
+        return frozenset(cells)
+    
+    @property
+    def shots_fired(self) -> frozenset:
+        return self._cells(self.shots)
+    
+    @property
+    def hits(self) -> frozenset:
+        return self._cells(self.shots & self.occupied)
+    
+    @property
+    def misses(self) -> frozenset:
+        return self._cells(self.shots & ~self.occupied)
+    
+    @property
+    def grid(self) -> List[List[str]]:
+        """Character grid in the same format as Board.grid"""
+        grid = [[' ' for _ in range(self.size)] for _ in range(self.size)]
+        for ship in self.ships:
+            for row, col in ship.positions:
+                grid[row][col] = ship.name[0].upper()
+        for row, col in self.hits:
+            grid[row][col] = 'X'
+        for row, col in self.misses:
+            grid[row][col] = 'O'
+        return grid
+
+class SparseBoard:
+    """Board backend that stores only ships and shots
+    
+    There is no grid: ship cells live in the cell-to-ship index and shots in
+    sets, so memory and per-shot cost grow with the fleet and the number of
+    shots rather than with the board area. Meant for very large boards; the
+    public methods match Board and grid is derived on demand for display.
+    """
+    __slots__ = ('size', 'ships', 'ship_at', 'ships_afloat', 'shots_fired', 'hits', 'misses',
+                 '_target_pool')
+    
+    def __init__(self, size: int = 10):
+        self.size = size
+        self.ships = []
+        self.ship_at = {}  # (row, col) -> Ship occupying that cell
+        self.ships_afloat = 0
+        self.shots_fired = set()
+        self.hits = set()
+        self.misses = set()
+        self._target_pool = None
+    
+    def is_valid_position(self, row: int, col: int) -> bool:
+        """Check if a position is within the board boundaries"""
+        return 0 <= row < self.size and 0 <= col < self.size
+    
+    def has_been_shot(self, row: int, col: int) -> bool:
+        """Check if a shot has already been fired at a position"""
+        return (row, col) in self.shots_fired
+    
+    def target_pool(self) -> TargetPool:
+        """Pool of unshot cells, created on first use and kept up to date"""
+        if self._target_pool is None:
+            self._target_pool = TargetPool(self.size, self.shots_fired)
+        return self._target_pool
+    
+    def is_valid_placement(self, positions: List[Tuple[int, int]]) -> bool:
+        """Check if ship placement is valid (within bounds and not overlapping)"""
+        for row, col in positions:
+            if not self.is_valid_position(row, col):
+                return False
+            if (row, col) in self.ship_at:
+                return False
+        return True
+    
+    def place_ship(self, ship: Ship, positions: List[Tuple[int, int]]) -> bool:
+        """Place a ship on the board"""
+        if not self.is_valid_placement(positions):
+            return False
+        
+        ship.place_ship(positions)
+        self.ships.append(ship)
+        self.ships_afloat += 1
+        for position in positions:
+            self.ship_at[position] = ship
+        return True
+    
+    def receive_shot(self, row: int, col: int) -> Tuple[bool, Optional[Ship]]:
+        """Process a shot and return (hit, ship_hit)"""
+        if not self.is_valid_position(row, col):
+            return False, None
+        
+        if (row, col) in self.shots_fired:
+            return False, None  # Already shot here
+        
+        self.shots_fired.add((row, col))
+        if self._target_pool is not None:
+            self._target_pool.remove(row, col)
+        
+        ship = self.ship_at.get((row, col))
+        if ship is not None:
+            self.hits.add((row, col))
+            ship.hit((row, col))
+            if ship.is_sunk():
+                self.ships_afloat -= 1
+            return True, ship
+        
+        self.misses.add((row, col))
+        return False, None
+    
+    def receive_shots(self, cells) -> Tuple[bytes, List[Ship]]:
+        """Process a salvo and return (results, ships_hit), like Board.receive_shots"""
+        size = self.size
+        positions = []
+        for row, col in cells:
+            if not (0 <= row < size and 0 <= col < size):
+                raise ValueError("Shot is off the board")
+            positions.append((row, col))
+        salvo = set(positions)
+        if len(salvo) != len(positions):
+            raise ValueError("A salvo cannot fire twice at one cell")
+        if not self.shots_fired.isdisjoint(salvo):
+            raise ValueError("Cell has already been shot")
+        
+        self.shots_fired |= salvo
+        pool = self._target_pool
+        if pool is not None:
+            for row, col in positions:
+                pool.remove(row, col)
+        ship_at = self.ship_at
+        if salvo.isdisjoint(ship_at):
+            self.misses |= salvo
+            return bytes(len(positions)), []
+        
+        results = bytearray(len(positions))
+        ships_hit = []
+        for index, position in enumerate(positions):
+            ship = ship_at.get(position)
+            if ship is None:
+                self.misses.add(position)
+                continue
+            self.hits.add(position)
+            ship.hit(position)
+            ships_hit.append(ship)
+            if ship.is_sunk():
+                self.ships_afloat -= 1
+                results[index] = SHOT_SUNK
+            else:
+                results[index] = SHOT_HIT
+        return bytes(results), ships_hit
+    
+    def all_ships_sunk(self) -> bool:
+        """Check if all ships are sunk"""
+        return self.ships_afloat == 0
+    
+    @property
+    def grid(self) -> List[List[str]]:
+        """Character grid in the same format as Board.grid"""
+        grid = [[' ' for _ in range(self.size)] for _ in range(self.size)]
+        for (row, col), ship in self.ship_at.items():
+            grid[row][col] = ship.name[0].upper()
+        for row, col in self.hits:
+            grid[row][col] = 'X'
+        for row, col in self.misses:
+            grid[row][col] = 'O'
+        return grid
+
+# Board implementations selectable by name (e.g. from the simulator CLI)
+BOARD_BACKENDS = {
+    "grid": Board,
+    "bitboard": BitBoard,
+    "sparse": SparseBoard,
+}
+
+# Boards larger than this default to SparseBoard instead of a dense grid
+DENSE_BOARD_LIMIT = 100
+
+# Standard fleet: (name, size)
+DEFAULT_SHIPS_CONFIG = [
+    ("Carrier", 5),
+    ("Battleship", 4),
+    ("Cruiser", 3),
+    ("Submarine", 3),
+    ("Destroyer", 2)
+]
+
+# Built-in shooting strategies the computer can use (strategies.register_strategy adds more)
+COMPUTER_STRATEGIES = tuple(STRATEGIES)
 
 class BattleshipGame:
     """Main battleship game class"""
-    def __init__(self):
-        self.board_size = 10
-        self.ships_config = [
-            ("Carrier", 5),
-            ("Battleship", 4),
-            ("Cruiser", 3),
-            ("Submarine", 3),
-            ("Destroyer", 2)
-        ]
-        self.player_board = Board(self.board_size)
-        self.computer_board = Board(self.board_size)
+    def __init__(self, board_class=None, strategy: str = "random", board_size: int = 10,
+                 strategy_options: Optional[dict] = None, opening_book: bool = False, rng=None,
+                 strategies: Optional[Tuple[str, str]] = None, deadline: Optional[float] = None,
+                 salvo: Salvo = None):
+        if strategies is None:
+            strategies = (strategy, strategy)
+        elif len(strategies) != 2:
+            raise ValueError("Give one strategy per side")
+        for name in (strategy,) + tuple(strategies):
+            if name not in STRATEGIES:
+                raise ValueError(f"Unknown computer strategy: {name}")
+        if board_size < 1:
+            raise ValueError(f"Invalid board size: {board_size}")
+        if board_class is None:
+            board_class = SparseBoard if board_size > DENSE_BOARD_LIMIT else Board
+        self.board_size = board_size
+        # Source of every random choice in the game; its own unseeded generator by default
+        self.rng = rng if rng is not None else random.Random()
+        self.ships_config = list(DEFAULT_SHIPS_CONFIG)
+        self.player_board = board_class(self.board_size)
+        self.computer_board = board_class(self.board_size)
         self.game_mode = None
+        self.strategy = strategy
+        # strategies[p] is the strategy of computer player p (player 1 in single player games)
+        self.strategies = list(strategies)
+        self.strategy_options = strategy_options or {}  # Extra arguments for `strategy`'s class
+        self.deadline = deadline  # Seconds a strategy may take per move, or None
+        self.salvo = salvo  # Shots per turn (engine salvo rule), or None for one shot per turn
+        self.computer_players: List[Optional[ComputerPlayer]] = [None, None]  # Created on first shot
+        self.opening_book = opening_book  # Play book moves first, for strategies with a book
+        self.engine = None  # GameEngine for the game in progress
+        self.transcript = None  # TranscriptWriter recording every shot, if any
+        self.owes_second_shot = False  # Resumed mid-turn: the second side shoots first
     
-    def auto_place_ships(self, board: Board) -> bool:
-        """Automatically place all ships on a board"""
-        for ship_name, ship_size in self.ships_config:
-            ship = Ship(ship_name, ship_size)
-            attempts = 0
-            max_attempts = 1000
-            
-            while attempts < max_attempts:
-                # Randomly choose orientation (horizontal or vertical)
-                horizontal = random.choice([True, False])
-                
-                if horizontal:
-                    # Place horizontally
-                    row = random.randint(0, self.board_size - 1)
-                    col = random.randint(0, self.board_size - ship_size)
-                    positions = [(row, col + i) for i in range(ship_size)]
-                else:
-                    # Place vertically
-                    row = random.randint(0, self.board_size - ship_size)
-                    col = random.randint(0, self.board_size - 1)
-                    positions = [(row + i, col) for i in range(ship_size)]
-                
-                if board.place_ship(ship, positions):
-                    break
-                
-                attempts += 1
-            
-            if attempts >= max_attempts:
-                return False  # Failed to place all ships
+    def auto_place_ships(self, board: Board, uniform: bool = False) -> bool:
+        """Automatically place all ships on a board
         
+        Ships are drawn from precomputed placement tables. With uniform=True
+        every valid fleet layout is equally likely; the default sequential
+        draw is faster but favours some layouts.
+        """
+        if uniform:
+            layout = sample_uniform_fleet(board.size, self.ships_config, self.rng)
+        else:
+            layout = draw_fleet(board.size, self.ships_config, self.rng)
+        if layout is None and board.size * board.size <= MAX_TABLE_CELLS:
+            # Random draws gave up; search exhaustively before declaring the fleet impossible
+            layout = solve_fleet(board.size, self.ships_config, self.rng).layout
+        if layout is None:
+            return False  # Failed to place all ships
+        
+        for (ship_name, ship_size), positions in zip(self.ships_config, layout):
+            # Positions come from the shared placement tables; no copy needed
+            if not board.place_ship(Ship(ship_name, ship_size), positions):
+                return False
+        
+        return True
+    
+    def _place_fleets(self, first_name: str, second_name: str) -> bool:
+        """Place both fleets unless they are already placed (e.g. a resumed game)"""
+        if self.player_board.ships and self.computer_board.ships:
+            return True
+        
+        if not self.auto_place_ships(self.player_board):
+            print(f"Error: Could not place {first_name} ships.")
+            return False
+        
+        if not self.auto_place_ships(self.computer_board):
+            print(f"Error: Could not place {second_name} ships.")
+            return False
+        
+        if self.transcript is not None:
+            self.transcript.write_header(self)
         return True
     
+    def start_engine(self) -> GameEngine:
+        """Create the turn engine for the placed fleets
+        
+        Player 0 owns the player board and shoots first, except in a game
+        resumed mid-turn. An open transcript records every shot.
+        """
+        first_player = 1 if self.owes_second_shot else 0
+        self.owes_second_shot = False
+        self.engine = GameEngine((self.player_board, self.computer_board), first_player, self.salvo)
+        if self.transcript is not None:
+            self.engine.subscribe(self._record_event)
+        if any(STRATEGIES[name].observe is not Strategy.observe for name in self.strategies):
+            self.engine.subscribe(self._observe_event)
+        return self.engine
+    
+    def _observe_event(self, event: GameEvent):
+        """Engine subscriber reporting each shot's result to the side that fired it"""
+        computer = self.computer_players[event.player]
+        if computer is None or event.kind == GAME_OVER:
+            return
+        if computer.target is self.engine.target_of(event.player):
+            computer.observe(event.row, event.col, event.kind, event.ship)
+    
+    def _record_event(self, event: GameEvent):
+        """Engine subscriber writing shots to the transcript"""
+        if event.kind != GAME_OVER:
+            # Transcripts number the board shot at: player 0 shoots at board 1
+            self.transcript.record(1 - event.player, event.row, event.col,
+                                   event.kind != MISS, event.kind == SUNK)
+    
+    def _take_shot(self, player: int, human: bool) -> List[GameEvent]:
+        """Ask a human or the computer for a player's shot (or salvo) and apply it"""
+        engine = self.engine
+        while engine.salvo is not None:
+            count = engine.salvo_size(player)
+            if human:
+                cells = self.get_player_salvo(count)
+            else:
+                cells = self.get_computer_salvo(engine.target_of(player), player, count)
+            try:
+                return engine.apply_salvo(player, cells)
+            except ValueError as e:
+                if not human:
+                    raise
+                print(f"{e}. Try again.")
+        while True:
+            if human:
+                row, col = self.get_player_shot()
+            else:
+                row, col = self.get_computer_shot(self.engine.target_of(player), player)
+            try:
+                return self.engine.apply_shot(player, row, col)
+            except ValueError as e:
+                if not human:
+                    raise
+                print(f"{e}. Try again.")
+    
     def get_player_shot(self) -> Tuple[int, int]:
         """Get shot coordinates from player"""
         while True:
@@ -201,30 +762,91 @@ class BattleshipGame:
                     print("Invalid input. Please enter a letter and number (e.g., A5)")
                     continue
                 
-                col = ord(shot[0]) - ord('A')
-                row = int(shot[1:])
+                try:
+                    row, col = parse_coordinate(shot)
+                except ValueError:
+                    print("Invalid input. Please enter a letter and number (e.g., A5)")
+                    continue
                 
                 if not (0 <= col < self.board_size and 0 <= row < self.board_size):
-                    print(f"Invalid coordinates. Please enter A-{chr(65 + self.board_size - 1)} and 0-{self.board_size - 1}")
+                    print(f"Invalid coordinates. Please enter A-{column_label(self.board_size - 1)} and 0-{self.board_size - 1}")
                     continue
                 
                 return row, col
-            except (ValueError, EOFError, KeyboardInterrupt):
+            except (EOFError, KeyboardInterrupt):
                 print("Invalid input. Please enter a letter and number (e.g., A5)")
                 raise
     
-    def get_computer_shot(self) -> Tuple[int, int]:
-        """Get shot coordinates from computer (simple random strategy)"""
+    def get_player_salvo(self, count: int) -> List[Tuple[int, int]]:
+        """Get a salvo of `count` shots from the player, on one line"""
+        example = " ".join(format_coordinate(0, col) for col in range(min(count, 3)))
         while True:
-            row = random.randint(0, self.board_size - 1)
-            col = random.randint(0, self.board_size - 1)
-            
-            if (row, col) not in self.player_board.shots_fired:
-                return row, col
+            words = input(f"Enter your {count} shot{'s' if count != 1 else ''} (e.g., {example}): ").upper().split()
+            if len(words) != count:
+                print(f"Please enter exactly {count} shot{'s' if count != 1 else ''}.")
+                continue
+            try:
+                return [parse_coordinate(word, self.board_size) for word in words]
+            except ValueError as e:
+                print(f"{e}. Please enter shots like {example}")
+    
+    def get_computer_shot(self, target: Optional[Board] = None, player: Optional[int] = None) -> Tuple[int, int]:
+        """Get shot coordinates from computer using the selected strategy
+        
+        Shoots at the player's board unless another target board is given.
+        The shooting side defaults to player 0 for the computer board and
+        player 1 for any other board.
+        """
+        if target is None:
+            target = self.player_board
+        if player is None:
+            player = 0 if target is self.computer_board else 1
+        
+        computer = self.computer_players[player]
+        if computer is None or computer.target is not target:
+            computer = self._aim_computer(player, target)
+        return computer.choose_shot(target)
+    
+    def get_computer_salvo(self, target: Board, player: int, count: int) -> List[Tuple[int, int]]:
+        """Get a salvo of `count` shots at a target board from a computer side's strategy"""
+        computer = self.computer_players[player]
+        if computer is None or computer.target is not target:
+            computer = self._aim_computer(player, target)
+        return computer.choose_salvo(target, count)
+    
+    def _aim_computer(self, player: int, target: Board) -> ComputerPlayer:
+        """Create a side's computer player if needed and point it at a target board
+        
+        Sides are tracked by player rather than by board, and a side given a
+        new board starts its strategy over instead of mixing up two boards.
+        """
+        name = self.strategies[player]
+        options = self.strategy_options if name == self.strategy else {}
+        computer = self.computer_players[player]
+        if computer is None:
+            strategy = STRATEGIES[name](self.board_size, self.ships_config, rng=self.rng, **options)
+            computer = self.computer_players[player] = ComputerPlayer(strategy, self.deadline)
+        opening = None
+        if self.opening_book and name in BOOK_STRATEGIES:
+            book = get_opening_book(name, self.board_size, self.ships_config, strategy_options=options)
+            opening = OpeningLine(book, self.rng)
+        computer.start(target, opening)
+        return computer
+    
+    def _turn_number(self, player: int) -> int:
+        """The number of a player's next turn: one per shot, or per salvo under salvo rules"""
+        engine = self.engine
+        return (engine.salvos if engine.salvo is not None else engine.shots)[player] + 1
+    
+    def close(self):
+        """Release the computer players' worker threads and processes"""
+        for computer in self.computer_players:
+            if computer is not None:
+                computer.close()
     
     def display_game_state(self):
         """Display current game state"""
-        os.system('clear' if os.name == 'posix' else 'cls')
+        clear_screen()
         print("=" * 80)
         print("🚢 BATTLESHIP GAME 🚢")
         print("=" * 80)
@@ -239,156 +861,107 @@ class BattleshipGame:
         target_lines = self._get_guess_board_lines(self.computer_board)
         
         # Display side by side
-        for i in range(len(player_lines)):
-            print(f"{player_lines[i]:<60}    {target_lines[i]}")
+        print("\n".join(f"{player_line:<60}    {target_line}"
+                        for player_line, target_line in zip(player_lines, target_lines)))
         
         print()
         print("-" * 80)
         
         # Show ship status
         print("YOUR SHIPS STATUS:")
-        for ship in self.player_board.ships:
-            if ship.is_sunk():
-                status = "💀 SUNK"
-                symbol = "💀"
-            else:
-                hits = len(ship.hits)
-                status = f"💥 {hits}/{ship.size} hits"
-                symbol = "🚢" if hits == 0 else "💥"
-            
-            ship_symbols = {
-                'Carrier': '🚢',
-                'Battleship': '🛥️ ',
-                'Cruiser': '🚤',
-                'Submarine': '🚤',
-                'Destroyer': '⛵'
-            }
-            ship_icon = ship_symbols.get(ship.name, '🚢')
-            print(f"  {ship_icon} {ship.name}: {status}")
+        print("\n".join(ship_status_lines(self.player_board.ships)))
         
         print()
-        print("LEGEND:")
-        print("  🚢🛥️🚤⛵ = Your ships    💥 = Hit    💨 = Miss    🌊 = Water    ❓ = Unknown")
+        print("\n".join(LEGEND_LINES))
         print()
     
     def _get_board_lines(self, board, show_ships: bool = False):
         """Get board display as list of lines for side-by-side display"""
-        lines = []
-        
-        # Add column headers
-        header = "   " + " ".join([chr(65 + i) for i in range(board.size)])
-        lines.append(header)
-        
-        for row in range(board.size):
-            line = f"{row:2d} "
-            
-            for col in range(board.size):
-                cell = board.grid[row][col]
-                if not show_ships and cell not in ['X', 'O'] and cell != ' ':
-                    cell = ' '  # Hide ships when not showing them
-                
-                # Enhanced display with better symbols
-                if cell == 'X':
-                    line += "💥 "
-                elif cell == 'O':
-                    line += "💨 "
-                elif cell == ' ':
-                    line += "🌊 "
-                else:
-                    # Ship display
-                    ship_symbols = {
-                        'C': '🚢',  # Carrier
-                        'B': '🛥️ ',  # Battleship
-                        'S': '🚤',  # Submarine/Cruiser
-                        'D': '⛵'   # Destroyer
-                    }
-                    symbol = ship_symbols.get(cell, cell)
-                    line += f"{symbol} "
-            
-            lines.append(line)
-        
+        grid = board.grid
+        lines = [column_header(board.size)]
+        lines.extend(fleet_row(row, grid[row], show_ships) for row in range(board.size))
         return lines
     
     def _get_guess_board_lines(self, board):
         """Get guess board display as list of lines for side-by-side display"""
-        lines = []
-        
-        # Add column headers
-        header = "   " + " ".join([chr(65 + i) for i in range(board.size)])
-        lines.append(header)
-        
-        for row in range(board.size):
-            line = f"{row:2d} "
-            
-            for col in range(board.size):
-                if (row, col) in board.shots_fired:
-                    if (row, col) in board.hits:
-                        line += "💥 "  # Hit
-                    else:
-                        line += "💨 "  # Miss
-                else:
-                    line += "❓ "  # Unknown/Unshot
-            
-            lines.append(line)
-        
+        grid = board.grid
+        lines = [column_header(board.size)]
+        lines.extend(guess_row(row, grid[row]) for row in range(board.size))
         return lines
     
-    def play_turn(self) -> bool:
-        """Play one turn of the game. Returns True if game should continue."""
-        # Don't display game state here as it's handled by the calling method
-        
-        # Player's turn
-        print("Your turn!")
-        row, col = self.get_player_shot()
-        hit, ship = self.computer_board.receive_shot(row, col)
-        
-        if hit:
+    def _shot_message(self, shooter: str, row: int, col: int, hit: bool, ship: Optional[Ship]) -> str:
+        """One line describing the result of a shot"""
+        message = f"{shooter} shoots at {format_coordinate(row, col)}: "
+        if not hit:
+            return message + "💨 Miss!"
+        message += f"💥 Hit! {ship.name}"
+        if ship.is_sunk():
+            message += f" - 🚢 {shooter} sunk the {ship.name}!"
+        return message
+    
+    def _announce_single_player_shot(self, event: GameEvent):
+        """Engine subscriber printing shot results in single player mode"""
+        if event.kind == GAME_OVER:
+            return
+        ship = event.ship
+        if event.player == 0:
+            if event.kind == MISS:
+                print("💨 Miss!")
+                return
             print(f"💥 Hit! You hit the computer's {ship.name}!")
-            if ship.is_sunk():
+            if event.kind == SUNK:
                 print(f"🚢 You sunk the computer's {ship.name}!")
         else:
-            print("💨 Miss!")
-        
-        # Show updated board after player's shot
-        print("\n" + "=" * 80)
-        print("BOARD AFTER YOUR SHOT")
-        print("=" * 80)
-        self.display_game_state()
-        
-        if self.computer_board.all_ships_sunk():
-            print("\n🎉 CONGRATULATIONS! You won!")
-            return False
-        
-        try:
-            input("\nPress Enter for computer's turn...")
-        except (EOFError, KeyboardInterrupt):
-            print("\nGame cancelled.")
-            return False
-        
-        # Computer's turn
-        print("\nComputer's turn...")
-        row, col = self.get_computer_shot()
-        hit, ship = self.player_board.receive_shot(row, col)
-        
-        if hit:
+            if event.kind == MISS:
+                print("💨 Computer missed!")
+                return
             print(f"💥 Computer hit your {ship.name}!")
-            if ship.is_sunk():
+            if event.kind == SUNK:
                 print(f"🚢 Computer sunk your {ship.name}!")
+    
+    def _announce_two_player_shot(self, event: GameEvent):
+        """Engine subscriber printing shot results in two player mode"""
+        if event.kind == GAME_OVER:
+            return
+        if event.kind == MISS:
+            print("💨 Miss!")
+            return
+        shooter, owner = event.player + 1, 2 - event.player
+        print(f"💥 Hit! Player {shooter} hit Player {owner}'s {event.ship.name}!")
+        if event.kind == SUNK:
+            print(f"🚢 Player {shooter} sunk Player {owner}'s {event.ship.name}!")
+    
+    def play_turn(self) -> bool:
+        """Play the next shot of a single player game. Returns True if game should continue."""
+        engine = self.engine
+        if engine.turn == 0:
+            print(f"\n=== TURN {self._turn_number(0)} ===")
+            self.display_game_state()
+            print("Your turn!")
+            self._take_shot(0, human=True)
+            heading = "BOARD AFTER YOUR SHOT"
+            prompt = "\nPress Enter for computer's turn..."
         else:
-            print("💨 Computer missed!")
+            print("\nComputer's turn...")
+            self._take_shot(1, human=False)
+            heading = "BOARD AFTER COMPUTER'S SHOT"
+            prompt = "\nPress Enter to continue to next turn..."
         
-        # Show updated board after computer's shot
+        # Show updated board after the shot
         print("\n" + "=" * 80)
-        print("BOARD AFTER COMPUTER'S SHOT")
+        print(heading)
         print("=" * 80)
         self.display_game_state()
         
-        if self.player_board.all_ships_sunk():
+        if engine.winner == 0:
+            print("\n🎉 CONGRATULATIONS! You won!")
+            return False
+        if engine.winner == 1:
             print("\n💥 GAME OVER! Computer won!")
             return False
         
         try:
-            input("\nPress Enter to continue to next turn...")
+            input(prompt)
         except (EOFError, KeyboardInterrupt):
             print("\nGame cancelled.")
             return False
@@ -397,14 +970,11 @@ class BattleshipGame:
     def play_single_player(self):
         """Play single player mode (player vs computer)"""
         print("Setting up single player game...")
+        self.game_mode = "single_player"
         
         # Place ships for both players
-        if not self.auto_place_ships(self.player_board):
-            print("Error: Could not place player ships. Please restart.")
-            return
-        
-        if not self.auto_place_ships(self.computer_board):
-            print("Error: Could not place computer ships. Please restart.")
+        if not self._place_fleets("player", "computer"):
+            print("Please restart.")
             return
         
         print("Ships placed successfully!")
@@ -414,36 +984,20 @@ class BattleshipGame:
             print("\nGame cancelled.")
             return
         
-        # Main game loop
-        turn = 0
-        max_turns = 100  # Prevent infinite loops
-        
-        while turn < max_turns:
-            turn += 1
-            print(f"\n=== TURN {turn} ===")
-            
-            # Show current game state
-            self.display_game_state()
-            
-            if not self.play_turn():
-                break
-        
-        if turn >= max_turns:
-            print(f"\n⚠️  Game stopped after {max_turns} turns (preventing infinite loop)")
+        engine = self.start_engine()
+        engine.subscribe(self._announce_single_player_shot)
+        while self.play_turn():
+            pass
         
         print("\nThanks for playing!")
     
     def play_computer_vs_computer(self):
         """Play computer vs computer mode (for testing/demo)"""
         print("Setting up computer vs computer game...")
+        self.game_mode = "computer_vs_computer"
         
         # Place ships for both computers
-        if not self.auto_place_ships(self.player_board):
-            print("Error: Could not place computer 1 ships.")
-            return
-        
-        if not self.auto_place_ships(self.computer_board):
-            print("Error: Could not place computer 2 ships.")
+        if not self._place_fleets("computer 1", "computer 2"):
             return
         
         print("Ships placed successfully!")
@@ -474,98 +1028,61 @@ class BattleshipGame:
             print("\nSimulation cancelled.")
             return
         
-        turn = 0
-        max_turns = 100  # Prevent infinite loops
+        renderer = TerminalRenderer()
+        frame_options = {
+            "title": "🤖 COMPUTER VS COMPUTER 🤖",
+            "fleet_label": "COMPUTER 1'S FLEET BOARD",
+            "target_label": "COMPUTER 1'S TARGET BOARD (Computer 2's Ships)",
+        }
+        messages = []
         
-        while turn < max_turns:
-            turn += 1
-            print(f"\n{'='*80}")
-            print(f"🚢 TURN {turn} 🚢")
-            print(f"{'='*80}")
-            
-            # Show initial state for this turn
-            print("CURRENT GAME STATE:")
-            self.display_game_state()
-            
-            # Computer 1's turn
-            print(f"\n🤖 COMPUTER 1'S TURN")
-            print("-" * 40)
-            row, col = self.get_computer_shot()
-            hit, ship = self.computer_board.receive_shot(row, col)
-            print(f"Computer 1 shoots at {chr(65 + col)}{row}: ", end="")
-            
-            if hit:
-                print(f"💥 Hit! {ship.name}")
-                if ship.is_sunk():
-                    print(f"🚢 Computer 1 sunk the {ship.name}!")
-            else:
-                print("💨 Miss!")
-            
-            # Show board after Computer 1's shot
-            print(f"\n{'='*80}")
-            print("BOARD AFTER COMPUTER 1'S SHOT")
-            print(f"{'='*80}")
-            self.display_game_state()
-            
-            if self.computer_board.all_ships_sunk():
-                print(f"\n🎉 COMPUTER 1 WINS in {turn} turns!")
-                break
-            
-            # Computer 2's turn
-            print(f"\n🤖 COMPUTER 2'S TURN")
-            print("-" * 40)
-            row, col = self.get_computer_shot()
-            hit, ship = self.player_board.receive_shot(row, col)
-            print(f"Computer 2 shoots at {chr(65 + col)}{row}: ", end="")
-            
-            if hit:
-                print(f"💥 Hit! {ship.name}")
-                if ship.is_sunk():
-                    print(f"🚢 Computer 2 sunk the {ship.name}!")
-            else:
-                print("💨 Miss!")
-            
-            # Show board after Computer 2's shot
-            print(f"\n{'='*80}")
-            print("BOARD AFTER COMPUTER 2'S SHOT")
-            print(f"{'='*80}")
-            self.display_game_state()
-            
-            if self.player_board.all_ships_sunk():
-                print(f"\n🎉 COMPUTER 2 WINS in {turn} turns!")
-                break
-            
-            print(f"\n{'='*80}")
-            print(f"TURN {turn} COMPLETE")
-            print(f"{'='*80}")
-            
-            # Add pause based on speed setting
-            if pause_time > 0:
-                import time
-                time.sleep(pause_time)
-            else:
-                try:
-                    input("Press Enter to continue to next turn...")
-                except (EOFError, KeyboardInterrupt):
-                    print("\nSimulation cancelled.")
-                    break
+        def announce(event: GameEvent):
+            if event.kind != GAME_OVER:
+                shooter = f"Computer {event.player + 1}"
+                messages.append(self._shot_message(shooter, event.row, event.col,
+                                                   event.kind != MISS, event.ship))
+        
+        engine = self.start_engine()
+        engine.subscribe(announce)
+        result = None
+        
+        try:
+            while not engine.finished:
+                player = engine.turn
+                if player == 0:
+                    messages[:] = [f"🚢 TURN {self._turn_number(0)} 🚢"]
+                self._take_shot(player, human=False)
+                renderer.render(self.player_board, self.computer_board, messages=messages, **frame_options)
+                
+                # Add pause based on speed setting
+                if player == 1 and pause_time > 0:
+                    time.sleep(pause_time)
+        except KeyboardInterrupt:
+            result = "Simulation cancelled."
+        finally:
+            # Always show the final position, even if frames were dropped
+            renderer.render(self.player_board, self.computer_board, force=True,
+                            messages=messages, **frame_options)
+            renderer.close()
         
-        if turn >= max_turns:
-            print(f"\n⚠️  Game stopped after {max_turns} turns (preventing infinite loop)")
+        if engine.finished:
+            winner = engine.winner
+            result = f"🎉 COMPUTER {winner + 1} WINS in {self._turn_number(winner) - 1} turns!"
+        if result:
+            print(f"\n{result}")
         
+        for player, computer in enumerate(self.computer_players):
+            if computer is not None:
+                print(f"Computer {player + 1} ({self.strategies[player]}) moves: {computer.latency.summary()}")
         print("\nSimulation complete!")
     
     def play_two_player(self):
         """Play two player mode (human vs human)"""
         print("Setting up two player game...")
+        self.game_mode = "two_player"
         
         # Place ships for both players
-        if not self.auto_place_ships(self.player_board):
-            print("Error: Could not place player 1 ships.")
-            return
-        
-        if not self.auto_place_ships(self.computer_board):
-            print("Error: Could not place player 2 ships.")
+        if not self._place_fleets("player 1", "player 2"):
             return
         
         print("Ships placed successfully!")
@@ -575,87 +1092,46 @@ class BattleshipGame:
             print("\nGame cancelled.")
             return
         
-        turn = 0
-        max_turns = 100  # Prevent infinite loops
+        engine = self.start_engine()
+        engine.subscribe(self._announce_two_player_shot)
         
-        while turn < max_turns:
-            turn += 1
-            print(f"\n=== TURN {turn} ===")
+        while not engine.finished:
+            player = engine.turn + 1
+            if player == 1:
+                print(f"\n=== TURN {self._turn_number(0)} ===")
             
-            # Player 1's turn
             print("\n" + "=" * 80)
-            print("PLAYER 1'S TURN")
+            print(f"PLAYER {player}'S TURN")
             print("=" * 80)
-            self.display_two_player_state(player_turn=1)
+            self.display_two_player_state(player_turn=player)
             
-            print("Player 1's turn!")
-            row, col = self.get_player_shot()
-            hit, ship = self.computer_board.receive_shot(row, col)
+            print(f"Player {player}'s turn!")
+            self._take_shot(player - 1, human=True)
             
-            if hit:
-                print(f"💥 Hit! Player 1 hit Player 2's {ship.name}!")
-                if ship.is_sunk():
-                    print(f"🚢 Player 1 sunk Player 2's {ship.name}!")
-            else:
-                print("💨 Miss!")
-            
-            # Show board after Player 1's shot
+            # Show board after the shot
             print("\n" + "=" * 80)
-            print("BOARD AFTER PLAYER 1'S SHOT")
+            print(f"BOARD AFTER PLAYER {player}'S SHOT")
             print("=" * 80)
-            self.display_two_player_state(player_turn=1)
+            self.display_two_player_state(player_turn=player)
             
-            if self.computer_board.all_ships_sunk():
-                print(f"\n🎉 PLAYER 1 WINS in {turn} turns!")
+            if engine.finished:
+                print(f"\n🎉 PLAYER {player} WINS in {self._turn_number(player - 1) - 1} turns!")
                 break
             
             try:
-                input("\nPress Enter for Player 2's turn...")
-            except (EOFError, KeyboardInterrupt):
-                print("\nGame cancelled.")
-                return
-            
-            # Player 2's turn
-            print("\n" + "=" * 80)
-            print("PLAYER 2'S TURN")
-            print("=" * 80)
-            self.display_two_player_state(player_turn=2)
-            
-            print("Player 2's turn!")
-            row, col = self.get_player_shot()
-            hit, ship = self.player_board.receive_shot(row, col)
-            
-            if hit:
-                print(f"💥 Hit! Player 2 hit Player 1's {ship.name}!")
-                if ship.is_sunk():
-                    print(f"🚢 Player 2 sunk Player 1's {ship.name}!")
-            else:
-                print("💨 Miss!")
-            
-            # Show board after Player 2's shot
-            print("\n" + "=" * 80)
-            print("BOARD AFTER PLAYER 2'S SHOT")
-            print("=" * 80)
-            self.display_two_player_state(player_turn=2)
-            
-            if self.player_board.all_ships_sunk():
-                print(f"\n🎉 PLAYER 2 WINS in {turn} turns!")
-                break
-            
-            try:
-                input("\nPress Enter to continue to next turn...")
+                if player == 1:
+                    input("\nPress Enter for Player 2's turn...")
+                else:
+                    input("\nPress Enter to continue to next turn...")
             except (EOFError, KeyboardInterrupt):
                 print("\nGame cancelled.")
                 return
         
-        if turn >= max_turns:
-            print(f"\n⚠️  Game stopped after {max_turns} turns (preventing infinite loop)")
-        
         print("\nGame complete!")
     
     def display_two_player_state(self, player_turn: int):
         """Display game state for two player mode"""
-        os.system('clear' if os.name == 'posix' else 'cls')
+        clear_screen()
         print("=" * 80)
         print(f"🚢 BATTLESHIP GAME - PLAYER {player_turn}'S TURN 🚢")
         print("=" * 80)
@@ -675,22 +1151,7 @@ class BattleshipGame:
             print()
             print("-" * 80)
             print("PLAYER 1'S SHIPS STATUS:")
-            for ship in self.player_board.ships:
-                if ship.is_sunk():
-                    status = "💀 SUNK"
-                else:
-                    hits = len(ship.hits)
-                    status = f"💥 {hits}/{ship.size} hits"
-                
-                ship_symbols = {
-                    'Carrier': '🚢',
-                    'Battleship': '🛥️ ',
-                    'Cruiser': '🚤',
-                    'Submarine': '🚤',
-                    'Destroyer': '⛵'
-                }
-                ship_icon = ship_symbols.get(ship.name, '🚢')
-                print(f"  {ship_icon} {ship.name}: {status}")
+            print("\n".join(ship_status_lines(self.player_board.ships)))
         
         else:
             # Player 2's view: their ships vs their guesses on Player 1's board
@@ -706,28 +1167,26 @@ class BattleshipGame:
             print()
             print("-" * 80)
             print("PLAYER 2'S SHIPS STATUS:")
-            for ship in self.computer_board.ships:
-                if ship.is_sunk():
-                    status = "💀 SUNK"
-                else:
-                    hits = len(ship.hits)
-                    status = f"💥 {hits}/{ship.size} hits"
-                
-                ship_symbols = {
-                    'Carrier': '🚢',
-                    'Battleship': '🛥️ ',
-                    'Cruiser': '🚤',
-                    'Submarine': '🚤',
-                    'Destroyer': '⛵'
-                }
-                ship_icon = ship_symbols.get(ship.name, '🚢')
-                print(f"  {ship_icon} {ship.name}: {status}")
+            print("\n".join(ship_status_lines(self.computer_board.ships)))
         
         print()
-        print("LEGEND:")
-        print("  🚢🛥️🚤⛵ = Your ships    💥 = Hit    💨 = Miss    🌊 = Water    ❓ = Unknown")
+        print("\n".join(LEGEND_LINES))
         print()
     
+    def play(self, mode: str):
+        """Play a game mode by name (as stored in game_mode)"""
+        modes = {
+            "computer_vs_computer": self.play_computer_vs_computer,
+            "single_player": self.play_single_player,
+            "two_player": self.play_two_player,
+        }
+        try:
+            modes[mode]()
+        finally:
+            self.close()
+            if self.transcript is not None:
+                self.transcript.close()
+    
     def run(self):
         """Main game loop"""
         print("Welcome to Battleship!")
@@ -738,17 +1197,16 @@ class BattleshipGame:
         print("2. Two Player (Human vs Human)")
         print()
         
+        choices = {
+            "0": "computer_vs_computer",
+            "1": "single_player",
+            "2": "two_player",
+        }
         while True:
             try:
                 choice = input("Select game mode (0, 1, or 2): ").strip()
-                if choice == "0":
-                    self.play_computer_vs_computer()
-                    break
-                elif choice == "1":
-                    self.play_single_player()
-                    break
-                elif choice == "2":
-                    self.play_two_player()
+                if choice in choices:
+                    self.play(choices[choice])
                     break
                 else:
                     print("Invalid choice. Please enter 0, 1, or 2.")
@@ -757,5 +1215,55 @@ class BattleshipGame:
                 break
 
 if __name__ == "__main__":
-    game = BattleshipGame()
-    game.run() 
\ No newline at end of file
+    import argparse
+    
+    # Modules that import battleship (transcripts, profiling) share this script's classes
+    sys.modules.setdefault("battleship", sys.modules[__name__])
+    from profiling import add_profile_arguments, profiler_from_args
+    
+    parser = argparse.ArgumentParser(description="Play Battleship in the terminal")
+    parser.add_argument("--strategy", choices=COMPUTER_STRATEGIES, default="random",
+                        help="computer shooting strategy")
+    parser.add_argument("--strategies", nargs=2, choices=COMPUTER_STRATEGIES, default=None,
+                        metavar=("FIRST", "SECOND"),
+                        help="strategies of computer 1 and computer 2 (the second is the single player opponent)")
+    parser.add_argument("--deadline", type=float, default=None, metavar="MS",
+                        help="longest a strategy may think per move before a random move is played")
+    parser.add_argument("--board-size", type=int, default=10, help="board width and height")
+    parser.add_argument("--salvo", type=parse_salvo, default=None, metavar="N|ships",
+                        help="fire N shots per turn, or one per ship still afloat ('ships')")
+    parser.add_argument("--opening-book", action="store_true",
+                        help="play precomputed opening moves (built and cached on first use)")
+    parser.add_argument("--record", metavar="FILE", help="append a transcript of the game to FILE")
+    parser.add_argument("--resume", metavar="FILE", help="resume the last game recorded in FILE")
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+    
+    deadline = args.deadline / 1000 if args.deadline is not None else None
+    profiler = profiler_from_args(args)
+    if profiler is not None:
+        profiler.enable()
+    try:
+        if args.resume:
+            from transcript import resume_game
+            
+            try:
+                game = resume_game(args.resume, strategy=args.strategy, opening_book=args.opening_book,
+                                   strategies=args.strategies, deadline=deadline, salvo=args.salvo)
+            except ValueError as e:
+                parser.error(str(e))
+            game.play(game.game_mode)
+        else:
+            game = BattleshipGame(strategy=args.strategy, board_size=args.board_size,
+                                  opening_book=args.opening_book, strategies=args.strategies,
+                                  deadline=deadline, salvo=args.salvo)
+            if args.record:
+                from transcript import TranscriptWriter
+                
+                game.transcript = TranscriptWriter(args.record)
+            game.run()
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            print()
+            print(profiler.summary()) 
\ No newline at end of file
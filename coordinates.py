@@ -0,0 +1,67 @@
+"""
+Board coordinate labels for the Battleship game.
+
+Columns are labelled like spreadsheet columns (A-Z, then AA, AB, ...) and
+rows are numbered from 0, so a shot is written as e.g. "A5" or "AB120".
+"""
+
+from functools import lru_cache
+from typing import Optional, Tuple
+
+
+def column_label(col: int) -> str:
+    """Letters for a 0-based column index (0 -> A, 25 -> Z, 26 -> AA)"""
+    label = ""
+    col += 1
+    while col:
+        col, remainder = divmod(col - 1, 26)
+        label = chr(65 + remainder) + label
+    return label
+
+
+def column_index(label: str) -> int:
+    """0-based column index for a column label (A -> 0, AA -> 26)"""
+    col = 0
+    for letter in label.upper():
+        if not 'A' <= letter <= 'Z':
+            raise ValueError(f"Invalid column: {label}")
+        col = col * 26 + ord(letter) - 64
+    if not col:
+        raise ValueError("Missing column")
+    return col - 1
+
+
+def format_coordinate(row: int, col: int) -> str:
+    """Shot notation for a cell, e.g. (5, 0) -> A5"""
+    return f"{column_label(col)}{row}"
+
+
+def parse_coordinate(text: str, board_size: Optional[int] = None) -> Tuple[int, int]:
+    """Parse shot notation like A5 or AB120 into (row, col)
+
+    Raises ValueError for malformed input or, if board_size is given,
+    coordinates outside the board.
+    """
+    text = text.strip().upper()
+    split = 0
+    while split < len(text) and text[split].isalpha():
+        split += 1
+    letters, digits = text[:split], text[split:]
+    if not letters or not digits.isdigit():
+        raise ValueError(f"Invalid coordinate: {text}")
+
+    row, col = int(digits), column_index(letters)
+    if board_size is not None and not (0 <= row < board_size and 0 <= col < board_size):
+        raise ValueError(f"Coordinate off the board: {text}")
+    return row, col
+
+
+@lru_cache(maxsize=None)
+def coordinate_grid(board_size: int) -> Tuple[Tuple[Tuple[int, int], ...], ...]:
+    """Shared (row, col) tuples for every cell of a board, indexed [row][col]
+
+    Boards and placement tables hand out these tuples instead of building a
+    new one per shot or placement, so each coordinate exists only once no
+    matter how many live games refer to it.
+    """
+    return tuple(tuple((row, col) for col in range(board_size)) for row in range(board_size))
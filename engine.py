@@ -0,0 +1,213 @@
+"""
+Event-driven turn engine for the Battleship game.
+
+GameEngine holds the rules of a two-player game - whose turn it is, which
+shots are legal and when the game is won - with no console I/O. Each shot
+produces GameEvent objects (miss, hit or sunk, then game_over when a fleet is
+gone) that are returned to the caller and passed to every subscriber, so the
+console modes, the network server and transcripts are all frontends over the
+same engine.
+
+Player 0 owns the first board and shoots at the second; player 1 owns the
+second board and shoots at the first.
+
+In the classic rules a player fires one shot per turn and the turn passes
+after every shot. Salvo rules instead give each turn a fixed number of shots,
+or one shot per ship the shooter still has afloat (SALVO_SHIPS); the whole
+salvo is resolved at once by apply_salvo, then the turn passes.
+"""
+
+from typing import Callable, List, Optional, Sequence, Tuple, Union
+
+MISS = "miss"
+HIT = "hit"
+SUNK = "sunk"
+GAME_OVER = "game_over"
+
+# Per-cell result codes of Board.receive_shots, and the event kind of each
+SHOT_MISS, SHOT_HIT, SHOT_SUNK = 0, 1, 2
+SHOT_KINDS = (MISS, HIT, SUNK)
+
+# Salvo rule giving one shot per ship the shooter has afloat
+SALVO_SHIPS = "ships"
+
+Salvo = Union[int, str, None]
+
+
+def check_salvo(salvo: Salvo):
+    """Raise ValueError unless salvo is None, a positive number of shots or SALVO_SHIPS"""
+    if salvo is not None and salvo != SALVO_SHIPS and (type(salvo) is not int or salvo < 1):
+        raise ValueError(f"Invalid salvo rule: {salvo!r}")
+
+
+def parse_salvo(text: Optional[str]) -> Salvo:
+    """Salvo rule from its command line form: a number of shots, "ships" or None"""
+    if text is None or text == SALVO_SHIPS:
+        return text
+    try:
+        shots = int(text)
+    except ValueError:
+        raise ValueError(f"Invalid salvo rule: {text} (use a number of shots or '{SALVO_SHIPS}')") from None
+    if shots < 1:
+        raise ValueError("A salvo needs at least one shot")
+    return shots
+
+
+class GameEvent:
+    """Something that happened in a game
+
+    Shot events (MISS, HIT, SUNK) carry the shooting player, the target cell
+    and for hits the ship hit. GAME_OVER carries the winning player.
+    """
+    __slots__ = ("kind", "player", "row", "col", "ship")
+
+    def __init__(self, kind: str, player: int, row: Optional[int] = None,
+                 col: Optional[int] = None, ship=None):
+        self.kind = kind
+        self.player = player
+        self.row = row
+        self.col = col
+        self.ship = ship
+
+    def __repr__(self) -> str:
+        return f"GameEvent({self.kind!r}, player={self.player}, row={self.row}, col={self.col})"
+
+
+Subscriber = Callable[[GameEvent], None]
+
+
+class GameEngine:
+    """Turn rules for two boards, free of console I/O
+
+    `salvo` is None for the classic rules, a number of shots per turn or
+    SALVO_SHIPS. Boards rebuilt from a finished game start the engine with
+    its winner set.
+    """
+    def __init__(self, boards: Sequence, first_player: int = 0, salvo: Salvo = None):
+        if len(boards) != 2:
+            raise ValueError("A game needs exactly two boards")
+        check_salvo(salvo)
+        self.boards = list(boards)  # boards[p] is player p's fleet
+        self.turn = first_player
+        self.winner: Optional[int] = None
+        for player in (0, 1):
+            target = self.boards[1 - player]
+            if target.ships and target.all_ships_sunk():
+                self.winner = player
+        self.salvo = salvo
+        # Shots fired by each player, counting any made before the engine took over
+        self.shots = [len(self.boards[1].shots_fired), len(self.boards[0].shots_fired)]
+        self.salvos = [0, 0]  # Salvos fired by each player under salvo rules
+        self._subscribers: List[Subscriber] = []
+
+    @property
+    def finished(self) -> bool:
+        return self.winner is not None
+
+    def subscribe(self, callback: Subscriber):
+        """Call callback(event) for every event from now on"""
+        self._subscribers.append(callback)
+
+    def unsubscribe(self, callback: Subscriber):
+        self._subscribers.remove(callback)
+
+    def target_of(self, player: int):
+        """The board a player shoots at"""
+        return self.boards[1 - player]
+
+    def salvo_size(self, player: int) -> int:
+        """Shots in a player's salvo this turn (1 under the classic rules)
+
+        Never more than the cells the player has left to shoot at.
+        """
+        if self.salvo is None:
+            return 1
+        shots = self.boards[player].ships_afloat if self.salvo == SALVO_SHIPS else self.salvo
+        target = self.boards[1 - player]
+        return min(shots, target.size * target.size - self.shots[player])
+
+    def apply_shot(self, player: int, row: int, col: int) -> List[GameEvent]:
+        """Resolve a player's shot and pass its events to the subscribers
+
+        Raises ValueError for a shot out of turn, off the board, at a cell
+        already shot or after the game is over; the game state is unchanged.
+        """
+        if self.salvo is not None:
+            raise ValueError("This game is played in salvos")
+        self._check_turn(player)
+        target = self.boards[1 - player]
+        size = target.size
+        if not (0 <= row < size and 0 <= col < size):
+            raise ValueError("Shot is off the board")
+        if target.has_been_shot(row, col):
+            raise ValueError("Cell has already been shot")
+
+        hit, ship = target.receive_shot(row, col)
+        self.shots[player] += 1
+        if not hit:
+            self.turn = 1 - player
+            events = [GameEvent(MISS, player, row, col)]
+        elif not ship.is_sunk():
+            self.turn = 1 - player
+            events = [GameEvent(HIT, player, row, col, ship)]
+        else:
+            events = [GameEvent(SUNK, player, row, col, ship)]
+            if target.all_ships_sunk():
+                self.winner = player
+                events.append(GameEvent(GAME_OVER, player))
+            else:
+                self.turn = 1 - player
+
+        if self._subscribers:
+            subscribers = tuple(self._subscribers)  # Callbacks may unsubscribe themselves
+            for event in events:
+                for callback in subscribers:
+                    callback(event)
+        return events
+
+    def apply_salvo(self, player: int, cells: Sequence[Tuple[int, int]]) -> List[GameEvent]:
+        """Resolve a player's salvo under salvo rules and pass its events to the subscribers
+
+        The salvo must have exactly salvo_size(player) distinct cells. There
+        is one event per cell, in salvo order, then GAME_OVER if the salvo
+        sank the last ship; HIT and SUNK events carry the ship.
+        Raises ValueError for a salvo out of turn, of the wrong size, or with
+        a cell off the board, already shot or repeated; the game state is then
+        unchanged.
+        """
+        if self.salvo is None:
+            raise ValueError("This game is played one shot at a time")
+        self._check_turn(player)
+        expected = self.salvo_size(player)
+        if len(cells) != expected:
+            raise ValueError(f"A salvo is {expected} shot{'s' if expected != 1 else ''} this turn")
+        target = self.boards[1 - player]
+        results, ships_hit = target.receive_shots(cells)
+        self.shots[player] += len(cells)
+        self.salvos[player] += 1
+
+        events = []
+        ships = iter(ships_hit)
+        for (row, col), result in zip(cells, results):
+            if result:
+                events.append(GameEvent(SHOT_KINDS[result], player, row, col, next(ships)))
+            else:
+                events.append(GameEvent(MISS, player, row, col))
+        if target.all_ships_sunk():
+            self.winner = player
+            events.append(GameEvent(GAME_OVER, player))
+        else:
+            self.turn = 1 - player
+
+        if self._subscribers:
+            subscribers = tuple(self._subscribers)  # Callbacks may unsubscribe themselves
+            for event in events:
+                for callback in subscribers:
+                    callback(event)
+        return events
+
+    def _check_turn(self, player: int):
+        if self.winner is not None:
+            raise ValueError("The game is over")
+        if player != self.turn:
+            raise ValueError(f"It is player {self.turn}'s turn")
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Strategy evaluation harness for Battleship computer strategies.
+
+Each strategy plays against the same seeded set of fleet layouts until the
+whole fleet is sunk. The report gives shots-to-sink statistics (mean, median,
+p95 and a 95% confidence interval for the mean) and the time each strategy
+takes to choose a move, side by side, and can be written as JSON.
+
+Usage:
+    python evaluate.py --strategies random density --games 1000 --seed 1 --output report.json
+"""
+
+import argparse
+import json
+import math
+import random
+import statistics
+import time
+from typing import Dict, List, Optional, Tuple
+
+from battleship import COMPUTER_STRATEGIES, DEFAULT_SHIPS_CONFIG, BattleshipGame, Board, Ship
+from placement import draw_fleet
+from seeding import game_rng
+
+Layout = List[Tuple[Tuple[int, int], ...]]
+
+
+def percentile(values: List[float], p: float) -> float:
+    """Nearest-rank percentile (0-100) of a list of values"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(len(ordered) * p / 100.0))
+    return ordered[rank - 1]
+
+
+def make_layouts(n_games: int, seed: int, board_size: int = 10,
+                 ships_config: Optional[List[Tuple[str, int]]] = None) -> List[Layout]:
+    """The fixed set of fleet layouts every strategy is evaluated against"""
+    if ships_config is None:
+        ships_config = DEFAULT_SHIPS_CONFIG
+    rng = random.Random(seed)
+    layouts = []
+    for _ in range(n_games):
+        layout = draw_fleet(board_size, ships_config, rng=rng)
+        if layout is None:
+            raise RuntimeError("Could not place the fleet")
+        layouts.append(layout)
+    return layouts
+
+
+def play_layout(strategy: str, layout: Layout, board_size: int = 10,
+                ships_config: Optional[List[Tuple[str, int]]] = None, rng=None) -> Tuple[int, List[float]]:
+    """Let a strategy sink one fleet; returns (shots, seconds per move)
+
+    `rng` is the game's random generator (by default a fresh unseeded one).
+    """
+    if ships_config is None:
+        ships_config = DEFAULT_SHIPS_CONFIG
+    game = BattleshipGame(strategy=strategy, board_size=board_size, rng=rng)
+    game.ships_config = list(ships_config)
+    board = Board(board_size)
+    for (name, size), positions in zip(ships_config, layout):
+        board.place_ship(Ship(name, size), list(positions))
+
+    move_times = []
+    clock = time.perf_counter
+    while not board.all_ships_sunk():
+        start = clock()
+        row, col = game.get_computer_shot(board)
+        move_times.append(clock() - start)
+        board.receive_shot(row, col)
+    return len(move_times), move_times
+
+
+def evaluate_strategy(strategy: str, layouts: List[Layout], seed: int = 0, board_size: int = 10,
+                      ships_config: Optional[List[Tuple[str, int]]] = None) -> Dict:
+    """Shots-to-sink and move latency statistics for one strategy
+
+    Game i draws from its own generator seeded from (seed, i), so every
+    strategy sees the same random stream on the same layout.
+    """
+    shots = []
+    move_times = []
+    for index, layout in enumerate(layouts):
+        game_shots, game_times = play_layout(strategy, layout, board_size, ships_config,
+                                             rng=game_rng(seed, index))
+        shots.append(game_shots)
+        move_times.extend(game_times)
+
+    mean = statistics.mean(shots)
+    stdev = statistics.stdev(shots) if len(shots) > 1 else 0.0
+    margin = 1.96 * stdev / math.sqrt(len(shots))
+    return {
+        "strategy": strategy,
+        "games": len(shots),
+        "shots": {
+            "mean": mean,
+            "stdev": stdev,
+            "ci95": [mean - margin, mean + margin],
+            "median": statistics.median(shots),
+            "p95": percentile(shots, 95),
+            "min": min(shots),
+            "max": max(shots),
+        },
+        "move_time_us": {
+            "mean": statistics.mean(move_times) * 1e6,
+            "p50": percentile(move_times, 50) * 1e6,
+            "p99": percentile(move_times, 99) * 1e6,
+            "max": max(move_times) * 1e6,
+        },
+    }
+
+
+def compare_strategies(strategies: List[str], n_games: int = 1000, seed: int = 0,
+                       board_size: int = 10) -> Dict:
+    """Evaluate several strategies against the same layouts"""
+    for strategy in strategies:
+        if strategy not in COMPUTER_STRATEGIES:
+            raise ValueError(f"Unknown computer strategy: {strategy}")
+    layouts = make_layouts(n_games, seed, board_size)
+    return {
+        "games": n_games,
+        "seed": seed,
+        "board_size": board_size,
+        "results": [evaluate_strategy(strategy, layouts, seed, board_size) for strategy in strategies],
+    }
+
+
+def format_report(report: Dict) -> str:
+    """Side-by-side table of a comparison report"""
+    lines = [
+        f"{report['games']} games, seed {report['seed']}, {report['board_size']}x{report['board_size']} board",
+        f"{'strategy':<12} {'mean':>7} {'95% CI':>15} {'median':>7} {'p95':>5} "
+        f"{'us/move':>9} {'p99 us':>9}",
+    ]
+    for result in report["results"]:
+        shots = result["shots"]
+        timing = result["move_time_us"]
+        low, high = shots["ci95"]
+        lines.append(
+            f"{result['strategy']:<12} {shots['mean']:>7.2f} {f'{low:.2f}-{high:.2f}':>15} "
+            f"{shots['median']:>7} {shots['p95']:>5} {timing['mean']:>9.1f} {timing['p99']:>9.1f}"
+        )
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None):
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description="Compare Battleship computer strategies")
+    parser.add_argument("--strategies", nargs="+", choices=COMPUTER_STRATEGIES,
+                        default=["random", "density"], help="strategies to compare")
+    parser.add_argument("-n", "--games", type=int, default=1000, help="layouts per strategy")
+    parser.add_argument("-s", "--seed", type=int, default=0, help="layout seed")
+    parser.add_argument("--board-size", type=int, default=10, help="board width and height")
+    parser.add_argument("-o", "--output", help="write the report as JSON to this file")
+    args = parser.parse_args(argv)
+
+    report = compare_strategies(args.strategies, args.games, args.seed, args.board_size)
+    print(format_report(report))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nReport written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
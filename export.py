@@ -0,0 +1,322 @@
+#!/usr/bin/env python3
+"""
+Streaming export of headless Battleship games as training data.
+
+Games are played computer vs computer with the regular Board, Ship and
+auto_place_ships rules and written out in fixed-size chunks of games, so
+memory stays bounded by one chunk per worker however many games are
+exported. Each game carries both fleet layouts, the shot sequence and, for
+every turn, the board as the shooter saw it before firing:
+
+    state cell:  0 not shot, 1 miss, 2 hit, 3 part of a sunk ship
+    result:      0 miss, 1 hit, 2 sunk
+
+Formats:
+    ndjson  chunk-NNNNNN.ndjson, one JSON object per game, with states as
+            strings of size * size characters ('.', 'o', 'x', '#')
+    npy     chunk-NNNNNN.npz (requires NumPy), NPY arrays per chunk:
+            fleets (games x 2 x size x size, ship number or 0), winner,
+            and per turn game, player, state (turns x size x size), row,
+            col and result
+
+A chunk only appears under its final name once it is complete, and every
+game is seeded from the master seed and its index, so an interrupted export
+re-run with the same options skips the finished chunks and produces the same
+files as an uninterrupted one.
+
+Usage:
+    python export.py data/ --games 1000000 --format npy --seed 1 --workers 8
+"""
+
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, List, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - exercised only without NumPy
+    np = None
+
+from battleship import BOARD_BACKENDS, COMPUTER_STRATEGIES, BattleshipGame
+from engine import HIT, MISS, SUNK
+from seeding import RNG_BACKENDS, game_rng
+
+FORMATS = ("ndjson", "npy")
+EXTENSIONS = {"ndjson": ".ndjson", "npy": ".npz"}
+MANIFEST = "manifest.json"
+
+RESULT_CODES = {MISS: 0, HIT: 1, SUNK: 2}
+UNKNOWN, MISSED, HIT_CELL, SUNK_CELL = 0, 1, 2, 3
+_STATE_CHARS = bytes.maketrans(bytes(range(4)), b".ox#")
+
+
+class GameData:
+    """Everything recorded about one exported game"""
+    __slots__ = ("index", "board_size", "fleets", "winner", "players", "rows", "cols",
+                 "results", "states")
+
+    def __init__(self, index: int, board_size: int, fleets: List[List[List[Tuple[int, int]]]]):
+        self.index = index
+        self.board_size = board_size
+        self.fleets = fleets  # fleets[p] holds the ship positions of player p
+        self.winner: Optional[int] = None
+        self.players: List[int] = []
+        self.rows: List[int] = []
+        self.cols: List[int] = []
+        self.results: List[int] = []
+        self.states: List[bytes] = []  # One size * size byte string per turn
+
+    @property
+    def turns(self) -> int:
+        return len(self.players)
+
+    def to_json(self) -> dict:
+        return {
+            "game": self.index,
+            "board_size": self.board_size,
+            "fleets": [[[list(cell) for cell in positions] for positions in fleet]
+                       for fleet in self.fleets],
+            "winner": self.winner,
+            "shots": [[player, row, col, result] for player, row, col, result
+                      in zip(self.players, self.rows, self.cols, self.results)],
+            "states": [state.translate(_STATE_CHARS).decode("ascii") for state in self.states],
+        }
+
+
+def play_recorded_game(game: BattleshipGame, index: int = 0) -> GameData:
+    """Play one headless computer vs computer game, recording every turn"""
+    for board in (game.player_board, game.computer_board):
+        if not game.auto_place_ships(board):
+            raise RuntimeError("Could not place the fleets")
+    size = game.board_size
+    data = GameData(index, size, [[list(ship.positions) for ship in board.ships]
+                                  for board in (game.player_board, game.computer_board)])
+
+    engine = game.start_engine()
+    boards = engine.boards
+    apply_shot = engine.apply_shot
+    get_computer_shot = game.get_computer_shot
+    views = [bytearray(size * size), bytearray(size * size)]  # What each player has seen
+    while engine.winner is None:
+        player = engine.turn
+        view = views[player]
+        row, col = get_computer_shot(boards[1 - player])
+        data.states.append(bytes(view))
+        event = apply_shot(player, row, col)[0]
+        data.players.append(player)
+        data.rows.append(row)
+        data.cols.append(col)
+        data.results.append(RESULT_CODES[event.kind])
+        if event.kind == MISS:
+            view[row * size + col] = MISSED
+        elif event.kind == HIT:
+            view[row * size + col] = HIT_CELL
+        else:
+            for ship_row, ship_col in event.ship.positions:
+                view[ship_row * size + ship_col] = SUNK_CELL
+    data.winner = engine.winner
+    return data
+
+
+def iter_games(n_games: int, start: int = 0, board_class=None, strategy: str = "random",
+               board_size: int = 10, seed: Optional[int] = None, rng: str = "mt") -> Iterator[GameData]:
+    """Play games start..start + n_games one at a time, recording each"""
+    for index in range(start, start + n_games):
+        game = BattleshipGame(board_class, strategy=strategy, board_size=board_size,
+                              rng=game_rng(seed, index, rng))
+        yield play_recorded_game(game, index)
+
+
+def _write_ndjson(games: Iterator[GameData], f) -> Tuple[int, int]:
+    n_games = n_turns = 0
+    for data in games:
+        f.write(json.dumps(data.to_json(), separators=(",", ":")).encode("utf-8") + b"\n")
+        n_games += 1
+        n_turns += data.turns
+    return n_games, n_turns
+
+
+def _write_npy(games: Iterator[GameData], f, board_size: int) -> Tuple[int, int]:
+    fleets, winners = [], []
+    game_ids, players, rows, cols, results, states = [], [], [], [], [], []
+    for data in games:
+        fleet_grid = bytearray(2 * board_size * board_size)
+        for player, fleet in enumerate(data.fleets):
+            base = player * board_size * board_size
+            for number, positions in enumerate(fleet, start=1):
+                for row, col in positions:
+                    fleet_grid[base + row * board_size + col] = number
+        fleets.append(bytes(fleet_grid))
+        winners.append(data.winner)
+        game_ids.extend([data.index] * data.turns)
+        players.extend(data.players)
+        rows.extend(data.rows)
+        cols.extend(data.cols)
+        results.extend(data.results)
+        states.extend(data.states)
+
+    shape = (board_size, board_size)
+    np.savez(
+        f,
+        fleets=np.frombuffer(b"".join(fleets), dtype=np.int8).reshape((len(winners), 2) + shape),
+        winner=np.array(winners, dtype=np.int8),
+        game=np.array(game_ids, dtype=np.int64),
+        player=np.array(players, dtype=np.int8),
+        state=np.frombuffer(b"".join(states), dtype=np.int8).reshape((len(states),) + shape),
+        row=np.array(rows, dtype=np.int32),
+        col=np.array(cols, dtype=np.int32),
+        result=np.array(results, dtype=np.int8),
+    )
+    return len(winners), len(players)
+
+
+def chunk_path(directory: str, chunk: int, fmt: str) -> str:
+    return os.path.join(directory, f"chunk-{chunk:06d}{EXTENSIONS[fmt]}")
+
+
+def _export_chunk(task: Tuple[str, int, int, int, Optional[int], dict]) -> Tuple[int, int, int]:
+    """Play and write one chunk; returns (games, turns, bytes)"""
+    directory, chunk, start, count, seed, options = task
+    fmt = options["format"]
+    games = iter_games(count, start, BOARD_BACKENDS.get(options["backend"]),
+                       options["strategy"], options["board_size"], seed, options["rng"])
+    path = chunk_path(directory, chunk, fmt)
+    temporary = path + ".tmp"
+    with open(temporary, "wb") as f:
+        if fmt == "npy":
+            n_games, n_turns = _write_npy(games, f, options["board_size"])
+        else:
+            n_games, n_turns = _write_ndjson(games, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temporary, path)  # The chunk counts as finished from here on
+    return n_games, n_turns, os.path.getsize(path)
+
+
+class ExportStats:
+    """Totals for one export run"""
+    def __init__(self):
+        self.chunks_written = 0
+        self.chunks_skipped = 0
+        self.games = 0
+        self.turns = 0
+        self.bytes = 0
+        self.elapsed = 0.0
+
+    @property
+    def turns_per_second(self) -> float:
+        return self.turns / self.elapsed if self.elapsed else 0.0
+
+    def summary(self) -> str:
+        return (f"Wrote {self.chunks_written} chunks ({self.chunks_skipped} already done): "
+                f"{self.games} games, {self.turns} turns, {self.bytes / 1e6:.1f} MB "
+                f"in {self.elapsed:.2f}s ({self.turns_per_second:.0f} turns/sec)")
+
+
+def _check_manifest(directory: str, manifest: dict, n_games: int):
+    """Record the export options, refusing to mix chunks from different options"""
+    path = os.path.join(directory, MANIFEST)
+    if os.path.exists(path):
+        with open(path) as f:
+            existing = json.load(f)
+        previous_games = existing.pop("games")
+        if existing != manifest:
+            raise ValueError(f"{directory} holds an export with different options: {existing}")
+        if n_games > previous_games and previous_games % manifest["chunk_games"]:
+            # The old last chunk is short and would be taken as finished
+            raise ValueError(f"Cannot extend an export of {previous_games} games in chunks "
+                             f"of {manifest['chunk_games']}")
+        n_games = max(n_games, previous_games)
+    with open(path, "w") as f:
+        json.dump(dict(manifest, games=n_games), f, indent=2)
+
+
+def export_games(directory: str, n_games: int, fmt: str = "ndjson", chunk_games: int = 1000,
+                 seed: Optional[int] = None, workers: int = 1, backend: Optional[str] = None,
+                 strategy: str = "random", board_size: int = 10, rng: str = "mt") -> ExportStats:
+    """Play n_games headless games and write them to chunk files in directory
+
+    Chunks already present from an earlier run with the same options are
+    skipped, so an interrupted export continues where it stopped. Chunks are
+    written by `workers` processes; at most two chunks per worker are in
+    flight at any time.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown export format: {fmt}")
+    if fmt == "npy" and np is None:
+        raise ImportError("NPY export requires NumPy (pip install numpy)")
+    if backend is not None and backend not in BOARD_BACKENDS:
+        raise ValueError(f"Unknown board backend: {backend}")
+    if strategy not in COMPUTER_STRATEGIES:
+        raise ValueError(f"Unknown computer strategy: {strategy}")
+    if rng not in RNG_BACKENDS:
+        raise ValueError(f"Unknown RNG backend: {rng}")
+    if chunk_games < 1:
+        raise ValueError("Chunks need at least one game")
+
+    options = {"format": fmt, "backend": backend, "strategy": strategy, "board_size": board_size,
+               "rng": rng}
+    os.makedirs(directory, exist_ok=True)
+    _check_manifest(directory, dict(options, chunk_games=chunk_games, seed=seed), n_games)
+
+    stats = ExportStats()
+    start_time = time.perf_counter()
+    tasks = []
+    for chunk, start in enumerate(range(0, n_games, chunk_games)):
+        if os.path.exists(chunk_path(directory, chunk, fmt)):
+            stats.chunks_skipped += 1
+            continue
+        tasks.append((directory, chunk, start, min(chunk_games, n_games - start), seed, options))
+
+    def record(result):
+        n_written, n_turns, n_bytes = result
+        stats.chunks_written += 1
+        stats.games += n_written
+        stats.turns += n_turns
+        stats.bytes += n_bytes
+
+    if workers <= 1:
+        for task in tasks:
+            record(_export_chunk(task))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            pending = []
+            for task in tasks:
+                pending.append(pool.submit(_export_chunk, task))
+                if len(pending) >= 2 * workers:
+                    record(pending.pop(0).result())
+            for future in pending:
+                record(future.result())
+
+    stats.elapsed = time.perf_counter() - start_time
+    return stats
+
+
+def main(argv: Optional[List[str]] = None):
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description="Export headless Battleship games as training data")
+    parser.add_argument("directory", help="output directory (re-run to resume an export)")
+    parser.add_argument("-n", "--games", type=int, default=10000, help="number of games to export")
+    parser.add_argument("-f", "--format", choices=FORMATS, default="ndjson", help="chunk file format")
+    parser.add_argument("-c", "--chunk-games", type=int, default=1000, help="games per chunk file")
+    parser.add_argument("-s", "--seed", type=int, default=None, help="master random seed")
+    parser.add_argument("-w", "--workers", type=int, default=1, help="worker processes")
+    parser.add_argument("-b", "--backend", choices=sorted(BOARD_BACKENDS), default=None,
+                        help="board implementation (default: grid, sparse for large boards)")
+    parser.add_argument("--strategy", choices=COMPUTER_STRATEGIES, default="random",
+                        help="computer shooting strategy")
+    parser.add_argument("--board-size", type=int, default=10, help="board width and height")
+    parser.add_argument("--rng", choices=sorted(RNG_BACKENDS), default="mt",
+                        help="per-game random number generator")
+    args = parser.parse_args(argv)
+
+    stats = export_games(args.directory, args.games, args.format, args.chunk_games, args.seed,
+                         args.workers, args.backend, args.strategy, args.board_size, args.rng)
+    print(stats.summary())
+
+
+if __name__ == "__main__":
+    main()
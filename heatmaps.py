@@ -0,0 +1,403 @@
+#!/usr/bin/env python3
+"""
+Per-cell heatmaps accumulated over very large numbers of games.
+
+A HeatmapStore is a directory of NPY counter arrays opened as memory maps:
+adding games updates the counters in place, so runs over tens of millions of
+games add to what earlier runs counted without reading anything back. All
+counts are for one board size and fleet, per board (a game has two):
+
+    occupancy        fleet layouts with a ship on the cell
+    shots            shots fired at the cell
+    hits             shots at the cell that hit (hit rate = hits / shots)
+    first_hit        boards whose first hit landed on the cell
+    first_hit_shots  boards first hit by their k-th shot (k = 0: never hit)
+
+Games come from transcript archives or are played headless with seeded
+per-game generators, like simulator.py plays them. Shots are decoded and
+counted in bulk with NumPy, which this module requires. meta.json keeps the
+totals and how far each source has been counted: a re-run over a grown
+archive only reads the new games, and a re-run of a seeded simulation plays
+the next games of its sequence instead of repeating the same ones.
+
+Usage:
+    python heatmaps.py stats/ --board-size 10 --transcripts games.bst
+    python heatmaps.py stats/ --simulate 1000000 --seed 1 --workers 8
+    python heatmaps.py stats/ --show
+"""
+
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - exercised only without NumPy
+    np = None
+
+from battleship import BOARD_BACKENDS, COMPUTER_STRATEGIES, DEFAULT_SHIPS_CONFIG, BattleshipGame
+from engine import MISS
+from seeding import RNG_BACKENDS, game_rng
+from transcript import TranscriptReader
+
+META = "meta.json"
+COUNTERS = ("occupancy", "shots", "hits", "first_hit", "first_hit_shots")
+
+_CELL_MASK = 0x1FFFFFFF
+
+
+def _require_numpy():
+    if np is None:
+        raise ImportError("Heatmaps require NumPy (pip install numpy)")
+
+
+def counter_shapes(board_size: int) -> Dict[str, Tuple[int]]:
+    cells = board_size * board_size
+    shapes = {name: (cells,) for name in COUNTERS}
+    shapes["first_hit_shots"] = (cells + 1,)
+    return shapes
+
+
+def count_boards(board_size: int, n_boards: int, occupied, cells, hits, boards) -> Dict[str, "np.ndarray"]:
+    """Counters for a batch of layouts and played boards
+
+    `occupied` holds the ship cells of every layout in the batch. The shots
+    are parallel arrays in firing order: the cell, whether it hit and a
+    number identifying the board shot at. n_boards is the number of boards
+    played; those with no hit at all count as never hit.
+    """
+    n_cells = board_size * board_size
+    counts = {name: np.zeros(shape, dtype=np.int64) for name, shape in counter_shapes(board_size).items()}
+    counts["occupancy"] += np.bincount(occupied, minlength=n_cells)
+    counts["first_hit_shots"][0] = n_boards
+    if not len(cells):
+        return counts
+    counts["shots"] += np.bincount(cells, minlength=n_cells)
+    hit_indices = np.flatnonzero(hits)
+    counts["hits"] += np.bincount(cells[hit_indices], minlength=n_cells)
+
+    # Number each shot within its board: stable sort by board, minus where the board starts
+    order = np.argsort(boards, kind="stable")
+    sorted_boards = boards[order]
+    starts = np.flatnonzero(np.concatenate(([True], sorted_boards[1:] != sorted_boards[:-1])))
+    lengths = np.diff(np.append(starts, len(boards)))
+    number = np.empty(len(boards), dtype=np.int64)
+    number[order] = np.arange(len(boards)) - np.repeat(starts, lengths)
+
+    hit_boards, first = np.unique(boards[hit_indices], return_index=True)
+    first_hits = hit_indices[first]
+    counts["first_hit"] += np.bincount(cells[first_hits], minlength=n_cells)
+    counts["first_hit_shots"] += np.bincount(number[first_hits] + 1, minlength=n_cells + 1)
+    counts["first_hit_shots"][0] -= len(hit_boards)
+    return counts
+
+
+def count_records(board_size: int, records) -> Dict[str, "np.ndarray"]:
+    """Counters for finished transcript games (transcript.GameRecord)"""
+    occupied = [row * board_size + col
+                for record in records for fleet in (record.player_fleet, record.computer_fleet)
+                for _, _, positions in fleet for row, col in positions]
+    values = np.frombuffer(b"".join(record.raw_shots() for record in records), dtype="<u4")
+    games = np.repeat(np.arange(len(records), dtype=np.int64), [record.shot_count for record in records])
+    return count_boards(board_size, 2 * len(records), np.array(occupied, dtype=np.int64),
+                        (values & _CELL_MASK).astype(np.int64), (values >> 29 & 3) != 0,
+                        2 * games + (values >> 31))
+
+
+def _simulate_chunk(task: Tuple[int, int, Optional[int], dict]) -> Tuple[Dict[str, "np.ndarray"], int, int]:
+    """Play one chunk of games; returns (counts, layouts, boards played)"""
+    start, count, seed, options = task
+    size = options["board_size"]
+    board_class = BOARD_BACKENDS.get(options["backend"])
+    placements_only = options["placements_only"]
+    occupied: List[int] = []
+    cells: List[int] = []
+    hits: List[bool] = []
+    boards: List[int] = []
+    for number, index in enumerate(range(start, start + count)):
+        game = BattleshipGame(board_class, strategy=options["strategy"], board_size=size,
+                              rng=game_rng(seed, index, options["rng"]))
+        for board in (game.player_board, game.computer_board):
+            if not game.auto_place_ships(board):
+                raise RuntimeError(f"Could not place the fleets of game {index}")
+            for ship in board.ships:
+                occupied.extend(row * size + col for row, col in ship.positions)
+        if placements_only:
+            continue
+
+        engine = game.start_engine()
+        targets = engine.boards
+        apply_shot = engine.apply_shot
+        get_computer_shot = game.get_computer_shot
+        while engine.winner is None:
+            player = engine.turn
+            row, col = get_computer_shot(targets[1 - player])
+            kind = apply_shot(player, row, col)[0].kind
+            cells.append(row * size + col)
+            hits.append(kind != MISS)
+            boards.append(2 * number + 1 - player)
+    n_boards = 0 if placements_only else 2 * count
+    counts = count_boards(size, n_boards, np.array(occupied, dtype=np.int64), np.array(cells, dtype=np.int64),
+                          np.array(hits, dtype=bool), np.array(boards, dtype=np.int64))
+    return counts, 2 * count, n_boards
+
+
+class HeatmapStore:
+    """Memory-mapped heatmap counters in a directory, added to by every run"""
+    def __init__(self, directory: str, board_size: Optional[int] = None, ships_config=None):
+        _require_numpy()
+        self.directory = directory
+        ship_sizes = None
+        if ships_config is not None:
+            ship_sizes = sorted((size for _, size in ships_config), reverse=True)
+        meta_path = os.path.join(directory, META)
+        if os.path.exists(meta_path):
+            with open(meta_path) as f:
+                self.meta = json.load(f)
+            if board_size is not None and board_size != self.meta["board_size"]:
+                raise ValueError(f"{directory} holds heatmaps for board size {self.meta['board_size']}")
+            if ship_sizes is not None and ship_sizes != self.meta["ship_sizes"]:
+                raise ValueError(f"{directory} holds heatmaps for the fleet {self.meta['ship_sizes']}")
+            mode = "r+"
+        else:
+            if board_size is None:
+                raise ValueError(f"No heatmaps in {directory}; give a board size to start them")
+            os.makedirs(directory, exist_ok=True)
+            self.meta = {
+                "board_size": board_size,
+                "ship_sizes": ship_sizes or sorted((size for _, size in DEFAULT_SHIPS_CONFIG), reverse=True),
+                "layouts": 0,
+                "boards": 0,
+                "archives": {},  # absolute path -> {"offset", "games", "skipped"}
+                "simulations": {},  # strategy:rng:seed[:placements] -> next game index
+            }
+            mode = "w+"
+        self.board_size = self.meta["board_size"]
+        self.counters = {}
+        for name, shape in counter_shapes(self.board_size).items():
+            path = os.path.join(directory, f"{name}.npy")
+            if mode == "w+":
+                self.counters[name] = np.lib.format.open_memmap(path, mode="w+", dtype=np.uint64, shape=shape)
+            else:
+                self.counters[name] = np.load(path, mmap_mode="r+")
+        if mode == "w+":
+            self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @property
+    def layouts(self) -> int:
+        return self.meta["layouts"]
+
+    @property
+    def boards(self) -> int:
+        return self.meta["boards"]
+
+    def add(self, counts: Dict[str, "np.ndarray"], layouts: int, boards: int):
+        """Add a batch's counters (from count_boards) to the store"""
+        for name, counter in self.counters.items():
+            counter += counts[name].astype(np.uint64)
+        self.meta["layouts"] += layouts
+        self.meta["boards"] += boards
+
+    def flush(self):
+        """Write the counters and then the progress that goes with them"""
+        for counter in self.counters.values():
+            counter.flush()
+        path = os.path.join(self.directory, META)
+        temporary = path + ".tmp"
+        with open(temporary, "w") as f:
+            json.dump(self.meta, f, indent=2)
+        os.replace(temporary, path)
+
+    def close(self):
+        if self.counters:
+            self.flush()
+            self.counters = {}
+
+    def add_transcript(self, path: str, batch_games: int = 10000) -> int:
+        """Count the finished games of a transcript archive not counted before
+
+        Games with another board size or fleet are skipped. Returns the
+        number of games added.
+        """
+        key = os.path.abspath(path)
+        progress = dict(self.meta["archives"].get(key, {"offset": 0, "games": 0, "skipped": 0}))
+        if os.path.getsize(path) < progress["offset"]:
+            raise ValueError(f"{path} is shorter than when it was last counted")
+        added = 0
+        batch = []
+
+        def commit():
+            if batch:
+                self.add(count_records(self.board_size, batch), 2 * len(batch), 2 * len(batch))
+            self.meta["archives"][key] = dict(progress)
+            self.flush()
+            batch.clear()
+
+        with TranscriptReader(path) as reader:
+            for record in reader.records(progress["offset"]):
+                if not record.finished:
+                    break  # Counted once it is finished
+                fleets_match = all(sorted((size for _, size, _ in fleet), reverse=True) == self.meta["ship_sizes"]
+                                   for fleet in (record.player_fleet, record.computer_fleet))
+                if record.board_size == self.board_size and fleets_match:
+                    batch.append(record)
+                    added += 1
+                else:
+                    progress["skipped"] += 1
+                progress["offset"] = record.end
+                progress["games"] += 1
+                if len(batch) >= batch_games:
+                    commit()
+            commit()
+        return added
+
+    def simulate(self, n_games: int, seed: Optional[int] = None, workers: int = 1,
+                 backend: Optional[str] = None, strategy: str = "random", rng: str = "mt",
+                 chunk_games: int = 1000, placements_only: bool = False) -> int:
+        """Play n_games headless games (or only place their fleets) and count them
+
+        A seeded simulation continues from the first game index the store
+        has not counted for that seed, strategy and generator. Returns the
+        number of games added.
+        """
+        if backend is not None and backend not in BOARD_BACKENDS:
+            raise ValueError(f"Unknown board backend: {backend}")
+        if strategy not in COMPUTER_STRATEGIES:
+            raise ValueError(f"Unknown computer strategy: {strategy}")
+        if rng not in RNG_BACKENDS:
+            raise ValueError(f"Unknown RNG backend: {rng}")
+        if self.meta["ship_sizes"] != sorted((size for _, size in DEFAULT_SHIPS_CONFIG), reverse=True):
+            raise ValueError("Simulated games use the default fleet")
+
+        key = None
+        first = 0
+        if seed is not None:
+            key = f"{strategy}:{rng}:{seed}" + (":placements" if placements_only else "")
+            first = self.meta["simulations"].get(key, 0)
+        options = {"backend": backend, "strategy": strategy, "board_size": self.board_size, "rng": rng,
+                   "placements_only": placements_only}
+        tasks = [(start, min(chunk_games, first + n_games - start), seed, options)
+                 for start in range(first, first + n_games, chunk_games)]
+        added = 0
+
+        def record(task, result):
+            nonlocal added
+            counts, layouts, boards = result
+            self.add(counts, layouts, boards)
+            added += task[1]
+            if key is not None:
+                self.meta["simulations"][key] = task[0] + task[1]
+            self.flush()
+
+        if workers <= 1:
+            for task in tasks:
+                record(task, _simulate_chunk(task))
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                pending = []
+                for task in tasks:
+                    pending.append((task, pool.submit(_simulate_chunk, task)))
+                    if len(pending) >= 2 * workers:
+                        done, future = pending.pop(0)
+                        record(done, future.result())
+                for done, future in pending:
+                    record(done, future.result())
+        return added
+
+    def heatmaps(self) -> Dict[str, "np.ndarray"]:
+        """Per-cell frequencies as size x size arrays
+
+        occupancy: share of layouts with a ship on the cell; hit_rate: hits
+        per shot at the cell; first_hit: share of boards first hit there.
+        """
+        size = self.board_size
+        counters = {name: counter.astype(np.float64) for name, counter in self.counters.items()}
+        with np.errstate(invalid="ignore", divide="ignore"):
+            hit_rate = np.where(counters["shots"] > 0, counters["hits"] / counters["shots"], 0.0)
+        return {
+            "occupancy": (counters["occupancy"] / max(self.layouts, 1)).reshape(size, size),
+            "hit_rate": hit_rate.reshape(size, size),
+            "first_hit": (counters["first_hit"] / max(self.boards, 1)).reshape(size, size),
+        }
+
+    def shots_to_first_hit(self) -> Dict[str, float]:
+        """Mean, median and p90 of shots until a board's first hit, over boards hit at all"""
+        histogram = np.asarray(self.counters["first_hit_shots"][1:], dtype=np.int64)
+        total = int(histogram.sum())
+        if not total:
+            return {"boards": 0, "mean": 0.0, "median": 0.0, "p90": 0.0}
+        shots = np.arange(1, len(histogram) + 1)
+        cumulative = np.cumsum(histogram)
+        return {
+            "boards": total,
+            "mean": float((histogram * shots).sum() / total),
+            "median": float(shots[np.searchsorted(cumulative, total / 2)]),
+            "p90": float(shots[np.searchsorted(cumulative, total * 0.9)]),
+        }
+
+    def summary(self) -> str:
+        """Text grids of the heatmaps, in percent"""
+        size = self.board_size
+        lines = [f"{self.layouts} layouts, {self.boards} boards played on {size}x{size}"]
+        titles = {"occupancy": "Ship occupancy", "hit_rate": "Hit rate per shot",
+                  "first_hit": "Where the first hit lands"}
+        for name, grid in self.heatmaps().items():
+            lines.append("")
+            lines.append(f"{titles[name]} (%):")
+            for row in grid:
+                lines.append(" ".join(f"{value * 100:5.1f}" for value in row))
+        first = self.shots_to_first_hit()
+        lines.append("")
+        lines.append(f"Shots until first hit: mean {first['mean']:.2f}, median {first['median']:.0f}, "
+                     f"p90 {first['p90']:.0f} ({first['boards']} boards)")
+        return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None):
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description="Accumulate per-cell Battleship heatmaps")
+    parser.add_argument("directory", help="heatmap store (created on first use, added to afterwards)")
+    parser.add_argument("--board-size", type=int, default=None,
+                        help="board width and height (needed to create a store)")
+    parser.add_argument("--transcripts", nargs="+", default=[], metavar="FILE",
+                        help="transcript archives to count")
+    parser.add_argument("--simulate", type=int, default=0, metavar="GAMES",
+                        help="headless games to play and count")
+    parser.add_argument("--placements-only", action="store_true",
+                        help="only place the simulated fleets (occupancy counts)")
+    parser.add_argument("-s", "--seed", type=int, default=None, help="master random seed")
+    parser.add_argument("-w", "--workers", type=int, default=1, help="worker processes")
+    parser.add_argument("-b", "--backend", choices=sorted(BOARD_BACKENDS), default=None,
+                        help="board implementation (default: grid, sparse for large boards)")
+    parser.add_argument("--strategy", choices=COMPUTER_STRATEGIES, default="random",
+                        help="computer shooting strategy")
+    parser.add_argument("--rng", choices=sorted(RNG_BACKENDS), default="mt",
+                        help="per-game random number generator")
+    parser.add_argument("--show", action="store_true", help="print the heatmaps")
+    args = parser.parse_args(argv)
+
+    with HeatmapStore(args.directory, args.board_size) as store:
+        for path in args.transcripts:
+            start = time.perf_counter()
+            added = store.add_transcript(path)
+            print(f"{path}: {added} new games in {time.perf_counter() - start:.2f}s")
+        if args.simulate:
+            start = time.perf_counter()
+            added = store.simulate(args.simulate, args.seed, args.workers, args.backend, args.strategy,
+                                   args.rng, placements_only=args.placements_only)
+            print(f"Simulated {added} games in {time.perf_counter() - start:.2f}s")
+        if args.show or not (args.transcripts or args.simulate):
+            print(store.summary())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+Precomputed opening books for the computer strategies.
+
+Until a ship is sunk, what a strategy knows about the target board is just
+the set of cells shot and which of them were hits, so its first moves can be
+worked out once per board size and fleet. An opening book stores the
+strategy's choice for every such position reachable in the first `depth`
+shots with at most `max_hits` hits, which covers the opening hunt and the
+first responses to early hits.
+
+Books are built in a canonical orientation and cached on disk as JSON, keyed
+by strategy, board size, fleet, depth, hit limit and strategy options, so a
+book built with other settings never stands in for the one a game asked for.
+Each game plays its book in one of the
+eight rotations and reflections of the board, picked at random, so openings
+still vary from game to game.
+
+Usage:
+    python openings.py --strategy density --board-size 10 --depth 10
+"""
+
+import json
+import os
+import random
+from typing import Dict, FrozenSet, List, Optional, Tuple
+
+from strategies import DensityStrategy, MonteCarloStrategy
+
+# Strategies with an opening book, by the names BattleshipGame uses
+BOOK_STRATEGIES = {
+    "density": DensityStrategy,
+    "montecarlo": MonteCarloStrategy,
+}
+
+DEFAULT_DEPTH = 10
+DEFAULT_MAX_HITS = 2
+BOOK_DIR_ENV = "BATTLESHIP_BOOK_DIR"
+
+# A position: frozenset of (cell, hit) for every cell shot so far
+Position = FrozenSet[Tuple[int, bool]]
+
+
+def book_directory() -> str:
+    """Where books are cached: $BATTLESHIP_BOOK_DIR or ~/.cache/battleship"""
+    return os.environ.get(BOOK_DIR_ENV) or os.path.join(os.path.expanduser("~"), ".cache", "battleship")
+
+
+def board_symmetries(board_size: int) -> List[Tuple[int, ...]]:
+    """The eight rotations and reflections of a square board as cell permutations"""
+    last = board_size - 1
+    maps = [
+        lambda r, c: (r, c), lambda r, c: (c, last - r),
+        lambda r, c: (last - r, last - c), lambda r, c: (last - c, r),
+        lambda r, c: (r, last - c), lambda r, c: (last - r, c),
+        lambda r, c: (c, r), lambda r, c: (last - c, last - r),
+    ]
+    symmetries = []
+    for transform in maps:
+        permutation = []
+        for cell in range(board_size * board_size):
+            row, col = transform(*divmod(cell, board_size))
+            permutation.append(row * board_size + col)
+        symmetries.append(tuple(permutation))
+    return symmetries
+
+
+class _PositionBoard:
+    """The parts of a target board the strategies read, for a book position"""
+    def __init__(self, board_size: int, position: Position):
+        self.size = board_size
+        self.shots_fired = {divmod(cell, board_size) for cell, _ in position}
+        self.hits = {divmod(cell, board_size) for cell, hit in position if hit}
+        self.misses = self.shots_fired - self.hits
+        self.ships = []  # Book positions have no sunk ships
+
+
+def _encode(position: Position) -> str:
+    return " ".join(f"{cell}{'h' if hit else 'm'}" for cell, hit in sorted(position))
+
+
+def _decode(key: str) -> Position:
+    return frozenset((int(token[:-1]), token[-1] == "h") for token in key.split())
+
+
+class OpeningBook:
+    """Canonical-orientation moves for the positions of one strategy's opening"""
+    def __init__(self, strategy: str, board_size: int, ship_sizes: Tuple[int, ...],
+                 moves: Dict[Position, int], depth: int, max_hits: int):
+        self.strategy = strategy
+        self.board_size = board_size
+        self.ship_sizes = ship_sizes
+        self.moves = moves
+        self.depth = depth
+        self.max_hits = max_hits
+
+    def __len__(self) -> int:
+        return len(self.moves)
+
+    @classmethod
+    def build(cls, strategy: str, board_size: int, ships_config: List[Tuple[str, int]],
+              depth: int = DEFAULT_DEPTH, max_hits: int = DEFAULT_MAX_HITS,
+              strategy_options: Optional[dict] = None) -> "OpeningBook":
+        """Play the strategy through every book position and record its moves
+
+        Each position is solved with a generator seeded from the position,
+        so the density book is the same every time it is built.
+        """
+        if strategy not in BOOK_STRATEGIES:
+            raise ValueError(f"No opening book for strategy: {strategy}")
+        strategy_class = BOOK_STRATEGIES[strategy]
+        options = strategy_options or {}
+        moves: Dict[Position, int] = {}
+        frontier = [frozenset()]
+        while frontier:
+            position = frontier.pop()
+            if position in moves:
+                continue
+            rng = random.Random(f"{strategy}:{board_size}:{_encode(position)}")
+            player = strategy_class(board_size, ships_config, rng=rng, **options)
+            try:
+                row, col = player.choose_shot(_PositionBoard(board_size, position))
+            finally:
+                if hasattr(player, "close"):
+                    player.close()
+            cell = row * board_size + col
+            moves[position] = cell
+            if len(position) + 1 >= depth:
+                continue
+            hits = sum(1 for _, hit in position if hit)
+            frontier.append(position | {(cell, False)})
+            if hits < max_hits:
+                frontier.append(position | {(cell, True)})
+        ship_sizes = tuple(sorted((size for _, size in ships_config), reverse=True))
+        return cls(strategy, board_size, ship_sizes, moves, depth, max_hits)
+
+    def to_dict(self) -> dict:
+        return {
+            "strategy": self.strategy,
+            "board_size": self.board_size,
+            "ship_sizes": list(self.ship_sizes),
+            "depth": self.depth,
+            "max_hits": self.max_hits,
+            "moves": {_encode(position): cell for position, cell in self.moves.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "OpeningBook":
+        moves = {_decode(key): cell for key, cell in data["moves"].items()}
+        return cls(data["strategy"], data["board_size"], tuple(data["ship_sizes"]), moves,
+                   data["depth"], data["max_hits"])
+
+    def save(self, path: str):
+        """Write the book atomically, so concurrent games never read half a file"""
+        temporary = f"{path}.{os.getpid()}.tmp"
+        with open(temporary, "w") as f:
+            json.dump(self.to_dict(), f)
+        os.replace(temporary, path)
+
+    @classmethod
+    def load(cls, path: str) -> "OpeningBook":
+        with open(path) as f:
+            return cls.from_dict(json.load(f))
+
+
+def book_path(strategy: str, board_size: int, ships_config: List[Tuple[str, int]],
+              directory: Optional[str] = None, depth: int = DEFAULT_DEPTH,
+              max_hits: int = DEFAULT_MAX_HITS, strategy_options: Optional[dict] = None) -> str:
+    """Cache file of the book for a strategy, board size, fleet, extent and strategy options"""
+    sizes = "-".join(str(size) for size in sorted((size for _, size in ships_config), reverse=True))
+    name = f"{strategy}-{board_size}x{board_size}-{sizes}-d{depth}h{max_hits}"
+    for key, value in sorted((strategy_options or {}).items()):
+        name += f"-{key}={value}"
+    return os.path.join(directory or book_directory(), f"{name}.json")
+
+
+_loaded: Dict[str, OpeningBook] = {}
+
+
+def get_opening_book(strategy: str, board_size: int, ships_config: List[Tuple[str, int]],
+                     directory: Optional[str] = None, strategy_options: Optional[dict] = None,
+                     depth: int = DEFAULT_DEPTH, max_hits: int = DEFAULT_MAX_HITS) -> OpeningBook:
+    """The book for a strategy and fleet: from memory, else the disk cache, else built and cached"""
+    path = book_path(strategy, board_size, ships_config, directory, depth, max_hits, strategy_options)
+    book = _loaded.get(path)
+    if book is None:
+        if os.path.exists(path):
+            book = OpeningBook.load(path)
+        else:
+            book = OpeningBook.build(strategy, board_size, ships_config, depth, max_hits,
+                                     strategy_options)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            book.save(path)
+        _loaded[path] = book
+    return book
+
+
+class OpeningLine:
+    """Plays a book against one target board in a randomly chosen orientation
+
+    Once the game leaves the book - a position it doesn't cover or a ship
+    sunk - the line stays out of book and next_shot always returns None.
+    """
+    def __init__(self, book: OpeningBook, rng=random):
+        self.book = book
+        size = book.board_size
+        self._to_board = rng.choice(board_symmetries(size))
+        self._to_book = [0] * (size * size)
+        for cell, mapped in enumerate(self._to_board):
+            self._to_book[mapped] = cell
+        self.active = True
+
+    def next_shot(self, board) -> Optional[Tuple[int, int]]:
+        """The book move on a target board, or None when out of book"""
+        if not self.active:
+            return None
+        size = self.book.board_size
+        shots = board.shots_fired
+        if len(shots) >= self.book.depth or any(ship.is_sunk() for ship in board.ships):
+            self.active = False
+            return None
+        hits = board.hits
+        to_book = self._to_book
+        position = frozenset((to_book[row * size + col], (row, col) in hits) for row, col in shots)
+        cell = self.book.moves.get(position)
+        if cell is None:
+            self.active = False
+            return None
+        return divmod(self._to_board[cell], size)
+
+
+def main(argv: Optional[List[str]] = None):
+    """Command line entry point: build and cache a book ahead of time"""
+    import argparse
+    import time
+
+    from battleship import DEFAULT_SHIPS_CONFIG
+
+    parser = argparse.ArgumentParser(description="Precompute a Battleship opening book")
+    parser.add_argument("--strategy", choices=sorted(BOOK_STRATEGIES), default="density",
+                        help="strategy whose opening to compute")
+    parser.add_argument("--board-size", type=int, default=10, help="board width and height")
+    parser.add_argument("--depth", type=int, default=DEFAULT_DEPTH, help="shots covered by the book")
+    parser.add_argument("--max-hits", type=int, default=DEFAULT_MAX_HITS,
+                        help="hits after which the book ends")
+    parser.add_argument("--directory", default=None, help=f"cache directory (default: {book_directory()})")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    book = OpeningBook.build(args.strategy, args.board_size, DEFAULT_SHIPS_CONFIG, args.depth, args.max_hits)
+    path = book_path(args.strategy, args.board_size, DEFAULT_SHIPS_CONFIG, args.directory,
+                     args.depth, args.max_hits)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    book.save(path)
+    print(f"{len(book)} positions in {time.perf_counter() - start:.2f}s, written to {path}")
+
+
+if __name__ == "__main__":
+    main()
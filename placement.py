@@ -0,0 +1,339 @@
+"""
+Ship placement engine for the Battleship game.
+
+Every legal placement of a ship of a given size on a board of a given size is
+computed once and cached. Fleets are then drawn from those tables: the
+sequential placer only ever picks from placements that don't overlap ships
+already placed, and the uniform sampler draws whole fleet layouts with equal
+probability.
+"""
+
+import random
+import time
+from functools import lru_cache
+from typing import List, Optional, Tuple
+
+from coordinates import coordinate_grid
+
+Position = Tuple[int, int]
+
+# Above this many cells placement tables get too big to precompute, so fleets
+# are drawn by checking random placements against the ships placed so far.
+# Large boards are mostly empty, so such draws almost always fit first time.
+MAX_TABLE_CELLS = 10000
+
+# Running totals of redrawn ships and restarted fleets, read by the profiler.
+# They are only updated on the retry paths, so counting costs nothing on the
+# common path.
+placement_retries = {"ship": 0, "fleet": 0}
+
+
+class PlacementTable:
+    """All placements of one ship size on one board size
+
+    The three lists are parallel: entry i describes the same placement as a
+    bitmask (bit row * board_size + col), as (row, col) positions and as
+    cell indices.
+    """
+    __slots__ = ('board_size', 'ship_size', 'masks', 'positions', 'cells')
+
+    def __init__(self, board_size: int, ship_size: int):
+        self.board_size = board_size
+        self.ship_size = ship_size
+        self.masks: List[int] = []
+        self.positions: List[Tuple[Position, ...]] = []
+        self.cells: List[Tuple[int, ...]] = []
+
+        if ship_size > board_size:
+            return
+        grid = coordinate_grid(board_size)
+        # Horizontal placements
+        for row in range(board_size):
+            for col in range(board_size - ship_size + 1):
+                self._add([grid[row][col + i] for i in range(ship_size)])
+        # Vertical placements (a size 1 ship only needs the horizontal pass)
+        if ship_size > 1:
+            for row in range(board_size - ship_size + 1):
+                for col in range(board_size):
+                    self._add([grid[row + i][col] for i in range(ship_size)])
+
+    def _add(self, positions: List[Position]):
+        cells = tuple(row * self.board_size + col for row, col in positions)
+        mask = 0
+        for cell in cells:
+            mask |= 1 << cell
+        self.masks.append(mask)
+        self.positions.append(tuple(positions))
+        self.cells.append(cells)
+
+    def __len__(self) -> int:
+        return len(self.masks)
+
+
+@lru_cache(maxsize=None)
+def placement_table(board_size: int, ship_size: int) -> PlacementTable:
+    """Cached table of every legal placement for (board_size, ship_size)"""
+    return PlacementTable(board_size, ship_size)
+
+
+def draw_fleet(board_size: int, ships_config: List[Tuple[str, int]],
+               rng=random, max_restarts: int = 100) -> Optional[List[Tuple[Position, ...]]]:
+    """Draw positions for each ship in order, one placement per ship
+
+    Each ship is drawn uniformly from the placements that don't overlap the
+    ships already drawn, so a draw never has to be retried. If an earlier
+    choice leaves no room for a later ship the fleet is redrawn from
+    scratch, up to max_restarts times. Returns None if no layout was found.
+    """
+    if board_size * board_size > MAX_TABLE_CELLS:
+        return _sample_large_board(board_size, ships_config, rng, max_restarts)
+
+    tables = [placement_table(board_size, size) for _, size in ships_config]
+    for _ in range(max_restarts):
+        occupied = 0
+        layout = []
+        for table in tables:
+            masks = table.masks
+            if not masks:
+                break
+            # Try one placement first; only build the list of placements that
+            # fit when it overlaps. Either way the pick is uniform over them.
+            choice = rng.randrange(len(masks))
+            if masks[choice] & occupied:
+                placement_retries["ship"] += 1
+                candidates = [i for i in range(len(masks)) if not masks[i] & occupied]
+                if not candidates:
+                    break
+                choice = rng.choice(candidates)
+            occupied |= masks[choice]
+            layout.append(table.positions[choice])
+        else:
+            return layout
+        placement_retries["fleet"] += 1
+    return None
+
+
+def sample_uniform_fleet(board_size: int, ships_config: List[Tuple[str, int]],
+                         rng=random, max_attempts: int = 100000) -> Optional[List[Tuple[Position, ...]]]:
+    """Draw a fleet layout uniformly from all valid layouts
+
+    Drawing ships one after another from the non-overlapping placements
+    favours layouts that leave many options for later ships. Here every
+    ship is drawn from its full placement table and the whole layout is
+    rejected as soon as two ships overlap, which makes every valid layout
+    equally likely. Returns None if no layout was found in max_attempts.
+    """
+    if board_size * board_size > MAX_TABLE_CELLS:
+        return _sample_large_board(board_size, ships_config, rng, max_attempts)
+
+    tables = [placement_table(board_size, size) for _, size in ships_config]
+    if any(not table for table in tables):
+        return None
+    for _ in range(max_attempts):
+        occupied = 0
+        layout = []
+        for table in tables:
+            choice = rng.randrange(len(table))
+            mask = table.masks[choice]
+            if mask & occupied:
+                break
+            occupied |= mask
+            layout.append(table.positions[choice])
+        else:
+            return layout
+        placement_retries["fleet"] += 1
+    return None
+
+
+class FleetSolution:
+    """Outcome of solve_fleet
+
+    layout is None if no layout was found. complete says whether the search
+    ran to the end, so a missing layout with complete=True proves that the
+    fleet does not fit; complete=False means the time limit ran out first.
+    """
+    __slots__ = ('layout', 'complete', 'nodes', 'elapsed')
+
+    def __init__(self, layout: Optional[List[Tuple[Position, ...]]], complete: bool,
+                 nodes: int, elapsed: float):
+        self.layout = layout
+        self.complete = complete
+        self.nodes = nodes  # Search states visited
+        self.elapsed = elapsed  # Seconds
+
+    @property
+    def impossible(self) -> bool:
+        return self.layout is None and self.complete
+
+
+# Search option for leaving a cell empty
+_EMPTY = (-1, -1)
+
+
+def solve_fleet(board_size: int, ships_config: List[Tuple[str, int]], rng=random,
+                time_limit: Optional[float] = None) -> FleetSolution:
+    """Find a fleet layout by backtracking search, or prove there is none
+
+    Free space is a bitmask and the board is filled in cell order: the
+    lowest cell not yet decided is either the first cell of some ship's
+    placement (only a horizontal and a vertical one per size start there)
+    or is left empty, which is allowed only while the fleet leaves spare
+    cells. Every layout is reached exactly once, and failed states - the
+    decided cells plus the ships still to place - are remembered so the
+    same partial board is never searched twice. Larger ships are tried
+    first, which settles tight fleets quickly; ties are broken at random so
+    repeated solves give different layouts.
+    """
+    start = time.perf_counter()
+    deadline = start + time_limit if time_limit is not None else None
+    n_cells = board_size * board_size
+    if n_cells > MAX_TABLE_CELLS:
+        raise ValueError(f"Board too large for the placement solver: {board_size}x{board_size}")
+
+    sizes = sorted({size for _, size in ships_config}, reverse=True)
+    counts = [sum(1 for _, size in ships_config if size == ship_size) for ship_size in sizes]
+    needed = sum(size for _, size in ships_config)
+    if needed > n_cells or any(size > board_size for size in sizes):
+        return FleetSolution(None, True, 0, time.perf_counter() - start)
+
+    # starts[cell] lists (size index, placement index) of placements whose
+    # first cell is `cell`
+    starts: List[List[Tuple[int, int]]] = [[] for _ in range(n_cells)]
+    for k, size in enumerate(sizes):
+        for index, cells in enumerate(placement_table(board_size, size).cells):
+            starts[cells[0]].append((k, index))
+    masks = [placement_table(board_size, size).masks for size in sizes]
+
+    failed = set()
+    placed: List[List[int]] = [[] for _ in sizes]
+    stack = []
+    nodes = 0
+
+    def push(decided: int, spare: int, remaining: int):
+        """Add a search frame for a partial board unless it is known to fail"""
+        key = (decided, tuple(counts))
+        if key in failed:
+            return
+        free = ~decided
+        low = free & -free
+        options = [(k, index) for k, index in starts[low.bit_length() - 1]
+                   if counts[k] and not masks[k][index] & decided]
+        rng.shuffle(options)
+        options.sort(key=lambda option: option[0])  # Sizes are in descending order
+        if spare:
+            # Leaving cells empty early spreads the ships out on roomy boards
+            if rng.random() * (spare + remaining) < spare:
+                options.insert(0, _EMPTY)
+            else:
+                options.append(_EMPTY)
+        # decided, spare, remaining, key, lowest undecided cell, options,
+        # next option, option currently applied
+        stack.append([decided, spare, remaining, key, low, options, 0, None])
+
+    # The search keeps its own stack: boards can need more levels than
+    # Python's recursion limit allows
+    found = not needed
+    if not found:
+        push(0, n_cells - needed, needed)
+    while stack and not found:
+        frame = stack[-1]
+        decided, spare, remaining, key, low, options, next_option, applied = frame
+        if applied is not None and applied is not _EMPTY:
+            k, _ = applied
+            counts[k] += 1
+            placed[k].pop()
+        frame[7] = None
+        if next_option == len(options):
+            failed.add(key)
+            stack.pop()
+            continue
+
+        nodes += 1
+        if deadline is not None and not nodes & 1023 and time.perf_counter() > deadline:
+            return FleetSolution(None, False, nodes, time.perf_counter() - start)
+        choice = options[next_option]
+        frame[6] = next_option + 1
+        frame[7] = choice
+        if choice is _EMPTY:
+            push(decided | low, spare - 1, remaining)
+        else:
+            k, index = choice
+            counts[k] -= 1
+            placed[k].append(index)
+            if remaining == sizes[k]:
+                found = True
+            else:
+                push(decided | masks[k][index], spare, remaining - sizes[k])
+
+    elapsed = time.perf_counter() - start
+    if not found:
+        return FleetSolution(None, True, nodes, elapsed)
+
+    # Hand the placements back in ships_config order
+    pools = {size: [placement_table(board_size, size).positions[i] for i in placed[k]]
+             for k, size in enumerate(sizes)}
+    layout = [pools[size].pop() for _, size in ships_config]
+    return FleetSolution(layout, True, nodes, elapsed)
+
+
+def _random_placement(board_size: int, ship_size: int, rng) -> Tuple[Position, ...]:
+    """A uniformly random placement, computed without a placement table"""
+    # Horizontal and vertical placements are equally common on a square board
+    if rng.random() < 0.5:
+        row = rng.randrange(board_size)
+        col = rng.randrange(board_size - ship_size + 1)
+        return tuple((row, col + i) for i in range(ship_size))
+    row = rng.randrange(board_size - ship_size + 1)
+    col = rng.randrange(board_size)
+    return tuple((row + i, col) for i in range(ship_size))
+
+
+def _sample_large_board(board_size: int, ships_config: List[Tuple[str, int]],
+                        rng, max_attempts: int) -> Optional[List[Tuple[Position, ...]]]:
+    """Uniform layout sampler for boards too large for placement tables"""
+    if any(size > board_size for _, size in ships_config):
+        return None
+    for _ in range(max_attempts):
+        occupied = set()
+        layout = []
+        for _, size in ships_config:
+            positions = _random_placement(board_size, size, rng)
+            if not occupied.isdisjoint(positions):
+                break
+            occupied.update(positions)
+            layout.append(positions)
+        else:
+            return layout
+        placement_retries["fleet"] += 1
+    return None
+
+
+def main(argv: Optional[List[str]] = None):
+    """Command line entry point: solve a custom fleet and show the layout"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Find a layout for a custom Battleship fleet")
+    parser.add_argument("sizes", type=int, nargs="+", help="ship sizes, e.g. 5 4 3 3 2")
+    parser.add_argument("--board-size", type=int, default=10, help="board width and height")
+    parser.add_argument("-s", "--seed", type=int, default=None, help="random seed")
+    parser.add_argument("-t", "--time-limit", type=float, default=None, help="give up after this many seconds")
+    args = parser.parse_args(argv)
+
+    ships_config = [(f"Ship {i + 1}", size) for i, size in enumerate(args.sizes)]
+    solution = solve_fleet(args.board_size, ships_config, random.Random(args.seed), args.time_limit)
+    if solution.layout is not None:
+        grid = [["." for _ in range(args.board_size)] for _ in range(args.board_size)]
+        for i, positions in enumerate(solution.layout):
+            for row, col in positions:
+                grid[row][col] = chr(ord("A") + i % 26)
+        print("\n".join(" ".join(row) for row in grid))
+        print(f"Placed {len(ships_config)} ships", end="")
+    elif solution.complete:
+        print("No layout exists for this fleet", end="")
+    else:
+        print("Time limit reached without finding a layout", end="")
+    print(f" ({solution.nodes} search steps, {solution.elapsed * 1000:.1f} ms)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""
+Opt-in profiling hooks for the Battleship game.
+
+PhaseProfiler records wall time and call counts for the main phases of a
+run: fleet placement (with the number of placement retries), computer shot
+selection, resolving shots on the boards and drawing the screen. While it is
+enabled those methods are replaced by timed wrappers; disabling it puts the
+original methods back, so runs without profiling pay nothing. It can also run
+cProfile over the same span and dump the pstats to a file.
+
+Usage:
+    with PhaseProfiler() as profiler:
+        game.play("computer_vs_computer")
+    print(profiler.summary())
+"""
+
+import cProfile
+import functools
+import time
+from typing import Dict, Optional
+
+import placement
+from battleship import BattleshipGame, BitBoard, Board, SparseBoard
+from renderer import TerminalRenderer
+
+# Phase name -> methods timed under it, as (class, method name)
+PHASES = {
+    "placement": [(BattleshipGame, "auto_place_ships")],
+    "shot selection": [(BattleshipGame, "get_computer_shot")],
+    "receive shot": [(Board, "receive_shot"), (BitBoard, "receive_shot"),
+                     (SparseBoard, "receive_shot")],
+    "rendering": [(BattleshipGame, "display_game_state"),
+                  (BattleshipGame, "display_two_player_state"),
+                  (TerminalRenderer, "render")],
+}
+
+
+class PhaseProfiler:
+    """Per-phase timing for game loops, enabled only inside its context"""
+    def __init__(self, pstats_path: Optional[str] = None):
+        self.pstats_path = pstats_path
+        self.calls: Dict[str, int] = {phase: 0 for phase in PHASES}
+        self.seconds: Dict[str, float] = {phase: 0.0 for phase in PHASES}
+        self.retries = {"ship": 0, "fleet": 0}
+        self.elapsed = 0.0
+        self._originals = []
+        self._retries_at_start = None
+        self._started = None
+        self._cprofile = None
+
+    def _wrap(self, phase: str, method):
+        clock = time.perf_counter
+        calls = self.calls
+        seconds = self.seconds
+
+        @functools.wraps(method)
+        def timed(*args, **kwargs):
+            start = clock()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                seconds[phase] += clock() - start
+                calls[phase] += 1
+        return timed
+
+    def enable(self):
+        """Install the timed wrappers (and start cProfile if requested)"""
+        if self._originals:
+            raise RuntimeError("Profiler is already enabled")
+        for phase, methods in PHASES.items():
+            for cls, name in methods:
+                original = cls.__dict__[name]
+                self._originals.append((cls, name, original))
+                setattr(cls, name, self._wrap(phase, original))
+        self._retries_at_start = dict(placement.placement_retries)
+        if self.pstats_path:
+            self._cprofile = cProfile.Profile()
+            self._cprofile.enable()
+        self._started = time.perf_counter()
+
+    def disable(self):
+        """Restore the original methods and write the pstats file, if any"""
+        if not self._originals:
+            return
+        self.elapsed += time.perf_counter() - self._started
+        if self._cprofile is not None:
+            self._cprofile.disable()
+            self._cprofile.dump_stats(self.pstats_path)
+            self._cprofile = None
+        for cls, name, original in reversed(self._originals):
+            setattr(cls, name, original)
+        self._originals = []
+        for kind, count in placement.placement_retries.items():
+            self.retries[kind] += count - self._retries_at_start[kind]
+
+    def __enter__(self):
+        self.enable()
+        return self
+
+    def __exit__(self, *exc):
+        self.disable()
+
+    def to_dict(self) -> Dict:
+        return {
+            "elapsed": self.elapsed,
+            "phases": {phase: {"calls": self.calls[phase], "seconds": self.seconds[phase]}
+                       for phase in PHASES},
+            "placement_retries": dict(self.retries),
+        }
+
+    def summary(self) -> str:
+        """Table of calls and time per phase"""
+        lines = [f"{'phase':<16} {'calls':>9} {'total ms':>10} {'mean us':>9} {'share':>7}"]
+        for phase in PHASES:
+            calls = self.calls[phase]
+            seconds = self.seconds[phase]
+            mean = seconds / calls * 1e6 if calls else 0.0
+            share = seconds / self.elapsed * 100 if self.elapsed else 0.0
+            lines.append(f"{phase:<16} {calls:>9} {seconds * 1e3:>10.1f} {mean:>9.1f} {share:>6.1f}%")
+        lines.append(f"{'total':<16} {'':>9} {self.elapsed * 1e3:>10.1f}")
+        lines.append(f"Placement retries: {self.retries['ship']} ship redraws, "
+                     f"{self.retries['fleet']} fleet restarts")
+        if self.pstats_path:
+            lines.append(f"cProfile stats written to {self.pstats_path}")
+        return "\n".join(lines)
+
+
+def add_profile_arguments(parser):
+    """Add the --profile and --pstats options to a command line parser"""
+    parser.add_argument("--profile", action="store_true",
+                        help="print time spent in each phase at the end of the run")
+    parser.add_argument("--pstats", metavar="FILE",
+                        help="also run cProfile and write its stats to FILE")
+
+
+def profiler_from_args(args) -> Optional[PhaseProfiler]:
+    """A profiler for the parsed --profile/--pstats options, or None"""
+    if not (args.profile or args.pstats):
+        return None
+    return PhaseProfiler(args.pstats)
@@ -0,0 +1,190 @@
+"""
+Terminal rendering for the Battleship game.
+
+Holds the symbol tables and row builders shared by the console display code,
+plus TerminalRenderer, an incremental ANSI renderer used by watch mode. It
+keeps the previous frame and rewrites only the lines whose content changed,
+with one buffered write per frame and an optional frame rate cap.
+"""
+
+import os
+import sys
+import time
+from typing import Dict, List, Optional, Tuple
+
+from coordinates import column_label
+
+# Grid characters -> display symbols
+CELL_SYMBOLS = {
+    'X': '💥',  # Hit
+    'O': '💨',  # Miss
+    ' ': '🌊',  # Water
+}
+SHIP_SYMBOLS = {
+    'C': '🚢',  # Carrier
+    'B': '🛥️ ',  # Battleship
+    'S': '🚤',  # Submarine/Cruiser
+    'D': '⛵'   # Destroyer
+}
+GUESS_SYMBOLS = {
+    'X': '💥',  # Hit
+    'O': '💨',  # Miss
+}
+UNKNOWN_SYMBOL = '❓'
+SHIP_ICONS = {
+    'Carrier': '🚢',
+    'Battleship': '🛥️ ',
+    'Cruiser': '🚤',
+    'Submarine': '🚤',
+    'Destroyer': '⛵'
+}
+LEGEND_LINES = [
+    "LEGEND:",
+    "  🚢🛥️🚤⛵ = Your ships    💥 = Hit    💨 = Miss    🌊 = Water    ❓ = Unknown",
+]
+
+# ANSI escape sequences
+CLEAR_SCREEN = "\033[H\033[2J"
+CLEAR_TO_END_OF_LINE = "\033[K"
+CLEAR_TO_END_OF_SCREEN = "\033[J"
+HIDE_CURSOR = "\033[?25l"
+SHOW_CURSOR = "\033[?25h"
+
+
+def clear_screen():
+    """Clear the terminal without starting a shell on POSIX systems"""
+    if os.name == 'posix':
+        sys.stdout.write(CLEAR_SCREEN)
+        sys.stdout.flush()
+    else:
+        os.system('cls')
+
+
+def column_header(size: int) -> str:
+    """Column label line for a board"""
+    return "   " + " ".join(column_label(i) for i in range(size))
+
+
+def fleet_row(row: int, cells: List[str], show_ships: bool = True) -> str:
+    """Render one row of a fleet board from its grid characters"""
+    symbols = []
+    for cell in cells:
+        symbol = CELL_SYMBOLS.get(cell)
+        if symbol is None:
+            # Ship cell; hidden as water unless ships are shown
+            symbol = SHIP_SYMBOLS.get(cell, cell) if show_ships else CELL_SYMBOLS[' ']
+        symbols.append(symbol)
+    return f"{row:2d} " + " ".join(symbols) + " "
+
+
+def guess_row(row: int, cells: List[str]) -> str:
+    """Render one row of a target board (shots only) from its grid characters"""
+    return f"{row:2d} " + " ".join(GUESS_SYMBOLS.get(cell, UNKNOWN_SYMBOL) for cell in cells) + " "
+
+
+def ship_status_lines(ships) -> List[str]:
+    """One status line per ship: icon, name and damage"""
+    lines = []
+    for ship in ships:
+        if ship.is_sunk():
+            status = "💀 SUNK"
+        else:
+            status = f"💥 {len(ship.hits)}/{ship.size} hits"
+        lines.append(f"  {SHIP_ICONS.get(ship.name, '🚢')} {ship.name}: {status}")
+    return lines
+
+
+class TerminalRenderer:
+    """Incremental ANSI renderer for side-by-side fleet and target boards
+
+    Board rows are cached per board and only rebuilt when their grid
+    characters change. Each frame is diffed line by line against the one on
+    screen; changed lines are rewritten in place with cursor moves, all in a
+    single write. Frames requested faster than max_fps are dropped unless
+    forced, and the next drawn frame catches up with everything that changed.
+    """
+    def __init__(self, stream=None, max_fps: Optional[float] = 30.0):
+        self.stream = stream if stream is not None else sys.stdout
+        self.min_interval = 1.0 / max_fps if max_fps else 0.0
+        self.last_frame_time = None
+        self.screen: List[str] = []  # Lines currently on screen
+        self._row_cache: Dict[Tuple[int, int, str], Tuple[tuple, str]] = {}
+
+    def _board_rows(self, board, kind: str, show_ships: bool = True) -> List[str]:
+        """Rendered rows of a board, rebuilding only rows that changed"""
+        grid = board.grid
+        rows = []
+        for row in range(board.size):
+            cells = tuple(grid[row])
+            key = (id(board), row, kind)
+            cached = self._row_cache.get(key)
+            if cached is None or cached[0] != cells:
+                if kind == 'guess':
+                    text = guess_row(row, cells)
+                else:
+                    text = fleet_row(row, cells, show_ships)
+                cached = (cells, text)
+                self._row_cache[key] = cached
+            rows.append(cached[1])
+        return rows
+
+    def build_frame(self, fleet_board, target_board, title: str = "🚢 BATTLESHIP GAME 🚢",
+                    fleet_label: str = "FLEET BOARD", target_label: str = "TARGET BOARD",
+                    messages: List[str] = ()) -> List[str]:
+        """Lines of a full frame: boards side by side, ship status and messages"""
+        header = column_header(fleet_board.size)
+        fleet_lines = [header] + self._board_rows(fleet_board, 'fleet')
+        target_lines = [column_header(target_board.size)] + self._board_rows(target_board, 'guess')
+
+        lines = ["=" * 80, title, "=" * 80, "",
+                 f"{fleet_label:<60}    {target_label}",
+                 "=" * 60 + "    " + "=" * 60]
+        for fleet_line, target_line in zip(fleet_lines, target_lines):
+            lines.append(f"{fleet_line:<60}    {target_line}")
+        lines += ["", "-" * 80, "SHIPS STATUS:"]
+        lines += ship_status_lines(fleet_board.ships)
+        lines.append("")
+        lines += LEGEND_LINES
+        lines.append("")
+        lines += list(messages)
+        return lines
+
+    def draw(self, lines: List[str], force: bool = False) -> bool:
+        """Draw a frame, returning False if it was dropped by the frame cap"""
+        now = time.perf_counter()
+        if (not force and self.last_frame_time is not None
+                and now - self.last_frame_time < self.min_interval):
+            return False
+        self.last_frame_time = now
+
+        if not self.screen:
+            out = [HIDE_CURSOR, CLEAR_SCREEN]
+            out += [line + "\n" for line in lines]
+        else:
+            out = []
+            for i, line in enumerate(lines):
+                if i >= len(self.screen) or self.screen[i] != line:
+                    out.append(f"\033[{i + 1};1H{line}{CLEAR_TO_END_OF_LINE}")
+            if len(lines) < len(self.screen):
+                out.append(f"\033[{len(lines) + 1};1H{CLEAR_TO_END_OF_SCREEN}")
+            # Leave the cursor below the frame
+            out.append(f"\033[{len(lines) + 1};1H")
+
+        self.screen = list(lines)
+        self.stream.write("".join(out))
+        self.stream.flush()
+        return True
+
+    def render(self, fleet_board, target_board, force: bool = False, **frame_options) -> bool:
+        """Build and draw a frame for a pair of boards"""
+        if not force and self.last_frame_time is not None:
+            # Skip building frames that the frame cap would drop anyway
+            if time.perf_counter() - self.last_frame_time < self.min_interval:
+                return False
+        return self.draw(self.build_frame(fleet_board, target_board, **frame_options), force=force)
+
+    def close(self):
+        """Restore the cursor; later output continues below the last frame"""
+        self.stream.write(SHOW_CURSOR)
+        self.stream.flush()
+        self.screen = []
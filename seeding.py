@@ -0,0 +1,62 @@
+"""
+Per-game random number streams for reproducible batches of games.
+
+Every game in a seeded batch gets its own generator, seeded from the master
+seed and the game's index in the batch. A game's moves therefore depend only
+on (master seed, index): results are bit-identical whatever the number of
+workers or the chunking, and any single game can be replayed on its own.
+
+Generators are random.Random instances or subclasses, so they can be passed
+anywhere the code accepts an `rng` (BattleshipGame, the placement functions
+and the strategies).
+"""
+
+import hashlib
+import random
+from typing import Optional
+
+
+class FastRandom(random.Random):
+    """Mersenne Twister with cheaper randrange and choice
+
+    random.Random draws integers by rejection sampling on getrandbits, which
+    costs a Python-level loop per call. This scales one random() float
+    instead; the bias is below 2**-40 for ranges up to a few thousand cells.
+    Streams differ from random.Random's for the same seed.
+    """
+    def randrange(self, start, stop=None, step=1):
+        if stop is None and start > 0:
+            return int(self.random() * start)
+        return super().randrange(start, stop, step)
+
+    def choice(self, seq):
+        if not seq:
+            raise IndexError("Cannot choose from an empty sequence")
+        return seq[int(self.random() * len(seq))]
+
+
+# Generator classes selectable by name
+RNG_BACKENDS = {
+    "mt": random.Random,
+    "fast": FastRandom,
+}
+
+
+def game_seed(master_seed: int, index: int) -> int:
+    """64-bit seed of game `index` in a batch seeded with master_seed"""
+    digest = hashlib.blake2b(f"{master_seed}:{index}".encode("ascii"), digest_size=8).digest()
+    return int.from_bytes(digest, "little")
+
+
+def game_rng(master_seed: Optional[int], index: int, backend: str = "mt") -> random.Random:
+    """Independent generator for one game of a batch
+
+    Without a master seed the generator is seeded from the OS, so unseeded
+    batches still give every game its own stream.
+    """
+    if backend not in RNG_BACKENDS:
+        raise ValueError(f"Unknown RNG backend: {backend}")
+    rng_class = RNG_BACKENDS[backend]
+    if master_seed is None:
+        return rng_class()
+    return rng_class(game_seed(master_seed, index))
@@ -0,0 +1,546 @@
+#!/usr/bin/env python3
+"""
+Asyncio TCP server hosting many concurrent Battleship matches.
+
+Clients speak a line protocol (one command per line, UTF-8). Every match has
+two seats: seat 0 shoots first at seat 1's fleet and seat 1 answers. A seat is
+either a connected client or the computer; computer moves are chosen on a
+thread pool so a slow strategy never stalls the other sessions.
+
+    Client -> server              Server -> client
+    NEW [strategy]                MATCH <id> SEAT 0     (you vs the computer)
+    HOST                          MATCH <id> WAITING    (wait for JOIN <id>)
+    JOIN <id>                     MATCH <id> SEAT 1
+    BOTS [strategy]               MATCH <id> WATCH      (computer vs computer)
+    WATCH <id>                    MATCH <id> WATCH      (spectate any match)
+    FIRE <coordinate>
+    BOARD                         BOARD <n>, then n rows of the fleet board
+    QUIT                          BYE
+
+Once a match has both seats, everyone in it receives
+
+    TURN <seat>
+    SHOT <seat> <coordinate> MISS|HIT|SUNK [ship]
+    GAMEOVER <winning seat>
+
+and OPPONENT LEFT if the other client disconnects. Errors are reported as
+ERR <message> and leave the session open.
+
+Spectators get the same SHOT, TURN and GAMEOVER lines from the match's
+SpectatorFeed, preceded by a snapshot of the match so far:
+
+    SNAPSHOT <shots> <turn or -> <winner or -> <seat 0 board> <seat 1 board>
+
+(boards as in spectator.py, one character per cell, row by row). Lines for
+all of a match's spectators are formatted once and written in batches at
+most every `spectator_flush` seconds. A spectator that reads too slowly is
+skipped until its connection catches up and then gets a fresh SNAPSHOT, so
+it never holds up the match or piles up unsent lines.
+
+Games live in a SessionStore (sessions.py). With --idle-timeout or
+--max-hot, a match waiting on a human player (or for an opponent to join)
+that nobody is watching is spilled to disk when idle or least recently used,
+and loaded back as soon as anyone touches it again.
+
+Usage:
+    python server.py --host 127.0.0.1 --port 8765
+    python server.py --idle-timeout 300 --max-hot 10000
+"""
+
+import argparse
+import asyncio
+import itertools
+import random
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+from battleship import COMPUTER_STRATEGIES, BattleshipGame
+from coordinates import format_coordinate, parse_coordinate
+from engine import GAME_OVER, SUNK, GameEvent
+from sessions import SessionStore
+from spectator import Snapshot, SpectatorFeed
+
+# Unsent bytes after which a spectator is skipped until it catches up
+SPECTATOR_BUFFER_LIMIT = 64 * 1024
+
+
+class Session:
+    """One connected client"""
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+        self.match: Optional["Match"] = None
+        self.seat: Optional[int] = None
+        self.watch_seq = 0  # Last feed record a spectating session has been sent
+        self.lagging = False  # Spectator skipped while its connection drains
+        self.task = asyncio.current_task()
+
+    def send(self, line: str):
+        """Queue one line for the client"""
+        if not self.writer.is_closing():
+            self.writer.write(line.encode("utf-8") + b"\n")
+
+
+class Match:
+    """A game between two seats, each a session or the computer (None)
+
+    The game itself is kept in the server's SessionStore, which may spill it
+    to disk while the match is idle; `game` loads it back when it is needed.
+    Once the match is dropped from the server, release() moves the game onto
+    the match so sessions still holding it can read how it ended.
+    """
+    def __init__(self, match_id: int, strategy: str, board_size: int, store: SessionStore, rng=None):
+        self.match_id = match_id
+        self.store = store
+        game = BattleshipGame(strategy=strategy, board_size=board_size, rng=rng)
+        if not (game.auto_place_ships(game.player_board) and game.auto_place_ships(game.computer_board)):
+            raise RuntimeError("Could not place the fleets")
+        # Seat 0 owns the player board, seat 1 the computer board
+        game.start_engine()
+        self.feed: Optional[SpectatorFeed] = None
+        self.seats: List[Optional[Session]] = [None, None]
+        self.watchers: List[Session] = []  # Spectating sessions, fed by self.feed
+        self.relay: Optional[asyncio.Task] = None  # Writes feed records to the watchers
+        self.started = False
+        self.abandoned = False
+        self._released: Optional[BattleshipGame] = None  # The game, once out of the store
+        self.attach(game)
+        store.put(match_id, game)
+
+    @property
+    def game(self) -> BattleshipGame:
+        if self._released is not None:
+            return self._released
+        return self.store.get(self.match_id)
+
+    @property
+    def engine(self):
+        return self.game.engine
+
+    def touch(self):
+        """Mark the match as in use, loading its game back if it was spilled"""
+        self.store.get(self.match_id)
+
+    def attach(self, game: BattleshipGame):
+        """Follow a game's engine: when the match starts and whenever the game is loaded back"""
+        game.engine.subscribe(self._announce)
+        self.feed = SpectatorFeed(game.engine)
+
+    def detach(self):
+        """Let go of the game's engine before the game is spilled"""
+        self.close_feed()
+        self.feed = None
+        self.relay = None  # Ends with the feed
+
+    def release(self):
+        """Take the game out of the store and keep it here for the match's last readers"""
+        if self._released is None and self.match_id in self.store:
+            self._released = self.store.get(self.match_id)
+        self.store.discard(self.match_id)
+
+    def close_feed(self):
+        if self.feed is not None:
+            self.feed.close()
+
+    @property
+    def turn(self) -> int:
+        return self.engine.turn
+
+    @property
+    def finished(self) -> bool:
+        return self.engine.finished or self.abandoned
+
+    def broadcast(self, line: str):
+        """Send a line to both seated clients"""
+        for session in self.seats:
+            if session is not None:
+                session.send(line)
+
+    def _announce(self, event: GameEvent):
+        """Engine subscriber broadcasting each event"""
+        if event.kind == GAME_OVER:
+            self.broadcast(f"GAMEOVER {event.player}")
+            return
+        line = f"SHOT {event.player} {format_coordinate(event.row, event.col)} {event.kind.upper()}"
+        if event.kind == SUNK:
+            line += f" {event.ship.name}"
+        self.broadcast(line)
+        if not self.engine.finished:
+            self.broadcast(f"TURN {self.engine.turn}")
+
+    def shoot(self, seat: int, row: int, col: int):
+        """Resolve a shot by a seat at the other seat's board"""
+        self.engine.apply_shot(seat, row, col)
+
+
+def encode_record(record) -> bytes:
+    """A spectator feed record as protocol bytes"""
+    return "".join(line + "\n" for line in spectator_lines(record)).encode("utf-8")
+
+
+def spectator_lines(record) -> List[str]:
+    """Protocol lines for a spectator feed record"""
+    if isinstance(record, Snapshot):
+        turn = "-" if record.turn is None else record.turn
+        winner = "-" if record.winner is None else record.winner
+        return [f"SNAPSHOT {record.seq} {turn} {winner} {record.views[0]} {record.views[1]}"]
+    line = f"SHOT {record.player} {format_coordinate(record.row, record.col)} {record.result.upper()}"
+    if record.ship is not None:
+        line += f" {record.ship}"
+    if record.winner is not None:
+        return [line, f"GAMEOVER {record.winner}"]
+    return [line, f"TURN {record.turn}"]
+
+
+class BattleshipServer:
+    """Accepts connections and runs their matches on one event loop"""
+    def __init__(self, host: str = "127.0.0.1", port: int = 8765, board_size: int = 10,
+                 strategy: str = "random", executor: Optional[ThreadPoolExecutor] = None,
+                 backlog: int = 1024, spectator_flush: float = 0.01, idle_timeout: Optional[float] = None,
+                 max_hot: Optional[int] = None, spill_path: Optional[str] = None):
+        if strategy not in COMPUTER_STRATEGIES:
+            raise ValueError(f"Unknown computer strategy: {strategy}")
+        self.host = host
+        self.port = port
+        self.board_size = board_size
+        self.strategy = strategy
+        self.backlog = backlog  # Pending connections; asyncio's default of 100 is too few
+        # Minimum seconds between writes to one spectator; faster shots are batched
+        self.spectator_flush = spectator_flush
+        self.executor = executor if executor is not None else ThreadPoolExecutor()
+        self.matches: Dict[int, Match] = {}
+        # One generator for every match: live games need no replayable streams,
+        # and a generator of their own would add about 3 KB to each
+        self.rng = random.Random()
+        # Seconds without a move before an idle match is spilled, and the most matches kept in memory
+        self.games = SessionStore(spill_path, max_hot, idle_timeout, can_evict=self._can_spill,
+                                  on_evict=self._on_spill, on_load=self._on_load, rng=self.rng)
+        self._match_ids = itertools.count(1)
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._tasks = set()
+        self._sessions = set()
+
+    async def start(self):
+        """Start listening; port 0 picks a free port (see self.port)"""
+        self._server = await asyncio.start_server(self._handle_client, self.host, self.port,
+                                                  backlog=self.backlog)
+        self.port = self._server.sockets[0].getsockname()[1]
+        if self.games.idle_timeout is not None:
+            task = asyncio.ensure_future(self._spill_idle())
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def serve_forever(self):
+        if self._server is None:
+            await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self):
+        """Stop accepting connections, disconnect clients and stop computer turns"""
+        if self._server is not None:
+            self._server.close()
+        handlers = [session.task for session in self._sessions]
+        for session in list(self._sessions):
+            session.writer.close()
+        # Closing the transport ends each handler's read loop
+        await asyncio.gather(*handlers, return_exceptions=True)
+        if self._server is not None:
+            await self._server.wait_closed()
+        for task in list(self._tasks):
+            task.cancel()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        self.executor.shutdown(wait=True)
+        self.games.close()
+
+    async def _spill_idle(self):
+        """Spill idle matches every half idle timeout"""
+        while True:
+            await asyncio.sleep(self.games.idle_timeout / 2)
+            self.games.evict_idle()
+
+    def _can_spill(self, match_id: int, game: BattleshipGame) -> bool:
+        """Only matches waiting on a human, with nobody watching, are spilled"""
+        match = self.matches.get(match_id)
+        if match is None:
+            return True
+        if match.watchers:
+            return False
+        if not match.started:
+            return True  # Waiting for an opponent to join
+        engine = game.engine
+        return not engine.finished and match.seats[engine.turn] is not None
+
+    def _on_spill(self, match_id: int, game: BattleshipGame):
+        match = self.matches.get(match_id)
+        if match is not None:
+            match.detach()
+
+    def _on_load(self, match_id: int, game: BattleshipGame):
+        match = self.matches.get(match_id)
+        if match is not None:
+            match.attach(game)
+
+    def _drop(self, match: Match):
+        """Forget a finished or abandoned match"""
+        self.matches.pop(match.match_id, None)
+        match.release()
+        match.close_feed()
+
+    def _new_match(self, strategy: Optional[str] = None) -> Match:
+        strategy = strategy if strategy is not None else self.strategy
+        if strategy not in COMPUTER_STRATEGIES:
+            raise ValueError(f"Unknown computer strategy: {strategy}")
+        match = Match(next(self._match_ids), strategy, self.board_size, self.games, self.rng)
+        self.matches[match.match_id] = match
+        return match
+
+    def _start_match(self, match: Match):
+        match.started = True
+        match.broadcast(f"TURN {match.turn}")
+        self._run_computer(match)
+
+    def _run_computer(self, match: Match):
+        """Play the computer's turns in the background while it has the move"""
+        if not match.finished and match.seats[match.turn] is None:
+            task = asyncio.ensure_future(self._computer_turns(match))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _computer_turns(self, match: Match):
+        loop = asyncio.get_event_loop()
+        while match.started and not match.finished and match.seats[match.turn] is None:
+            seat = match.turn
+            target = match.engine.target_of(seat)
+            row, col = await loop.run_in_executor(self.executor, match.game.get_computer_shot, target)
+            if match.match_id not in self.matches:
+                return  # Abandoned while the computer was thinking
+            match.shoot(seat, row, col)
+        if match.finished and match.match_id in self.matches:
+            self._drop(match)
+
+    async def _handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        session = Session(reader, writer)
+        self._sessions.add(session)
+        session.send(f"WELCOME BATTLESHIP {self.board_size}")
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except (ConnectionError, ValueError):
+                    break
+                if not line:
+                    break
+                words = line.decode("utf-8", "replace").split()
+                if not words:
+                    continue
+                command, args = words[0].upper(), words[1:]
+                if command == "QUIT":
+                    session.send("BYE")
+                    break
+                try:
+                    self._dispatch(session, command, args)
+                except ValueError as e:
+                    session.send(f"ERR {e}")
+                await writer.drain()
+        finally:
+            self._sessions.discard(session)
+            self._leave(session)
+            writer.close()
+
+    def _dispatch(self, session: Session, command: str, args: List[str]):
+        if command == "FIRE":
+            self._fire(session, args)
+        elif command == "BOARD":
+            self._send_board(session)
+        elif command in ("NEW", "HOST", "JOIN", "BOTS", "WATCH"):
+            if session.match is not None and not session.match.finished:
+                raise ValueError("Already in a match")
+            self._leave(session)
+            if command == "JOIN":
+                self._join(session, args)
+                return
+            if command == "WATCH":
+                if len(args) != 1 or not args[0].isdigit():
+                    raise ValueError("Usage: WATCH <match id>")
+                match = self.matches.get(int(args[0]))
+                if match is None:
+                    raise ValueError("No such match")
+                self._watch(session, match)
+                return
+            match = self._new_match(args[0].lower() if args else None)
+            session.match = match
+            if command == "BOTS":
+                self._watch(session, match)
+                self._start_match(match)
+            elif command == "HOST":
+                session.seat = 0
+                match.seats[0] = session
+                session.send(f"MATCH {match.match_id} WAITING")
+            else:
+                session.seat = 0
+                match.seats[0] = session
+                session.send(f"MATCH {match.match_id} SEAT 0")
+                self._start_match(match)
+        else:
+            raise ValueError(f"Unknown command: {command}")
+
+    def _watch(self, session: Session, match: Match):
+        """Make a session a spectator of a match, starting from a snapshot"""
+        match.touch()  # A spilled match comes back with a fresh feed
+        session.match = match
+        session.send(f"MATCH {match.match_id} WATCH")
+        snapshot = match.feed.snapshot()
+        session.writer.write(encode_record(snapshot))
+        session.watch_seq = snapshot.seq
+        session.lagging = False
+        match.watchers.append(session)
+        if match.relay is None:
+            match.relay = asyncio.ensure_future(self._relay(match))
+            self._tasks.add(match.relay)
+            match.relay.add_done_callback(self._tasks.discard)
+
+    async def _relay(self, match: Match):
+        """Write a match's feed to all of its spectators, one batch per flush"""
+        feed = match.feed
+        spectator = feed.subscribe(maxsize=4096)
+        while True:
+            batch = await spectator.next_batch()
+            if not batch:
+                break
+            records = [(record.seq, encode_record(record)) for record in batch]
+            data = b"".join(encoded for _, encoded in records)
+            last_seq = batch[-1].seq
+            resync = None
+            for session in match.watchers:
+                writer = session.writer
+                if writer.is_closing():
+                    continue
+                if writer.transport.get_write_buffer_size() > SPECTATOR_BUFFER_LIMIT:
+                    session.lagging = True  # Skip deltas until the connection drains
+                    continue
+                if session.lagging:
+                    if resync is None:
+                        resync = encode_record(match.feed.snapshot())
+                    writer.write(resync)
+                    session.lagging = False
+                elif session.watch_seq >= records[0][0]:
+                    # Joined mid-batch: its snapshot already covers the earlier records
+                    writer.write(b"".join(encoded for seq, encoded in records
+                                          if seq > session.watch_seq))
+                else:
+                    writer.write(data)
+                session.watch_seq = last_seq
+            if self.spectator_flush:
+                await asyncio.sleep(self.spectator_flush)
+        if match.feed is not feed:
+            return  # The match was spilled; a new feed and relay start if it is watched again
+        snapshot = feed.snapshot()
+        final = encode_record(snapshot)
+        if snapshot.winner is not None:
+            final += f"GAMEOVER {snapshot.winner}\n".encode("utf-8")
+        for session in match.watchers:
+            if session.lagging and not session.writer.is_closing():
+                session.writer.write(final)  # Catch up with how the match ended
+            if match.abandoned:
+                session.send("OPPONENT LEFT")
+
+    def _join(self, session: Session, args: List[str]):
+        if len(args) != 1 or not args[0].isdigit():
+            raise ValueError("Usage: JOIN <match id>")
+        match = self.matches.get(int(args[0]))
+        if match is None or match.started or match.seats[0] is None:
+            raise ValueError("No such match waiting for a player")
+        session.match = match
+        session.seat = 1
+        match.seats[1] = session
+        session.send(f"MATCH {match.match_id} SEAT 1")
+        match.seats[0].send("OPPONENT JOINED")
+        self._start_match(match)
+
+    def _fire(self, session: Session, args: List[str]):
+        match = session.match
+        if match is None or session.seat is None:
+            raise ValueError("Not playing a match")
+        if not match.started:
+            raise ValueError("Waiting for an opponent")
+        if match.finished:
+            raise ValueError("Game is over")
+        if match.turn != session.seat:
+            raise ValueError("Not your turn")
+        if len(args) != 1:
+            raise ValueError("Usage: FIRE <coordinate>")
+        row, col = parse_coordinate(args[0], self.board_size)
+        match.shoot(session.seat, row, col)
+        if match.finished:
+            self._drop(match)
+        else:
+            self._run_computer(match)
+
+    def _send_board(self, session: Session):
+        match = session.match
+        if match is None or session.seat is None:
+            raise ValueError("Not playing a match")
+        grid = match.engine.boards[session.seat].grid
+        session.send(f"BOARD {len(grid)}")
+        for row in grid:
+            session.send("".join(cell if cell != " " else "." for cell in row))
+
+    def _leave(self, session: Session):
+        """Detach a session from its match, ending the match if it was seated"""
+        match = session.match
+        if match is None:
+            return
+        session.match = None
+        if session in match.watchers:
+            match.watchers.remove(session)
+            if match.finished or (not match.watchers and match.seats == [None, None]):
+                self._drop(match)  # Nobody left to play or watch
+            return
+        if session.seat is not None:
+            match.seats[session.seat] = None
+            session.seat = None
+            if not match.finished:
+                match.abandoned = True  # Stops any computer turns
+                match.broadcast("OPPONENT LEFT")
+            self._drop(match)
+
+
+def main(argv: Optional[List[str]] = None):
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description="Host Battleship matches over TCP")
+    parser.add_argument("--host", default="127.0.0.1", help="address to listen on")
+    parser.add_argument("--port", type=int, default=8765, help="port to listen on")
+    parser.add_argument("--strategy", choices=COMPUTER_STRATEGIES, default="random",
+                        help="default computer strategy")
+    parser.add_argument("--board-size", type=int, default=10, help="board width and height")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="threads choosing computer moves (default: Python's default)")
+    parser.add_argument("--idle-timeout", type=float, default=None, metavar="SECONDS",
+                        help="spill matches to disk after this long without a move")
+    parser.add_argument("--max-hot", type=int, default=None, metavar="N",
+                        help="most matches kept in memory; the least recently used are spilled")
+    parser.add_argument("--spill", default=None, metavar="FILE",
+                        help="SQLite file for spilled matches (default: a temporary file)")
+    args = parser.parse_args(argv)
+
+    async def run():
+        server = BattleshipServer(args.host, args.port, args.board_size, args.strategy,
+                                  ThreadPoolExecutor(args.workers), idle_timeout=args.idle_timeout,
+                                  max_hot=args.max_hot, spill_path=args.spill)
+        await server.start()
+        print(f"Serving Battleship on {server.host}:{server.port}")
+        try:
+            await server.serve_forever()
+        finally:
+            await server.close()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        print("\nServer stopped.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,301 @@
+"""
+Game session store: live games in memory, idle ones spilled to SQLite.
+
+A SessionStore keeps recently used BattleshipGame instances hot in an LRU
+order. Games not used for `idle_timeout` seconds, and the least recently
+used games once more than `max_hot` are in memory, are encoded compactly and
+written to a SQLite file instead; get() loads a spilled game back
+transparently. A 10x10 game takes about 250 bytes on disk, against about
+14 KB for a live game on grid boards.
+
+The encoding keeps everything needed to continue the game: both fleets, the
+cells shot on each board, whose turn it is, the game mode, the salvo rule and
+the game's options. Strategy state is not stored - strategies rebuild it from the
+boards on their next move - and neither are transcripts or the random
+generator, which can be supplied again through `game_options`.
+
+The spill file is scratch space for one process: it is emptied when a store
+opens it, and a store without a path uses a temporary file removed on close.
+"""
+
+import json
+import os
+import sqlite3
+import struct
+import tempfile
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from battleship import BOARD_BACKENDS, BattleshipGame, Ship
+from engine import SALVO_SHIPS
+from transcript import GAME_MODES, decode_fleet, encode_fleet
+
+MAGIC = b"BSGS"
+VERSION = 2
+NONE = 0xFF  # No game mode, engine or winner
+SALVO_PER_SHIP = 0xFFFF  # Salvo field for SALVO_SHIPS; 0 is one shot per turn
+
+# magic, version, board size, game mode, turn, winner, flags, deadline (0 for none),
+# salvo rule, salvos fired by player 0 and player 1
+_HEADER = struct.Struct("<4sBHBBBBdHII")
+_OPENING_BOOK, _OWES_SECOND_SHOT = 1, 2
+_LENGTH = struct.Struct("<H")
+_COUNT = struct.Struct("<I")
+_CELL_LIST, _CELL_BITMAP = 0, 1
+
+
+def _encode_text(text: str) -> bytes:
+    data = text.encode("utf-8")
+    return _LENGTH.pack(len(data)) + data
+
+
+def _decode_text(data, offset: int) -> Tuple[str, int]:
+    length, = _LENGTH.unpack_from(data, offset)
+    offset += _LENGTH.size
+    return bytes(data[offset:offset + length]).decode("utf-8"), offset + length
+
+
+def _encode_shots(board) -> bytes:
+    """The cells shot on a board, as a cell list or a bitmap, whichever is smaller"""
+    size = board.size
+    cells = sorted(row * size + col for row, col in board.shots_fired)
+    bitmap_bytes = (size * size + 7) // 8
+    if len(cells) * 4 < bitmap_bytes:
+        return bytes([_CELL_LIST]) + _COUNT.pack(len(cells)) + struct.pack(f"<{len(cells)}I", *cells)
+    mask = 0
+    for cell in cells:
+        mask |= 1 << cell
+    return bytes([_CELL_BITMAP]) + mask.to_bytes(bitmap_bytes, "little")
+
+
+def _decode_shots(data, offset: int, size: int) -> Tuple[List[int], int]:
+    kind = data[offset]
+    offset += 1
+    if kind == _CELL_LIST:
+        count, = _COUNT.unpack_from(data, offset)
+        offset += _COUNT.size
+        cells = list(struct.unpack_from(f"<{count}I", data, offset))
+        return cells, offset + count * 4
+    bitmap_bytes = (size * size + 7) // 8
+    mask = int.from_bytes(data[offset:offset + bitmap_bytes], "little")
+    cells = []
+    while mask:
+        low = mask & -mask
+        cells.append(low.bit_length() - 1)
+        mask ^= low
+    return cells, offset + bitmap_bytes
+
+
+def encode_game(game: BattleshipGame) -> bytes:
+    """A game's fleets, shots, turn and options as compact bytes"""
+    engine = game.engine
+    mode = GAME_MODES.index(game.game_mode) if game.game_mode in GAME_MODES else NONE
+    turn = engine.turn if engine is not None else NONE
+    winner = engine.winner if engine is not None and engine.winner is not None else NONE
+    flags = (_OPENING_BOOK if game.opening_book else 0) | (_OWES_SECOND_SHOT if game.owes_second_shot else 0)
+    backend = next(name for name, cls in BOARD_BACKENDS.items() if type(game.player_board) is cls)
+    salvo = SALVO_PER_SHIP if game.salvo == SALVO_SHIPS else game.salvo or 0
+    salvos = engine.salvos if engine is not None else (0, 0)
+    parts = [
+        _HEADER.pack(MAGIC, VERSION, game.board_size, mode, turn, winner, flags, game.deadline or 0.0,
+                     salvo, *salvos),
+        _encode_text(backend),
+        _encode_text(game.strategy),
+        _encode_text(game.strategies[0]),
+        _encode_text(game.strategies[1]),
+        _encode_text(json.dumps(game.strategy_options)),
+    ]
+    for board in (game.player_board, game.computer_board):
+        parts.append(encode_fleet(board))
+        parts.append(_encode_shots(board))
+    return b"".join(parts)
+
+
+def decode_game(data: bytes, **game_options) -> BattleshipGame:
+    """Rebuild a game written by encode_game, with its engine if it had one
+
+    game_options (such as rng) are passed on to BattleshipGame.
+    """
+    magic, version = struct.unpack_from("<4sB", data, 0)
+    if magic != MAGIC:
+        raise ValueError("Not an encoded game")
+    if version != VERSION:
+        raise ValueError(f"Unsupported game encoding version {version}")
+    (_, _, board_size, mode, turn, winner, flags, deadline,
+     salvo, *salvos) = _HEADER.unpack_from(data, 0)
+    offset = _HEADER.size
+    texts = []
+    for _ in range(5):
+        text, offset = _decode_text(data, offset)
+        texts.append(text)
+    backend, strategy, first, second, options = texts
+    game = BattleshipGame(BOARD_BACKENDS[backend], strategy=strategy, board_size=board_size,
+                          strategy_options=json.loads(options), opening_book=bool(flags & _OPENING_BOOK),
+                          strategies=(first, second), deadline=deadline or None,
+                          salvo=SALVO_SHIPS if salvo == SALVO_PER_SHIP else salvo or None, **game_options)
+    game.game_mode = GAME_MODES[mode] if mode != NONE else None
+    for board in (game.player_board, game.computer_board):
+        fleet, offset = decode_fleet(data, offset)
+        for name, size, positions in fleet:
+            board.place_ship(Ship(name, size), positions)
+        cells, offset = _decode_shots(data, offset, board_size)
+        for cell in cells:
+            board.receive_shot(*divmod(cell, board_size))
+    if turn != NONE:
+        game.owes_second_shot = turn == 1  # Makes start_engine hand the move to player 1
+        engine = game.start_engine()
+        engine.salvos = salvos
+        if winner != NONE:
+            engine.winner = winner
+    else:
+        game.owes_second_shot = bool(flags & _OWES_SECOND_SHOT)
+    return game
+
+
+class SessionStore:
+    """Games by integer key: the recently used ones in memory, the rest in SQLite
+
+    `can_evict(key, game)` may veto spilling a game, for example while a
+    move is being worked out for it; vetoed games stay in memory even over
+    `max_hot`. `on_evict(key, game)` is called just before a game is
+    spilled and `on_load(key, game)` just after one is loaded back, so
+    owners can drop and restore their references to the game's engine.
+    """
+    def __init__(self, path: Optional[str] = None, max_hot: Optional[int] = None,
+                 idle_timeout: Optional[float] = None,
+                 can_evict: Optional[Callable[[int, BattleshipGame], bool]] = None,
+                 on_evict: Optional[Callable[[int, BattleshipGame], None]] = None,
+                 on_load: Optional[Callable[[int, BattleshipGame], None]] = None,
+                 clock: Callable[[], float] = time.monotonic, **game_options):
+        if max_hot is not None and max_hot < 0:
+            raise ValueError("max_hot cannot be negative")
+        self._temporary = path is None
+        if path is None:
+            fd, path = tempfile.mkstemp(prefix="battleship-sessions-", suffix=".sqlite")
+            os.close(fd)
+        self.path = path
+        self.max_hot = max_hot
+        self.idle_timeout = idle_timeout
+        self.can_evict = can_evict
+        self.on_evict = on_evict
+        self.on_load = on_load
+        self.clock = clock
+        self.game_options = game_options  # Passed to decode_game, e.g. rng
+        self.spills = 0
+        self.loads = 0
+        self._hot: "OrderedDict[int, Tuple[BattleshipGame, float]]" = OrderedDict()  # Oldest use first
+        self._spilled = set()
+        self._db = sqlite3.connect(path, isolation_level=None)  # Autocommit each statement
+        # Spilled games only live as long as this process, so durability is not needed
+        self._db.execute("PRAGMA synchronous = OFF")
+        self._db.execute("CREATE TABLE IF NOT EXISTS games (key INTEGER PRIMARY KEY, data BLOB NOT NULL)")
+        self._db.execute("DELETE FROM games")
+
+    def __len__(self) -> int:
+        return len(self._hot) + len(self._spilled)
+
+    def __contains__(self, key: int) -> bool:
+        return key in self._hot or key in self._spilled
+
+    def __iter__(self) -> Iterator[int]:
+        yield from list(self._hot)
+        yield from list(self._spilled)
+
+    @property
+    def hot(self) -> int:
+        """Games in memory"""
+        return len(self._hot)
+
+    @property
+    def spilled(self) -> int:
+        """Games on disk"""
+        return len(self._spilled)
+
+    def is_hot(self, key: int) -> bool:
+        return key in self._hot
+
+    def put(self, key: int, game: BattleshipGame):
+        """Add or replace a game, as just used"""
+        self.discard(key)
+        self._hot[key] = (game, self.clock())
+        self._enforce_cap(key)
+
+    def get(self, key: int) -> BattleshipGame:
+        """A game, loaded back from disk if it was spilled; marks it as used"""
+        entry = self._hot.get(key)
+        if entry is not None:
+            self._hot[key] = (entry[0], self.clock())
+            self._hot.move_to_end(key)
+            return entry[0]
+        if key not in self._spilled:
+            raise KeyError(key)
+        row = self._db.execute("SELECT data FROM games WHERE key = ?", (key,)).fetchone()
+        game = decode_game(row[0], **self.game_options)
+        self._db.execute("DELETE FROM games WHERE key = ?", (key,))
+        self._spilled.discard(key)
+        self.loads += 1
+        self._hot[key] = (game, self.clock())
+        if self.on_load is not None:
+            self.on_load(key, game)
+        self._enforce_cap(key)
+        return game
+
+    def discard(self, key: int):
+        """Forget a game, hot or spilled"""
+        self._hot.pop(key, None)
+        if key in self._spilled:
+            self._spilled.discard(key)
+            self._db.execute("DELETE FROM games WHERE key = ?", (key,))
+
+    def spill(self, key: int) -> bool:
+        """Move a hot game to disk, unless can_evict vetoes it"""
+        entry = self._hot.get(key)
+        if entry is None:
+            return False
+        game = entry[0]
+        if self.can_evict is not None and not self.can_evict(key, game):
+            return False
+        if self.on_evict is not None:
+            self.on_evict(key, game)
+        self._db.execute("INSERT OR REPLACE INTO games (key, data) VALUES (?, ?)", (key, encode_game(game)))
+        del self._hot[key]
+        self._spilled.add(key)
+        self.spills += 1
+        game.close()
+        return True
+
+    def _enforce_cap(self, keep: int):
+        """Spill the least recently used games over max_hot, except the one just used"""
+        if self.max_hot is None or len(self._hot) <= self.max_hot:
+            return
+        for key in list(self._hot):
+            if len(self._hot) <= self.max_hot:
+                break
+            if key != keep:
+                self.spill(key)
+
+    def evict_idle(self) -> int:
+        """Spill every game idle for idle_timeout seconds; returns how many were spilled"""
+        if self.idle_timeout is None:
+            return 0
+        cutoff = self.clock() - self.idle_timeout
+        idle = []
+        for key, (_, last_used) in self._hot.items():
+            if last_used > cutoff:
+                break  # Later entries were used more recently
+            idle.append(key)
+        return sum(1 for key in idle if self.spill(key))
+
+    def stats(self) -> Dict[str, int]:
+        return {"hot": self.hot, "spilled": self.spilled, "spills": self.spills, "loads": self.loads,
+                "spill_bytes": self._db.execute("SELECT COALESCE(SUM(LENGTH(data)), 0) FROM games").fetchone()[0]}
+
+    def close(self):
+        """Close the spill file (deleting it if it was a temporary one)"""
+        if self._db is None:
+            return
+        self._db.close()
+        self._db = None
+        if self._temporary and os.path.exists(self.path):
+            os.remove(self.path)
@@ -0,0 +1,348 @@
+#!/usr/bin/env python3
+"""
+Headless batch simulator for computer vs computer Battleship games.
+
+Games are played with the regular Board, Ship and auto_place_ships rules but
+nothing is rendered and nothing waits for input. Games are spread across a
+process pool and the results are merged into a single SimulationStats.
+
+Each game draws from its own generator seeded from the master seed and the
+game's index, so any game of a batch can be replayed on its own. The two
+computers can play different strategies, and the time each side takes per
+move is reported as p50/p99 latencies. Under salvo rules each move is a
+whole salvo, resolved in one Board.receive_shots call.
+
+Usage:
+    python simulator.py --games 100000 --seed 42 --workers 8
+    python simulator.py --strategies density montecarlo --deadline 20
+    python simulator.py --salvo ships --strategy density
+    python simulator.py --seed 42 --game 31337    # replay a single game
+"""
+
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from battleship import BOARD_BACKENDS, COMPUTER_STRATEGIES, BattleshipGame
+from engine import Salvo, check_salvo, parse_salvo
+from profiling import add_profile_arguments, profiler_from_args
+from seeding import RNG_BACKENDS, game_rng
+from strategies import LatencyStats
+
+# Ways of running a batch of games
+ENGINES = ("python", "numpy")
+
+# Games handed to a worker in one go; large enough to hide IPC overhead,
+# small enough to keep all workers busy until the end of the batch.
+MAX_CHUNK_SIZE = 5000
+# A batch is split into at least this many chunks. Chunking only depends on
+# the number of games so seeded results are the same for any worker count.
+MIN_CHUNKS = 64
+
+
+def play_headless_game(game: BattleshipGame) -> Tuple[int, int]:
+    """Play one computer vs computer game without any output.
+
+    Returns (winner, shots) where winner is 1 or 2 and shots is the number
+    of shots the winner fired (every shot of every salvo under salvo rules).
+    """
+    if not game.auto_place_ships(game.player_board):
+        raise RuntimeError("Could not place computer 1 ships")
+    if not game.auto_place_ships(game.computer_board):
+        raise RuntimeError("Could not place computer 2 ships")
+
+    engine = game.start_engine()
+    boards = engine.boards
+    if engine.salvo is not None:
+        while engine.winner is None:
+            player = engine.turn
+            cells = game.get_computer_salvo(boards[1 - player], player, engine.salvo_size(player))
+            engine.apply_salvo(player, cells)
+        return engine.winner + 1, engine.shots[engine.winner]
+    apply_shot = engine.apply_shot
+    get_computer_shot = game.get_computer_shot
+    while engine.winner is None:
+        player = engine.turn
+        row, col = get_computer_shot(boards[1 - player])
+        apply_shot(player, row, col)
+    return engine.winner + 1, engine.shots[engine.winner]
+
+
+class SimulationStats:
+    """Aggregate results of a batch of simulated games"""
+    def __init__(self):
+        self.n_games = 0
+        self.wins = {0: 0, 1: 0, 2: 0}
+        self.shots_histogram: Dict[int, int] = {}
+        self.latency = [LatencyStats(), LatencyStats()]  # Decision times of computer 1 and 2
+        self.elapsed = 0.0
+
+    def record(self, winner: int, shots: int):
+        """Record the result of a single game"""
+        self.n_games += 1
+        self.wins[winner] += 1
+        if winner:
+            self.shots_histogram[shots] = self.shots_histogram.get(shots, 0) + 1
+
+    def record_latency(self, game: BattleshipGame):
+        """Add the decision times of a finished game's computer players"""
+        for latency, computer in zip(self.latency, game.computer_players):
+            if computer is not None:
+                latency.merge(computer.latency)
+
+    def merge(self, other: "SimulationStats"):
+        """Add the results of another batch to this one"""
+        self.n_games += other.n_games
+        for latency, other_latency in zip(self.latency, other.latency):
+            latency.merge(other_latency)
+        for winner, count in other.wins.items():
+            self.wins[winner] += count
+        for shots, count in other.shots_histogram.items():
+            self.shots_histogram[shots] = self.shots_histogram.get(shots, 0) + count
+
+    @property
+    def win_rate(self) -> float:
+        """Fraction of games won by computer 1 (the side that shoots first)"""
+        return self.wins[1] / self.n_games if self.n_games else 0.0
+
+    @property
+    def games_per_second(self) -> float:
+        return self.n_games / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def mean_shots(self) -> float:
+        """Mean number of shots the winner needed"""
+        total = sum(self.shots_histogram.values())
+        if not total:
+            return 0.0
+        return sum(shots * count for shots, count in self.shots_histogram.items()) / total
+
+    def percentile(self, p: float) -> int:
+        """Shots-to-win value at percentile p (0-100)"""
+        total = sum(self.shots_histogram.values())
+        if not total:
+            return 0
+        threshold = total * p / 100.0
+        seen = 0
+        for shots in sorted(self.shots_histogram):
+            seen += self.shots_histogram[shots]
+            if seen >= threshold:
+                return shots
+        return max(self.shots_histogram)
+
+    def to_dict(self) -> dict:
+        return {
+            "games": self.n_games,
+            "computer_1_wins": self.wins[1],
+            "computer_2_wins": self.wins[2],
+            "unfinished": self.wins[0],
+            "win_rate": self.win_rate,
+            "mean_shots": self.mean_shots,
+            "median_shots": self.percentile(50),
+            "p95_shots": self.percentile(95),
+            "shots_histogram": dict(sorted(self.shots_histogram.items())),
+            "computer_1_latency": self.latency[0].to_dict(),
+            "computer_2_latency": self.latency[1].to_dict(),
+            "elapsed": self.elapsed,
+            "games_per_second": self.games_per_second,
+        }
+
+    def summary(self) -> str:
+        """Human readable summary of the batch"""
+        lines = [
+            f"Games played:      {self.n_games}",
+            f"Computer 1 wins:   {self.wins[1]} ({self.win_rate:.1%})",
+            f"Computer 2 wins:   {self.wins[2]}",
+            f"Shots to win:      mean {self.mean_shots:.1f}, "
+            f"median {self.percentile(50)}, p95 {self.percentile(95)}, "
+            f"range {min(self.shots_histogram, default=0)}-{max(self.shots_histogram, default=0)}",
+            f"Elapsed:           {self.elapsed:.2f}s ({self.games_per_second:.0f} games/sec)",
+        ]
+        for player, latency in enumerate(self.latency, start=1):
+            if latency.count:
+                lines.append(f"Computer {player} moves:  {latency.summary()}")
+        if self.wins[0]:
+            lines.insert(3, f"Unfinished games:  {self.wins[0]}")
+        return "\n".join(lines)
+
+
+def _batch_game(index: int, seed: Optional[int], backend: Optional[str] = None, strategy: str = "random",
+                board_size: int = 10, rng: str = "mt", strategies: Optional[Tuple[str, str]] = None,
+                deadline: Optional[float] = None, salvo: Salvo = None) -> BattleshipGame:
+    return BattleshipGame(BOARD_BACKENDS.get(backend), strategy=strategy, board_size=board_size,
+                          rng=game_rng(seed, index, rng), strategies=strategies, deadline=deadline,
+                          salvo=salvo)
+
+
+def _play_batch_game(game: BattleshipGame, index: int, seed: Optional[int]) -> Tuple[int, int]:
+    try:
+        return play_headless_game(game)
+    except Exception as e:
+        raise RuntimeError(f"Game {index} failed (replay with --seed {seed} --game {index}): {e}") from e
+    finally:
+        game.close()
+
+
+def replay_game(index: int, seed: Optional[int], backend: Optional[str] = None,
+                strategy: str = "random", board_size: int = 10, rng: str = "mt",
+                strategies: Optional[Tuple[str, str]] = None, deadline: Optional[float] = None,
+                salvo: Salvo = None) -> Tuple[int, int]:
+    """Play game `index` of a batch exactly as simulate() plays it"""
+    game = _batch_game(index, seed, backend, strategy, board_size, rng, strategies, deadline, salvo)
+    return _play_batch_game(game, index, seed)
+
+
+def _run_chunk(task: Tuple[int, int, Optional[int], dict]) -> SimulationStats:
+    """Play a contiguous chunk of games inside a worker process"""
+    start, count, seed, options = task
+    stats = SimulationStats()
+    for index in range(start, start + count):
+        game = _batch_game(index, seed, **options)
+        stats.record(*_play_batch_game(game, index, seed))
+        stats.record_latency(game)
+    return stats
+
+
+def _run_numpy_chunk(task: Tuple[int, int, Optional[int], dict]) -> SimulationStats:
+    """Play a chunk of random-strategy games in lockstep on the NumPy batch engine"""
+    import numpy as np
+    from batch_engine import BatchEngine
+
+    start, count, seed, options = task
+    rng = np.random.default_rng(None if seed is None else [seed, start])
+    size = options["board_size"]
+
+    # Computer 1 shoots at computer 2's fleet and vice versa. Computer 1 fires
+    # first each turn, so it wins ties.
+    shots_1 = BatchEngine.random_fleets(count, size, rng=rng).play_random(rng)
+    shots_2 = BatchEngine.random_fleets(count, size, rng=rng).play_random(rng)
+
+    stats = SimulationStats()
+    for first, second in zip(shots_1.tolist(), shots_2.tolist()):
+        if first <= second:
+            stats.record(1, first)
+        else:
+            stats.record(2, second)
+    return stats
+
+
+def _make_chunks(n_games: int, seed: Optional[int], options: dict) -> List[Tuple[int, int, Optional[int], dict]]:
+    """Split n_games into (start, count, seed, options) tasks"""
+    chunk_size = max(1, min(MAX_CHUNK_SIZE, -(-n_games // MIN_CHUNKS)))
+    return [(start, min(chunk_size, n_games - start), seed, options)
+            for start in range(0, n_games, chunk_size)]
+
+
+def simulate(n_games: int, seed: Optional[int] = None, workers: Optional[int] = None,
+             backend: Optional[str] = None, strategy: str = "random",
+             board_size: int = 10, engine: str = "python", rng: str = "mt",
+             strategies: Optional[Tuple[str, str]] = None, deadline: Optional[float] = None,
+             salvo: Salvo = None) -> SimulationStats:
+    """Play n_games headless computer vs computer games and aggregate the results.
+
+    Games are split into chunks and run on a pool of `workers` processes
+    (defaults to the CPU count). With a seed the results do not depend on
+    the number of workers. `backend` names a board class in BOARD_BACKENDS
+    (by default the game picks one for the board size) and `strategy` one
+    of COMPUTER_STRATEGIES, or `strategies` one per computer. `deadline`
+    caps each move's decision time in seconds and `salvo` is an engine salvo
+    rule (None for one shot per turn). `rng` names the per-game
+    generator in RNG_BACKENDS. engine="numpy" plays random-strategy games
+    in lockstep on the vectorized batch engine instead of one by one.
+    """
+    sides = tuple(strategies) if strategies is not None else (strategy, strategy)
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown engine: {engine}")
+    if engine == "numpy" and sides != ("random", "random"):
+        raise ValueError("The numpy engine only supports the random strategy")
+    check_salvo(salvo)
+    if engine == "numpy" and salvo is not None:
+        raise ValueError("The numpy engine only plays one shot per turn")
+    if backend is not None and backend not in BOARD_BACKENDS:
+        raise ValueError(f"Unknown board backend: {backend}")
+    for name in (strategy,) + sides:
+        if name not in COMPUTER_STRATEGIES:
+            raise ValueError(f"Unknown computer strategy: {name}")
+    if rng not in RNG_BACKENDS:
+        raise ValueError(f"Unknown RNG backend: {rng}")
+    options = {"backend": backend, "strategy": strategy, "board_size": board_size, "rng": rng,
+               "strategies": strategies, "deadline": deadline, "salvo": salvo}
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = max(1, workers)
+
+    stats = SimulationStats()
+    start_time = time.perf_counter()
+    tasks = _make_chunks(n_games, seed, options)
+
+    run_chunk = _run_numpy_chunk if engine == "numpy" else _run_chunk
+
+    if workers == 1:
+        for task in tasks:
+            stats.merge(run_chunk(task))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for chunk_stats in pool.map(run_chunk, tasks):
+                stats.merge(chunk_stats)
+
+    stats.elapsed = time.perf_counter() - start_time
+    return stats
+
+
+def main(argv: Optional[List[str]] = None):
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description="Run headless computer vs computer Battleship games")
+    parser.add_argument("-n", "--games", type=int, default=1000, help="number of games to play")
+    parser.add_argument("-s", "--seed", type=int, default=None, help="master random seed")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("-b", "--backend", choices=sorted(BOARD_BACKENDS), default=None,
+                        help="board implementation (default: grid, sparse for large boards)")
+    parser.add_argument("--strategy", choices=COMPUTER_STRATEGIES, default="random",
+                        help="computer shooting strategy")
+    parser.add_argument("--strategies", nargs=2, choices=COMPUTER_STRATEGIES, default=None,
+                        metavar=("FIRST", "SECOND"), help="a different strategy for each computer")
+    parser.add_argument("--deadline", type=float, default=None, metavar="MS",
+                        help="longest a strategy may think per move before a random move is played")
+    parser.add_argument("--board-size", type=int, default=10, help="board width and height")
+    parser.add_argument("--salvo", type=parse_salvo, default=None, metavar="N|ships",
+                        help="fire N shots per turn, or one per ship still afloat ('ships')")
+    parser.add_argument("--engine", choices=ENGINES, default="python",
+                        help="play games one by one or in lockstep with NumPy")
+    parser.add_argument("--rng", choices=sorted(RNG_BACKENDS), default="mt",
+                        help="per-game random number generator")
+    parser.add_argument("--game", type=int, default=None, metavar="INDEX",
+                        help="replay only this game of the seeded batch")
+    add_profile_arguments(parser)
+    args = parser.parse_args(argv)
+
+    deadline = args.deadline / 1000 if args.deadline is not None else None
+    if args.game is not None:
+        if args.seed is None:
+            parser.error("--game needs the --seed of the batch")
+        winner, shots = replay_game(args.game, args.seed, args.backend, args.strategy,
+                                    args.board_size, args.rng, args.strategies, deadline, args.salvo)
+        print(f"Game {args.game}: computer {winner} won in {shots} shots")
+        return
+
+    profiler = profiler_from_args(args)
+    workers = args.workers
+    if profiler is not None:
+        workers = 1  # Phases are timed in this process only
+        profiler.enable()
+    try:
+        stats = simulate(args.games, seed=args.seed, workers=workers, backend=args.backend,
+                         strategy=args.strategy, board_size=args.board_size, engine=args.engine,
+                         rng=args.rng, strategies=args.strategies, deadline=deadline, salvo=args.salvo)
+    finally:
+        if profiler is not None:
+            profiler.disable()
+    print(stats.summary())
+    if profiler is not None:
+        print()
+        print(profiler.summary())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,251 @@
+"""
+Spectator feeds: live game updates fanned out to many asyncio subscribers.
+
+A SpectatorFeed subscribes to a GameEngine and turns every resolved shot into
+a small Delta record (shooter, cell, result, ship sunk, whose turn is next).
+Subscribers read records from their own bounded queue, so a slow viewer only
+ever falls behind itself: when its queue overflows, the backlog is dropped
+and its next record is a full Snapshot of the game instead. New subscribers
+start with a snapshot, and the feed also publishes one every
+`snapshot_interval` shots (by default half the board's cells, which keeps
+snapshots to about one byte per shot).
+
+Under salvo rules every shot of a salvo gets its own delta. The shooter
+keeps the turn until the salvo's last shot, whose delta carries the turn (or
+the winner) after the whole salvo.
+
+Snapshots show what a spectator may see - shots, hits and sunk ships, not
+the fleets - as one string per board with a character per cell:
+
+    '.' not shot   'o' miss   'x' hit   '#' part of a sunk ship
+
+Engine events must be delivered on the event loop's thread.
+
+Usage:
+    feed = SpectatorFeed(engine)
+    async for record in feed.subscribe():
+        ...
+"""
+
+import asyncio
+import collections
+from typing import List, Optional, Tuple
+
+from engine import GAME_OVER, HIT, MISS, GameEngine, GameEvent
+
+_CELL_CHARS = {MISS: ord("o"), HIT: ord("x")}
+_SUNK_CHAR = ord("#")
+
+
+class Delta:
+    """One resolved shot
+
+    `board` is the player whose fleet was shot at. `turn` is the player to
+    move next, or None once the game is over and `winner` is set.
+    """
+    __slots__ = ("seq", "player", "board", "row", "col", "result", "ship", "turn", "winner")
+
+    def __init__(self, seq: int, player: int, row: int, col: int, result: str,
+                 ship: Optional[str], turn: Optional[int], winner: Optional[int]):
+        self.seq = seq
+        self.player = player
+        self.board = 1 - player
+        self.row = row
+        self.col = col
+        self.result = result
+        self.ship = ship
+        self.turn = turn
+        self.winner = winner
+
+    def __repr__(self) -> str:
+        return f"Delta({self.seq}, player={self.player}, row={self.row}, col={self.col}, {self.result!r})"
+
+
+class Snapshot:
+    """The public view of both boards after `seq` shots"""
+    __slots__ = ("seq", "board_size", "views", "turn", "winner")
+
+    def __init__(self, seq: int, board_size: int, views: Tuple[str, str],
+                 turn: Optional[int], winner: Optional[int]):
+        self.seq = seq
+        self.board_size = board_size
+        self.views = views  # views[p] is player p's board as spectators see it
+        self.turn = turn
+        self.winner = winner
+
+    def __repr__(self) -> str:
+        return f"Snapshot({self.seq}, turn={self.turn}, winner={self.winner})"
+
+
+class Spectator:
+    """One subscriber's bounded queue of feed records; iterate it with async for"""
+    def __init__(self, feed: "SpectatorFeed", maxsize: int):
+        self.feed = feed
+        self.maxsize = maxsize
+        self.dropped = 0  # Records skipped because the subscriber fell behind
+        self.closed = False
+        self._queue = collections.deque([feed.snapshot()])
+        self._resync = False  # Set when the queue overflowed; the next record is a snapshot
+        self._waiter: Optional[asyncio.Future] = None
+
+    def _wake(self):
+        if self._waiter is not None and not self._waiter.done():
+            self._waiter.set_result(None)
+
+    def _push(self, record):
+        if self._resync:
+            self.dropped += 1  # The coming snapshot covers it
+            return
+        if len(self._queue) >= self.maxsize:
+            self.dropped += len(self._queue) + 1
+            self._queue.clear()
+            self._resync = True
+        else:
+            self._queue.append(record)
+        self._wake()
+
+    def _finish(self):
+        self.closed = True
+        self._wake()
+
+    def close(self):
+        """Stop receiving records"""
+        self.feed.unsubscribe(self)
+        self._queue.clear()
+        self._resync = False
+        self._finish()
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        while True:
+            if self._queue:
+                return self._queue.popleft()
+            if self._resync:
+                self._resync = False
+                return self.feed.snapshot()
+            if self.closed:
+                raise StopAsyncIteration
+            self._waiter = asyncio.get_running_loop().create_future()
+            await self._waiter
+            self._waiter = None
+
+    async def next_batch(self) -> list:
+        """Every record ready now, waiting for at least one; [] once the feed has ended
+
+        Lets a subscriber that fell a few records behind catch up with one
+        write instead of one per record.
+        """
+        try:
+            first = await self.__anext__()
+        except StopAsyncIteration:
+            return []
+        batch = [first]
+        batch.extend(self._queue)
+        self._queue.clear()
+        if self._resync:
+            self._resync = False
+            batch.append(self.feed.snapshot())
+        return batch
+
+
+class SpectatorFeed:
+    """Publishes a game's shots to any number of Spectators"""
+    def __init__(self, engine: GameEngine, snapshot_interval: Optional[int] = None, maxsize: int = 256):
+        self.engine = engine
+        self.maxsize = maxsize
+        self.board_size = engine.boards[0].size
+        if snapshot_interval is None:
+            snapshot_interval = max(1, self.board_size * self.board_size // 2)
+        self.snapshot_interval = snapshot_interval  # 0 for no periodic snapshots
+        self.seq = sum(engine.shots)
+        self._shots = list(engine.shots)  # Shots of each player delivered so far
+        self._next_snapshot = self._snapshot_after(self.seq)
+        self.closed = False
+        self._spectators: List[Spectator] = []
+        self._views = [self._public_view(board) for board in engine.boards]
+        self._snapshot: Optional[Snapshot] = None
+        engine.subscribe(self._on_event)
+
+    def _snapshot_after(self, seq: int) -> int:
+        """The seq of the first periodic snapshot after seq (0 for none)"""
+        interval = self.snapshot_interval
+        return seq - seq % interval + interval if interval else 0
+
+    def _public_view(self, board) -> bytearray:
+        size = self.board_size
+        view = bytearray(b"." * (size * size))
+        for row, col in board.shots_fired:
+            view[row * size + col] = _CELL_CHARS[HIT if (row, col) in board.hits else MISS]
+        for ship in board.ships:
+            if ship.is_sunk():
+                for row, col in ship.positions:
+                    view[row * size + col] = _SUNK_CHAR
+        return view
+
+    def __len__(self) -> int:
+        return len(self._spectators)
+
+    def subscribe(self, maxsize: Optional[int] = None) -> Spectator:
+        """A new subscriber; its first record is a snapshot of the game so far"""
+        spectator = Spectator(self, maxsize if maxsize is not None else self.maxsize)
+        if self.closed:
+            spectator._finish()
+        self._spectators.append(spectator)
+        return spectator
+
+    def unsubscribe(self, spectator: Spectator):
+        if spectator in self._spectators:
+            self._spectators.remove(spectator)
+
+    def snapshot(self) -> Snapshot:
+        """The current public view of the game, shared by everyone who asks until the next shot"""
+        if self._snapshot is None or self._snapshot.seq != self.seq:
+            engine = self.engine
+            self._snapshot = Snapshot(self.seq, self.board_size,
+                                      tuple(view.decode("ascii") for view in self._views),
+                                      None if engine.finished else engine.turn, engine.winner)
+        return self._snapshot
+
+    def _publish(self, record):
+        for spectator in self._spectators:
+            spectator._push(record)
+
+    def _on_event(self, event: GameEvent):
+        """Engine subscriber turning shot events into deltas"""
+        if event.kind == GAME_OVER:
+            self.close()  # The winner went out with the last shot's delta
+            return
+        engine = self.engine
+        view = self._views[1 - event.player]
+        size = self.board_size
+        ship = None
+        if event.kind in _CELL_CHARS:
+            view[event.row * size + event.col] = _CELL_CHARS[event.kind]
+        else:
+            ship = event.ship.name
+            for row, col in event.ship.positions:
+                view[row * size + col] = _SUNK_CHAR
+        self.seq += 1
+        player = event.player
+        self._shots[player] += 1
+        if self._shots[player] < engine.shots[player]:
+            # More shots of this salvo are still to be delivered: the engine's turn and winner are ahead
+            self._publish(Delta(self.seq, player, event.row, event.col, event.kind, ship, player, None))
+            return
+        self._publish(Delta(self.seq, player, event.row, event.col, event.kind, ship,
+                            None if engine.finished else engine.turn, engine.winner))
+        if self._next_snapshot and self.seq >= self._next_snapshot and not engine.finished:
+            # A salvo may step over the interval's multiple; the snapshot follows its last shot
+            self._next_snapshot = self._snapshot_after(self.seq)
+            self._publish(self.snapshot())
+
+    def close(self):
+        """End the feed; subscribers get what is queued, then their iteration stops"""
+        if self.closed:
+            return
+        self.closed = True
+        self.engine.unsubscribe(self._on_event)
+        for spectator in self._spectators:
+            spectator._finish()
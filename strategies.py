@@ -0,0 +1,615 @@
+"""
+Computer shooting strategies for the Battleship game.
+
+Strategies only read what a real opponent would know about the target board:
+which cells have been shot, which shots were hits, and which ships have been
+sunk (a sunk ship's cells are treated as revealed).
+
+Every strategy implements the Strategy protocol - choose_shot, choose_salvo,
+observe and reset - and is registered by name in STRATEGIES. A ComputerPlayer drives one
+strategy for one side of a game, timing every decision and, with a deadline,
+answering with a random unshot cell whenever the strategy takes too long.
+"""
+
+import math
+import random
+import time
+from array import array
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait
+from concurrent.futures import TimeoutError as FutureTimeout
+from typing import Dict, List, Optional, Tuple
+
+from engine import MISS, SUNK
+from placement import placement_table
+
+
+class Strategy:
+    """Base class of the shooting strategies
+
+    A strategy is created with (board_size, ships_config, rng=...) and is
+    asked for one shot at a time on the same target board. observe() reports
+    the result of each shot as it is resolved; strategies may also read the
+    board itself, which holds only what an opponent could know. reset()
+    forgets the target board, and close() releases any worker processes.
+    """
+    def __init__(self, board_size: int, ships_config: List[Tuple[str, int]], rng=random):
+        self.board_size = board_size
+        self.rng = rng
+
+    def choose_shot(self, board) -> Tuple[int, int]:
+        """Pick the next cell to fire at on the target board"""
+        raise NotImplementedError
+
+    def choose_salvo(self, board, count: int) -> List[Tuple[int, int]]:
+        """Pick `count` distinct unshot cells to fire at together
+
+        By default choose_shot picks the first cell and the rest are random;
+        strategies that rank cells do better by taking their best `count`.
+        """
+        first = self.choose_shot(board)
+        return [first] + board.target_pool().sample(count - 1, self.rng, exclude=(first,))
+
+    def observe(self, row: int, col: int, result: str, ship=None):
+        """Result (engine.MISS, HIT or SUNK) of a shot at the target board"""
+
+    def reset(self):
+        """Forget everything about the target board"""
+
+    def close(self):
+        """Release resources held by the strategy"""
+
+
+class RandomStrategy(Strategy):
+    """Fires at a uniformly random unshot cell"""
+    def choose_shot(self, board) -> Tuple[int, int]:
+        return board.target_pool().choose(self.rng)
+
+    def choose_salvo(self, board, count: int) -> List[Tuple[int, int]]:
+        return board.target_pool().sample(count, self.rng)
+
+
+class DensityStrategy(Strategy):
+    """Hunt/target strategy that fires at the cell most likely to hold a ship
+
+    For every unshot cell it counts how many legal placements of the ships
+    still afloat cover that cell. In hunt mode it fires at the cell with the
+    highest count; once there are hits on ships that aren't sunk yet, only
+    placements through those hits are counted. Counts are kept per ship size
+    and updated incrementally: a miss or a sunk ship only removes the
+    placements that pass through the affected cells. Ties are broken with
+    `rng`.
+    """
+    def __init__(self, board_size: int, ships_config: List[Tuple[str, int]], rng=random):
+        super().__init__(board_size, ships_config, rng)
+        self.ship_sizes = [size for _, size in ships_config]
+        self.reset()
+
+    def reset(self):
+        """Forget everything about the target board"""
+        n_cells = self.board_size * self.board_size
+        self.remaining: Dict[int, int] = {}
+        for size in self.ship_sizes:
+            self.remaining[size] = self.remaining.get(size, 0) + 1
+
+        self.placements = {size: placement_table(self.board_size, size).cells for size in self.remaining}
+        self.alive = {size: bytearray([1]) * len(placements)
+                      for size, placements in self.placements.items()}
+        self.coverage = {size: [0] * n_cells for size in self.remaining}
+        self.cell_placements: List[List[Tuple[int, int]]] = [[] for _ in range(n_cells)]
+        for size, placements in self.placements.items():
+            coverage = self.coverage[size]
+            for index, cells in enumerate(placements):
+                for cell in cells:
+                    coverage[cell] += 1
+                    self.cell_placements[cell].append((size, index))
+
+        self.shot = bytearray(n_cells)
+        self.blocked = bytearray(n_cells)  # Misses and cells of sunk ships
+        self.unresolved = set()  # Hits on ships that are still afloat
+        self.seen_shots = set()
+        self.seen_sunk = set()
+
+    def _block(self, cell: int):
+        """Rule out every placement that passes through a cell"""
+        if self.blocked[cell]:
+            return
+        self.blocked[cell] = 1
+        for size, index in self.cell_placements[cell]:
+            alive = self.alive[size]
+            if alive[index]:
+                alive[index] = 0
+                coverage = self.coverage[size]
+                for covered in self.placements[size][index]:
+                    coverage[covered] -= 1
+
+    def _sink(self, ship):
+        self.seen_sunk.add(id(ship))
+        if self.remaining.get(ship.size):
+            self.remaining[ship.size] -= 1
+        for row, col in ship.positions:
+            cell = row * self.board_size + col
+            self.unresolved.discard(cell)
+            self._block(cell)
+
+    def observe(self, row: int, col: int, result: str, ship=None):
+        """Apply one shot as it is resolved, sparing _sync a pass over the board"""
+        if (row, col) in self.seen_shots:
+            return
+        self.seen_shots.add((row, col))
+        cell = row * self.board_size + col
+        self.shot[cell] = 1
+        if result == MISS:
+            self._block(cell)
+        else:
+            self.unresolved.add(cell)
+            if result == SUNK and id(ship) not in self.seen_sunk:
+                self._sink(ship)
+
+    def _sync(self, board):
+        """Apply shots and sinkings on the board that haven't been seen yet"""
+        if len(board.shots_fired) != len(self.seen_shots):
+            new_shots = board.shots_fired - self.seen_shots
+            hits = board.hits
+            for row, col in new_shots:
+                cell = row * self.board_size + col
+                self.shot[cell] = 1
+                if (row, col) in hits:
+                    self.unresolved.add(cell)
+                else:
+                    self._block(cell)
+            self.seen_shots |= new_shots
+
+        for ship in board.ships:
+            if id(ship) not in self.seen_sunk and ship.is_sunk():
+                self._sink(ship)
+
+    def _target(self) -> List[int]:
+        """Best cells next to unresolved hits"""
+        scores: Dict[int, int] = {}
+        counted = set()
+        for hit in self.unresolved:
+            for size, index in self.cell_placements[hit]:
+                if not self.alive[size][index] or not self.remaining[size] or (size, index) in counted:
+                    continue
+                counted.add((size, index))
+                cells = self.placements[size][index]
+                covered_hits = sum(1 for cell in cells if cell in self.unresolved)
+                weight = self.remaining[size] * covered_hits * covered_hits
+                for cell in cells:
+                    if not self.shot[cell]:
+                        scores[cell] = scores.get(cell, 0) + weight
+        if not scores:
+            return []
+        best = max(scores.values())
+        return [cell for cell, score in scores.items() if score == best]
+
+    def _hunt(self) -> List[int]:
+        """Best cells by placement density of the ships afloat"""
+        active = [(count, self.coverage[size]) for size, count in self.remaining.items() if count]
+        best = 0
+        best_cells = []
+        shot = self.shot
+        for cell in range(len(shot)):
+            if shot[cell]:
+                continue
+            score = 0
+            for count, coverage in active:
+                score += count * coverage[cell]
+            if score > best:
+                best = score
+                best_cells = [cell]
+            elif score == best and best:
+                best_cells.append(cell)
+        return best_cells
+
+    def choose_shot(self, board) -> Tuple[int, int]:
+        """Pick the next cell to fire at on the target board"""
+        self._sync(board)
+        cells = (self._target() if self.unresolved else []) or self._hunt()
+        if not cells:
+            # No placement fits anywhere; fall back to any unshot cell
+            return board.target_pool().choose(self.rng)
+        return divmod(self.rng.choice(cells), self.board_size)
+
+    def choose_salvo(self, board, count: int) -> List[Tuple[int, int]]:
+        """Pick the best `count` cells, each chosen as if the ones before it were shot"""
+        self._sync(board)
+        shot = self.shot
+        chosen = []
+        try:
+            while len(chosen) < count:
+                cells = (self._target() if self.unresolved else []) or self._hunt()
+                if not cells:
+                    break
+                cell = self.rng.choice(cells)
+                shot[cell] = 1  # Pending: rules the cell out without telling whether it hits
+                chosen.append(cell)
+        finally:
+            for cell in chosen:
+                shot[cell] = 0
+        salvo = [divmod(cell, self.board_size) for cell in chosen]
+        if len(salvo) < count:
+            salvo += board.target_pool().sample(count - len(salvo), self.rng, exclude=salvo)
+        return salvo
+
+
+def _iter_bits(mask: int):
+    """Indices of the set bits of a mask"""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+def _sample_fleet(rng, sizes: List[int], free: Dict[int, List[int]],
+                  through: Dict[int, Dict[int, List[int]]], hits: int) -> Optional[int]:
+    """Occupancy mask of one fleet layout consistent with the observations
+
+    Ships are first anchored on the unresolved hits, then the rest are
+    placed anywhere they fit. Returns None if this attempt got stuck.
+    """
+    ships = list(sizes)
+    rng.shuffle(ships)
+    occupied = 0
+    uncovered = hits
+    while uncovered:
+        if not ships:
+            return None
+        cell = (uncovered & -uncovered).bit_length() - 1
+        size = ships.pop()
+        options = [mask for mask in through[cell][size] if not mask & occupied]
+        if not options:
+            return None
+        mask = rng.choice(options)
+        occupied |= mask
+        uncovered &= ~mask
+    for size in ships:
+        masks = free[size]
+        if not masks:
+            return None
+        # Every hit is covered by now, so avoiding occupied cells avoids hits
+        mask = masks[rng.randrange(len(masks))]
+        if mask & occupied:
+            options = [mask for mask in masks if not mask & occupied]
+            if not options:
+                return None
+            mask = rng.choice(options)
+        occupied |= mask
+    return occupied
+
+
+def _sample_occupancy(task: tuple) -> Tuple[List[int], int]:
+    """Sample layouts until a wall-clock deadline; returns (cell counts, samples)
+
+    Runs in worker processes as well as in the calling process, so the
+    deadline is an absolute time.time() value.
+    """
+    board_size, sizes, blocked, hits, deadline, seed, max_samples = task
+    rng = random.Random(seed)
+    n_cells = board_size * board_size
+    unknown = ((1 << n_cells) - 1) & ~(blocked | hits)
+
+    free = {}
+    for size in set(sizes):
+        free[size] = [mask for mask in placement_table(board_size, size).masks if not mask & blocked]
+    through = {cell: {size: [mask for mask in masks if mask >> cell & 1] for size, masks in free.items()}
+               for cell in _iter_bits(hits)}
+
+    counts = [0] * n_cells
+    samples = 0
+    clock = time.time
+    while samples < max_samples and clock() < deadline:
+        occupied = _sample_fleet(rng, sizes, free, through, hits)
+        if occupied is None:
+            continue
+        for cell in _iter_bits(occupied & unknown):
+            counts[cell] += 1
+        samples += 1
+    return counts, samples
+
+
+class MonteCarloStrategy(Strategy):
+    """Fires at the cell most often occupied in sampled fleet layouts
+
+    Each move samples layouts of the ships still afloat that avoid every miss
+    and sunk ship and cover every hit on ships still afloat, and fires at the
+    unshot cell occupied in the most samples. Ships are anchored on hits
+    first, so the samples approximate the posterior rather than draw from it
+    exactly. Sampling runs in this process and on a pool of `workers`
+    processes until the per-move `time_budget` (seconds) runs out; results
+    that arrive late are dropped. More cores mean more samples per move.
+    """
+    def __init__(self, board_size: int, ships_config: List[Tuple[str, int]],
+                 time_budget: float = 0.05, workers: int = 0, max_samples: int = 100000,
+                 rng=random):
+        super().__init__(board_size, ships_config, rng)
+        self.ships_config = list(ships_config)
+        self.time_budget = time_budget
+        self.workers = workers
+        self.max_samples = max_samples
+        self.last_samples = 0
+        self._pool = None
+        self._fallback = DensityStrategy(board_size, ships_config, rng)
+
+    def reset(self):
+        """Forget everything about the target board"""
+        self._fallback.reset()
+        self.last_samples = 0
+
+    def close(self):
+        """Shut down the worker pool"""
+        if self._pool is not None:
+            self._pool.shutdown(wait=False)
+            self._pool = None
+
+    def _observe(self, board) -> Tuple[List[int], int, int]:
+        """(sizes afloat, blocked mask, unresolved hits mask) for a board"""
+        size = self.board_size
+        sizes = [ship_size for _, ship_size in self.ships_config]
+        blocked = 0
+        for row, col in board.misses:
+            blocked |= 1 << (row * size + col)
+        hits = 0
+        for row, col in board.hits:
+            hits |= 1 << (row * size + col)
+        for ship in board.ships:
+            if ship.is_sunk():
+                if ship.size in sizes:
+                    sizes.remove(ship.size)
+                for row, col in ship.positions:
+                    bit = 1 << (row * size + col)
+                    blocked |= bit
+                    hits &= ~bit
+        return sizes, blocked, hits
+
+    def _occupancy(self, board) -> Tuple[List[int], int]:
+        """Occupancy counts of sampled layouts within the time budget, and the number of samples"""
+        deadline = time.time() + self.time_budget
+        sizes, blocked, hits = self._observe(board)
+        per_process = max(1, self.max_samples // (self.workers + 1))
+
+        futures = []
+        if self.workers > 0:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.workers)
+            futures = [self._pool.submit(_sample_occupancy, (self.board_size, sizes, blocked, hits,
+                                                             deadline, self.rng.getrandbits(64), per_process))
+                       for _ in range(self.workers)]
+
+        counts, samples = _sample_occupancy((self.board_size, sizes, blocked, hits,
+                                             deadline, self.rng.getrandbits(64), per_process))
+        if futures:
+            done, _ = wait(futures, timeout=max(0.0, deadline - time.time()) + 0.005)
+            for future in done:
+                worker_counts, worker_samples = future.result()
+                counts = [a + b for a, b in zip(counts, worker_counts)]
+                samples += worker_samples
+            for future in futures:
+                future.cancel()
+        return counts, samples
+
+    def choose_shot(self, board) -> Tuple[int, int]:
+        """Pick the next cell to fire at on the target board"""
+        counts, samples = self._occupancy(board)
+        self.last_samples = samples
+        best = max(counts) if samples else 0
+        if not best:
+            # No usable samples in time; fall back to the density strategy
+            return self._fallback.choose_shot(board)
+        cells = [cell for cell, count in enumerate(counts) if count == best]
+        return divmod(self.rng.choice(cells), self.board_size)
+
+    def choose_salvo(self, board, count: int) -> List[Tuple[int, int]]:
+        """Pick the `count` cells occupied in the most samples, from one round of sampling"""
+        counts, samples = self._occupancy(board)
+        self.last_samples = samples
+        rng = self.rng
+        ranked = sorted((cell for cell, occupied in enumerate(counts) if occupied),
+                        key=lambda cell: (-counts[cell], rng.random()))
+        salvo = [divmod(cell, self.board_size) for cell in ranked[:count]]
+        if len(salvo) < count:
+            # Too few sampled cells; the density strategy picks the rest
+            salvo += [cell for cell in self._fallback.choose_salvo(board, count) if cell not in salvo]
+        return salvo[:count]
+
+
+# Shooting strategies by name; register_strategy adds more
+STRATEGIES: Dict[str, type] = {
+    "random": RandomStrategy,
+    "density": DensityStrategy,
+    "montecarlo": MonteCarloStrategy,
+}
+
+
+def register_strategy(name: str, strategy_class: type) -> type:
+    """Make a Strategy subclass available to games by name"""
+    if not (isinstance(strategy_class, type) and issubclass(strategy_class, Strategy)):
+        raise ValueError(f"Not a Strategy subclass: {strategy_class!r}")
+    STRATEGIES[name] = strategy_class
+    return strategy_class
+
+
+class LatencyStats:
+    """Decision times of one computer side, as a histogram of log-spaced buckets
+
+    Buckets are an eighth of a doubling (about 9%) wide, so percentiles are
+    that precise and the memory used stays small however many moves are
+    recorded.
+    """
+    BUCKETS_PER_DOUBLING = 8
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.fallbacks = 0  # Moves made for the strategy because it missed the deadline
+        self.buckets: Dict[int, int] = {}
+
+    def record(self, times):
+        """Add decision times (seconds)"""
+        buckets = self.buckets
+        scale = self.BUCKETS_PER_DOUBLING
+        log2 = math.log2
+        for seconds in times:
+            # Bucket 0 holds everything up to a nanosecond
+            bucket = int(log2(seconds * 1e9) * scale) + 1 if seconds > 1e-9 else 0
+            buckets[bucket] = buckets.get(bucket, 0) + 1
+        if times:
+            self.count += len(times)
+            self.total += sum(times)
+            self.max = max(self.max, max(times))
+
+    def merge(self, other: "LatencyStats"):
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+        self.fallbacks += other.fallbacks
+        for bucket, count in other.buckets.items():
+            self.buckets[bucket] = self.buckets.get(bucket, 0) + count
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, p: float) -> float:
+        """Decision time in seconds at percentile p (0-100), rounded up to its bucket"""
+        if not self.count:
+            return 0.0
+        threshold = self.count * p / 100.0
+        seen = 0
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if seen >= threshold:
+                return min(self.max, 2 ** (bucket / self.BUCKETS_PER_DOUBLING) / 1e9)
+        return self.max
+
+    @property
+    def p50(self) -> float:
+        return self.percentile(50)
+
+    @property
+    def p99(self) -> float:
+        return self.percentile(99)
+
+    def to_dict(self) -> dict:
+        return {
+            "moves": self.count,
+            "mean_us": self.mean * 1e6,
+            "p50_us": self.p50 * 1e6,
+            "p99_us": self.p99 * 1e6,
+            "max_us": self.max * 1e6,
+            "fallbacks": self.fallbacks,
+        }
+
+    def summary(self) -> str:
+        text = f"p50 {self.p50 * 1e6:.0f}us, p99 {self.p99 * 1e6:.0f}us, max {self.max * 1e6:.0f}us"
+        if self.fallbacks:
+            text += f", {self.fallbacks} deadline fallbacks"
+        return text
+
+
+_clock = time.perf_counter
+
+
+class ComputerPlayer:
+    """One computer side: a strategy, the board it shoots at and its decision times
+
+    Without a deadline the strategy is called directly. With a deadline
+    (seconds) it runs on a worker thread; when it has not answered in time
+    the move is a random unshot cell instead, so a slow strategy never holds
+    up the game by more than the deadline (plus the interpreter's thread
+    switch interval). The late decision is left to finish in the background
+    and thrown away, and the strategy is reset before its next move since it
+    may have read the board while it changed; until then the side keeps
+    playing random moves.
+    """
+    def __init__(self, strategy: Strategy, deadline: Optional[float] = None):
+        if deadline is not None and deadline <= 0:
+            raise ValueError("The deadline must be positive")
+        self.strategy = strategy
+        self.deadline = deadline
+        self._latency = LatencyStats()
+        self._times = array("d")  # Decision times not yet added to _latency
+        self.fallbacks = 0
+        self.target = None
+        self.opening = None  # Optional book line with next_shot(board), tried before the strategy
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._late = None  # Future of a decision that missed the deadline
+        self._decide = strategy.choose_shot if deadline is None else self._choose_within_deadline
+        if deadline is not None and getattr(strategy, "time_budget", None) is not None:
+            # Strategies that manage their own thinking time aim to finish well within the deadline
+            strategy.time_budget = min(strategy.time_budget, deadline * 0.8)
+
+    def start(self, target, opening=None):
+        """Shoot at a new target board from now on"""
+        if self.target is not None:
+            self.strategy.reset()
+        self.target = target
+        self.opening = opening
+
+    @property
+    def latency(self) -> LatencyStats:
+        """Decision times so far"""
+        if self._times:
+            self._latency.record(self._times)
+            self._times = array("d")
+        self._latency.fallbacks = self.fallbacks
+        return self._latency
+
+    def observe(self, row: int, col: int, result: str, ship=None):
+        if self._late is None:
+            self.strategy.observe(row, col, result, ship)
+
+    def choose_shot(self, board) -> Tuple[int, int]:
+        """The strategy's shot at the target board, timed"""
+        start = _clock()
+        shot = self.opening.next_shot(board) if self.opening is not None else None
+        if shot is None:
+            shot = self._decide(board)
+        self._times.append(_clock() - start)
+        return shot
+
+    def choose_salvo(self, board, count: int) -> List[Tuple[int, int]]:
+        """The strategy's salvo of `count` cells at the target board, timed as one decision
+
+        Opening books hold single shots, so salvos are always the strategy's own.
+        """
+        start = _clock()
+        if self.deadline is None:
+            salvo = self.strategy.choose_salvo(board, count)
+        else:
+            salvo = self._choose_within_deadline(board, count)
+        self._times.append(_clock() - start)
+        return salvo
+
+    def _fallback(self, board, count: Optional[int] = None):
+        self.fallbacks += 1
+        if count is None:
+            return board.target_pool().choose(self.strategy.rng)
+        return board.target_pool().sample(count, self.strategy.rng)
+
+    def _choose_within_deadline(self, board, count: Optional[int] = None):
+        """choose_shot, or choose_salvo of `count` cells, within the deadline"""
+        if self._late is not None:
+            if not self._late.done():
+                return self._fallback(board, count)
+            self._late = None
+            self.strategy.reset()
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1)
+        if count is None:
+            future = self._executor.submit(self.strategy.choose_shot, board)
+        else:
+            future = self._executor.submit(self.strategy.choose_salvo, board, count)
+        try:
+            return future.result(timeout=self.deadline)
+        except FutureTimeout:
+            self._late = future
+            return self._fallback(board, count)
+
+    def close(self):
+        """Release the strategy's resources and the deadline thread"""
+        self.strategy.close()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
@@ -3,7 +3,33 @@
 Test script for Battleship game core functionality
 """
 
-from battleship import BattleshipGame, Board, Ship
+import asyncio
+import io
+import json
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+
+from battleship import DEFAULT_SHIPS_CONFIG, BattleshipGame, BitBoard, Board, Ship, SparseBoard, TargetPool
+from coordinates import column_label, format_coordinate, parse_coordinate
+from engine import GAME_OVER, HIT, MISS, SALVO_SHIPS, SUNK, GameEngine
+from evaluate import compare_strategies, format_report
+from export import chunk_path, export_games, iter_games
+from heatmaps import HeatmapStore
+from openings import OpeningBook, OpeningLine, board_symmetries, book_path, get_opening_book
+from placement import draw_fleet, placement_table, sample_uniform_fleet, solve_fleet
+from renderer import TerminalRenderer
+from server import BattleshipServer
+from sessions import SessionStore, decode_game, encode_game
+from profiling import PhaseProfiler
+from seeding import FastRandom, game_seed
+from spectator import Snapshot, SpectatorFeed
+from strategies import (STRATEGIES, ComputerPlayer, DensityStrategy, LatencyStats, Strategy,
+                        register_strategy)
+from simulator import SimulationStats, play_headless_game, replay_game, simulate
+from transcript import TranscriptReader, TranscriptWriter, resume_game
 
 def test_ship_placement():
     """Test automatic ship placement"""
@@ -22,6 +48,27 @@ def test_ship_placement():
     
     return success
 
+def test_placement_tables():
+    """Test precomputed placement tables and fleet samplers"""
+    print("\nTesting placement tables...")
+    # A ship of size 3 fits 8 ways per row and per column on a 10x10 board
+    assert len(placement_table(10, 3)) == 160
+    assert placement_table(10, 3) is placement_table(10, 3)
+    
+    # Four size 4 ships fill a 4x4 board completely
+    dense_fleet = [("Battleship", 4)] * 4
+    for layout in (draw_fleet(4, dense_fleet), sample_uniform_fleet(4, dense_fleet)):
+        cells = [cell for positions in layout for cell in positions]
+        assert len(set(cells)) == 16
+    
+    game = BattleshipGame()
+    board = Board()
+    assert game.auto_place_ships(board, uniform=True)
+    assert len(board.ships) == len(game.ships_config)
+    print("✅ Placement tables and samplers work")
+    
+    return True
+
 def test_shot_mechanics():
     """Test shot mechanics"""
     print("\nTesting shot mechanics...")
@@ -44,6 +91,228 @@ def test_shot_mechanics():
     
     return True
 
+def test_bitboard_matches_board():
+    """Test that the bitboard backend resolves shots like Board"""
+    print("\nTesting bitboard backend...")
+    boards = [Board(), BitBoard()]
+    
+    for board in boards:
+        assert board.place_ship(Ship("Cruiser", 3), [(2, 2), (2, 3), (2, 4)])
+        assert not board.is_valid_placement([(2, 4), (3, 4)])  # Overlap
+        assert not board.is_valid_placement([(9, 9), (9, 10)])  # Off the board
+    
+    for row, col in [(2, 2), (5, 5), (2, 3), (2, 3), (2, 4)]:
+        results = [board.receive_shot(row, col) for board in boards]
+        assert results[0][0] == results[1][0]
+    
+    assert boards[0].shots_fired == boards[1].shots_fired
+    assert boards[0].hits == boards[1].hits
+    assert boards[0].misses == boards[1].misses
+    assert boards[0].grid == boards[1].grid
+    assert boards[1].all_ships_sunk()
+    print("✅ Bitboard matches grid board")
+    
+    return True
+
+def test_ship_index_and_sunk_counter():
+    """Test constant-time hit lookup and game over detection"""
+    print("\nTesting ship index and sunk counter...")
+    for board in (Board(), BitBoard()):
+        destroyer = Ship("Destroyer", 2)
+        submarine = Ship("Submarine", 3)
+        board.place_ship(destroyer, [(0, 0), (0, 1)])
+        board.place_ship(submarine, [(4, 4), (5, 4), (6, 4)])
+        assert board.ships_afloat == 2
+        
+        assert board.receive_shot(5, 4) == (True, submarine)
+        assert board.receive_shot(0, 0) == (True, destroyer)
+        assert board.receive_shot(0, 1) == (True, destroyer)
+        assert board.ships_afloat == 1
+        assert not board.all_ships_sunk()
+        
+        # Repeated shots don't sink anything twice
+        board.receive_shot(0, 1)
+        assert board.ships_afloat == 1
+        
+        board.receive_shot(4, 4)
+        board.receive_shot(6, 4)
+        assert board.all_ships_sunk()
+    print("✅ Ships sunk tracked correctly")
+    
+    return True
+
+def test_monte_carlo_strategy():
+    """Test the Monte Carlo sampling strategy and its time budget"""
+    print("\nTesting Monte Carlo strategy...")
+    options = {"time_budget": 0.002}
+    game = BattleshipGame(strategy="montecarlo", strategy_options=options)
+    board = game.player_board
+    board.place_ship(Ship("Destroyer", 2), [(5, 5), (5, 6)])
+    board.receive_shot(5, 5)
+    assert game.get_computer_shot() in [(4, 5), (6, 5), (5, 4), (5, 6)]
+    
+    game = BattleshipGame(strategy="montecarlo", strategy_options=options)
+    board = game.player_board
+    assert game.auto_place_ships(board)
+    slowest = 0.0
+    shots = 0
+    while not board.all_ships_sunk():
+        start = time.perf_counter()
+        row, col = game.get_computer_shot()
+        slowest = max(slowest, time.perf_counter() - start)
+        board.receive_shot(row, col)
+        shots += 1
+    print(f"✅ Sank the fleet in {shots} shots, slowest move {slowest * 1000:.1f} ms")
+    assert slowest < 0.05
+    
+    return True
+
+def test_target_pool():
+    """Test the pool of unshot cells used for random computer shots"""
+    print("\nTesting target pool...")
+    pool = TargetPool(3, shots_fired=[(0, 0)])
+    assert len(pool) == 8 and (0, 0) not in pool
+    pool.remove(1, 1)
+    pool.remove(1, 1)
+    assert len(pool) == 7 and (1, 1) not in pool
+    
+    for board_class in (Board, BitBoard):
+        game = BattleshipGame(board_class)
+        board = game.player_board
+        board.receive_shot(4, 4)
+        seen = set()
+        for _ in range(board.size * board.size - 1):
+            row, col = game.get_computer_shot()
+            assert (row, col) not in seen and (row, col) != (4, 4)
+            seen.add((row, col))
+            board.receive_shot(row, col)
+        assert len(board.target_pool()) == 0
+    print("✅ Every cell shot exactly once")
+    
+    return True
+
+def test_density_strategy():
+    """Test the probability-density computer strategy"""
+    print("\nTesting density strategy...")
+    game = BattleshipGame(strategy="density")
+    board = game.player_board
+    assert game.auto_place_ships(board)
+    
+    shots = 0
+    while not board.all_ships_sunk():
+        row, col = game.get_computer_shot()
+        assert not board.has_been_shot(row, col)
+        board.receive_shot(row, col)
+        shots += 1
+    print(f"✅ Density strategy sank the fleet in {shots} shots")
+    
+    # Every unshot neighbour of a lone hit is a candidate; nothing else is
+    game = BattleshipGame(strategy="density")
+    board = game.player_board
+    board.place_ship(Ship("Destroyer", 2), [(5, 5), (5, 6)])
+    board.receive_shot(5, 5)
+    assert game.get_computer_shot() in [(4, 5), (6, 5), (5, 4), (5, 6)]
+    
+    return True
+
+def test_large_sparse_board():
+    """Test multi-letter coordinates and sparse 1000x1000 boards"""
+    print("\nTesting large sparse boards...")
+    assert [column_label(col) for col in (0, 25, 26, 701, 702)] == ["A", "Z", "AA", "ZZ", "AAA"]
+    assert parse_coordinate("ab120", board_size=1000) == (120, 27)
+    assert format_coordinate(999, 999) == "ALL999"
+    assert parse_coordinate("ALL999") == (999, 999)
+    for bad in ("5A", "A", "AB-1", "ALM999"):
+        try:
+            parse_coordinate(bad, board_size=1000)
+            assert False, f"{bad} should not parse"
+        except ValueError:
+            pass
+    
+    game = BattleshipGame(board_size=1000)
+    board = game.player_board
+    assert isinstance(board, SparseBoard)
+    assert game.auto_place_ships(board)
+    assert len(board.ship_at) == sum(size for _, size in game.ships_config)
+    
+    for _ in range(200):
+        row, col = game.get_computer_shot()
+        board.receive_shot(row, col)
+    assert len(board.shots_fired) == 200
+    assert len(board.target_pool()) == 1000 * 1000 - 200
+    
+    # Sinking the whole fleet only takes shots at the ships
+    for row, col in list(board.ship_at):
+        board.receive_shot(row, col)
+    assert board.all_ships_sunk()
+    print("✅ Sparse board works at 1000x1000")
+    
+    return True
+
+def test_batch_engine_matches_board():
+    """Test that the lockstep batch engine resolves shots like Board"""
+    print("\nTesting vectorized batch engine...")
+    try:
+        import numpy as np
+        from batch_engine import BatchEngine
+    except ImportError:
+        print("⚠️  NumPy not installed, skipping")
+        return True
+    
+    rng = np.random.default_rng(3)
+    engine = BatchEngine.random_fleets(50, rng=rng)
+    boards = [engine.to_board(game) for game in range(engine.n_games)]
+    assert all(len(board.ships) == 5 for board in boards)
+    
+    order = np.argsort(rng.random(engine.shots.shape), axis=1)
+    for step in range(order.shape[1]):
+        cells = order[:, step]
+        hit, ship, sunk = engine.fire(cells // 10, cells % 10)
+        for game, board in enumerate(boards):
+            board_hit, board_ship = board.receive_shot(*divmod(int(cells[game]), 10))
+            assert hit[game] == board_hit
+            if board_hit:
+                assert board.ships[ship[game]] is board_ship
+                assert sunk[game] == board_ship.is_sunk()
+            assert engine.all_ships_sunk()[game] == board.all_ships_sunk()
+    print("✅ Batch engine matches Board shot by shot")
+    
+    shots = BatchEngine.random_fleets(200, rng=rng).play_random(rng)
+    assert shots.min() >= 17 and shots.max() <= 100
+    
+    return True
+
+def test_incremental_renderer():
+    """Test that the terminal renderer only redraws changed lines"""
+    print("\nTesting incremental renderer...")
+    game = BattleshipGame()
+    game.auto_place_ships(game.player_board)
+    game.auto_place_ships(game.computer_board)
+    stream = io.StringIO()
+    renderer = TerminalRenderer(stream, max_fps=None)
+    
+    renderer.render(game.player_board, game.computer_board)
+    first_frame = stream.getvalue()
+    stream.seek(0)
+    stream.truncate()
+    
+    game.computer_board.receive_shot(3, 3)
+    renderer.render(game.player_board, game.computer_board)
+    update = stream.getvalue()
+    print(f"Full frame: {len(first_frame)} chars, update: {len(update)} chars")
+    
+    # Only the target board row for the shot changed
+    assert update.count("\033[K") == 1
+    assert len(update) < len(first_frame) // 5
+    
+    # Frames faster than the cap are dropped unless forced
+    renderer = TerminalRenderer(io.StringIO(), max_fps=1)
+    assert renderer.render(game.player_board, game.computer_board)
+    assert not renderer.render(game.player_board, game.computer_board)
+    assert renderer.render(game.player_board, game.computer_board, force=True)
+    
+    return True
+
 def test_game_initialization():
     """Test game initialization"""
     print("\nTesting game initialization...")
@@ -57,6 +326,935 @@ def test_game_initialization():
     
     return True
 
+def test_strategy_evaluation():
+    """Test the strategy comparison harness"""
+    print("\nTesting strategy evaluation...")
+    report = compare_strategies(["random", "density"], n_games=10, seed=5)
+    print(format_report(report))
+    
+    random_result, density_result = report["results"]
+    for result in report["results"]:
+        shots = result["shots"]
+        assert result["games"] == 10
+        assert 17 <= shots["min"] <= shots["median"] <= shots["p95"] <= shots["max"] <= 100
+        assert shots["ci95"][0] <= shots["mean"] <= shots["ci95"][1]
+    assert density_result["shots"]["mean"] < random_result["shots"]["mean"]
+    
+    # The same seed evaluates against the same layouts, without touching the global generator
+    state = random.getstate()
+    again = compare_strategies(["random"], n_games=10, seed=5)
+    assert again["results"][0]["shots"] == random_result["shots"]
+    assert random.getstate() == state
+    
+    return True
+
+def test_headless_simulation():
+    """Test headless computer vs computer simulation"""
+    print("\nTesting headless simulation...")
+    stats = simulate(20, seed=7, workers=1)
+    print(f"Played {stats.n_games} games, computer 1 won {stats.wins[1]}")
+    print(f"Mean shots to win: {stats.mean_shots:.1f}")
+    
+    assert stats.n_games == 20
+    assert stats.wins[1] + stats.wins[2] == 20
+    assert sum(stats.shots_histogram.values()) == 20
+    
+    # Same seed gives the same games
+    again = simulate(20, seed=7, workers=1)
+    assert again.shots_histogram == stats.shots_histogram
+    
+    return True
+
+def test_game_engine():
+    """Test the event-driven game engine"""
+    print("\nTesting game engine...")
+    player_board = Board(5)
+    computer_board = Board(5)
+    player_board.place_ship(Ship("Destroyer", 2), [(0, 0), (0, 1)])
+    computer_board.place_ship(Ship("Destroyer", 2), [(2, 2), (3, 2)])
+    engine = GameEngine((player_board, computer_board))
+    seen = []
+    engine.subscribe(seen.append)
+    
+    events = engine.apply_shot(0, 2, 2)
+    assert [event.kind for event in events] == [HIT]
+    assert events[0].ship.name == "Destroyer" and engine.turn == 1
+    
+    # Illegal shots raise and leave the game unchanged
+    for player, row, col in [(0, 1, 1), (1, 5, 0)]:
+        try:
+            engine.apply_shot(player, row, col)
+            assert False, "Illegal shot accepted"
+        except ValueError:
+            pass
+    assert engine.turn == 1 and len(player_board.shots_fired) == 0
+    
+    assert [event.kind for event in engine.apply_shot(1, 4, 4)] == [MISS]
+    events = engine.apply_shot(0, 3, 2)
+    assert [event.kind for event in events] == [SUNK, GAME_OVER]
+    assert engine.finished and engine.winner == 0 and engine.shots == [2, 1]
+    assert [event.kind for event in seen] == [HIT, MISS, SUNK, GAME_OVER]
+    
+    try:
+        engine.apply_shot(1, 0, 0)
+        assert False, "Shot accepted after the game ended"
+    except ValueError:
+        pass
+    print("Engine events:", [event.kind for event in seen])
+    
+    return True
+
+def test_game_transcript():
+    """Test recording, replaying and resuming game transcripts"""
+    print("\nTesting game transcripts...")
+    path = os.path.join(tempfile.mkdtemp(), "games.bst")
+    game = BattleshipGame()
+    game.game_mode = "computer_vs_computer"
+    game.transcript = TranscriptWriter(path)
+    assert game._place_fleets("Computer 1", "Computer 2")
+    engine = game.start_engine()
+    for _ in range(31):
+        engine.apply_shot(engine.turn, *game.get_computer_shot(engine.target_of(engine.turn)))
+    
+    # An unfinished game can be read back while it is being written
+    with TranscriptReader(path) as reader:
+        assert len(reader) == 1
+        record = reader[0]
+        assert not record.finished and record.shot_count == 31
+        player, computer = record.boards_at()
+        assert player.shots_fired == game.player_board.shots_fired
+        assert computer.shots_fired == game.computer_board.shots_fired
+        assert computer.hits == game.computer_board.hits
+        first_board, row, col, _ = next(record.shots())
+        assert first_board == 1
+        print(f"Recorded {record.shot_count} shots, {os.path.getsize(path)} bytes")
+    
+    # Simulate a crash that left half a shot record behind
+    with open(path, "ab") as f:
+        f.write(b"\x01\x02")
+    resumed = resume_game(path)
+    assert resumed.game_mode == "computer_vs_computer"
+    assert resumed.computer_board.shots_fired == game.computer_board.shots_fired
+    engine = resumed.start_engine()
+    assert engine.turn == 1 and engine.shots == [16, 15]
+    engine.apply_shot(1, *resumed.get_computer_shot(resumed.player_board))
+    resumed.transcript.close()
+    
+    with TranscriptReader(path) as reader:
+        record = reader[0]
+        assert record.finished and record.shot_count == 32
+        player, _ = record.boards_at()
+        assert player.shots_fired == resumed.player_board.shots_fired
+        # Replaying stops at any earlier turn
+        player, computer = record.boards_at(10)
+        assert len(player.shots_fired) + len(computer.shots_fired) == 10
+    
+    # A game played to its end is rebuilt with its winner and not resumed
+    game = BattleshipGame()
+    game.game_mode = "computer_vs_computer"
+    game.transcript = TranscriptWriter(path)
+    assert game._place_fleets("Computer 1", "Computer 2")
+    engine = game.start_engine()
+    while not engine.finished:
+        engine.apply_shot(engine.turn, *game.get_computer_shot(engine.target_of(engine.turn)))
+    game.transcript.close()
+    try:
+        resume_game(path)
+        assert False, "Resumed a finished game"
+    except ValueError:
+        pass
+    with TranscriptReader(path) as reader:
+        rebuilt = reader[len(reader) - 1].to_game().start_engine()
+    assert rebuilt.finished and rebuilt.winner == engine.winner
+    
+    return True
+
+def test_game_server():
+    """Test concurrent matches on the network game server"""
+    print("\nTesting network game server...")
+    
+    async def command(reader, writer, line):
+        writer.write(line.encode() + b"\n")
+        return (await asyncio.wait_for(reader.readline(), 5)).decode().split()
+    
+    async def until(reader, word):
+        while True:
+            line = (await asyncio.wait_for(reader.readline(), 5)).decode().split()
+            if line[0] in (word, "GAMEOVER"):
+                return line
+    
+    async def play_computer(port):
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        await reader.readline()
+        assert await command(reader, writer, "FIRE A0") == ["ERR", "Not", "playing", "a", "match"]
+        assert (await command(reader, writer, "NEW density"))[2:] == ["SEAT", "0"]
+        cells = [(row, col) for row in range(10) for col in range(10)]
+        line = await until(reader, "TURN")
+        while line[0] != "GAMEOVER":
+            if line[1] == "0":
+                writer.write(f"FIRE {format_coordinate(*cells.pop())}\n".encode())
+            line = await until(reader, "TURN")
+        # The connection stays usable after the match is over
+        assert await command(reader, writer, "BOARD") == ["BOARD", "10"]
+        for _ in range(10):
+            await reader.readline()
+        assert await command(reader, writer, "FIRE A0") == ["ERR", "Game", "is", "over"]
+        assert (await command(reader, writer, "NEW"))[2:] == ["SEAT", "0"]
+        writer.close()
+        return int(line[1])
+    
+    async def watch_bots(port):
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        await reader.readline()
+        assert (await command(reader, writer, "BOTS"))[2] == "WATCH"
+        line = await until(reader, "GAMEOVER")
+        assert (await command(reader, writer, "NEW"))[2:] == ["SEAT", "0"]
+        writer.close()
+        return int(line[1])
+    
+    async def play_two_player(port):
+        host = await asyncio.open_connection("127.0.0.1", port)
+        guest = await asyncio.open_connection("127.0.0.1", port)
+        await host[0].readline()
+        await guest[0].readline()
+        match_id = (await command(*host, "HOST"))[1]
+        assert await command(*guest, f"JOIN {match_id}") == ["MATCH", match_id, "SEAT", "1"]
+        assert await until(host[0], "TURN") == ["TURN", "0"]
+        assert await until(guest[0], "TURN") == ["TURN", "0"]
+        assert await command(*guest, "FIRE A0") == ["ERR", "Not", "your", "turn"]
+        await command(*host, "FIRE B3")
+        assert (await until(guest[0], "SHOT"))[:3] == ["SHOT", "0", "B3"]
+        assert await until(guest[0], "TURN") == ["TURN", "1"]
+        host[1].close()
+        assert await until(guest[0], "OPPONENT") == ["OPPONENT", "LEFT"]
+        guest[1].close()
+        return True
+    
+    async def run():
+        server = BattleshipServer(port=0)
+        await server.start()
+        try:
+            results = await asyncio.gather(*[play_computer(server.port) for _ in range(20)],
+                                           *[watch_bots(server.port) for _ in range(20)],
+                                           play_two_player(server.port))
+        finally:
+            await server.close()
+        return results
+    
+    results = asyncio.run(run())
+    print(f"Played {len(results)} concurrent matches")
+    assert all(winner in (0, 1) for winner in results[:40])
+    assert results[40]
+    
+    return True
+
+def test_profiling_hooks():
+    """Test per-phase profiling and that it leaves no hooks behind"""
+    print("\nTesting profiling hooks...")
+    receive_shot = Board.receive_shot
+    path = os.path.join(tempfile.mkdtemp(), "run.pstats")
+    
+    with PhaseProfiler(path) as profiler:
+        assert Board.receive_shot is not receive_shot
+        winner, shots = play_headless_game(BattleshipGame())
+    print(profiler.summary())
+    
+    assert Board.receive_shot is receive_shot
+    assert profiler.calls["placement"] == 2
+    assert profiler.calls["shot selection"] == profiler.calls["receive shot"] >= shots
+    assert profiler.calls["rendering"] == 0
+    assert 0 < profiler.seconds["shot selection"] <= profiler.elapsed
+    assert os.path.getsize(path) > 0
+    
+    return True
+
+def test_memory_per_game():
+    """Test the memory held by in-progress games"""
+    print("\nTesting memory per in-progress game...")
+    
+    def bytes_per_game(board_class, n_games=200, shots=40):
+        BattleshipGame(board_class=board_class)  # Warm up shared tables
+        games = []
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        for _ in range(n_games):
+            game = BattleshipGame(board_class=board_class)  # Default game, with its own generator
+            game.auto_place_ships(game.player_board)
+            game.auto_place_ships(game.computer_board)
+            engine = game.start_engine()
+            for _ in range(shots):
+                engine.apply_shot(engine.turn, *game.get_computer_shot(engine.target_of(engine.turn)))
+            games.append(game)
+        used = tracemalloc.get_traced_memory()[0] - before
+        tracemalloc.stop()
+        return used / n_games
+    
+    grid_bytes = bytes_per_game(Board)
+    bitboard_bytes = bytes_per_game(BitBoard)
+    print(f"Bytes per game: grid {grid_bytes:.0f}, bitboard {bitboard_bytes:.0f}")
+    assert grid_bytes < 21000
+    assert bitboard_bytes < 11000
+    
+    # The compact objects keep the original API
+    board = Board()
+    ship = Ship("Destroyer", 2)
+    board.place_ship(ship, [(1, 1), (1, 2)])
+    board.receive_shot(1, 1)
+    board.receive_shot(5, 5)
+    assert ship.hits == {(1, 1)} and not ship.is_sunk()
+    assert board.hits == {(1, 1)} and board.misses == {(5, 5)}
+    assert not hasattr(board, "__dict__") and not hasattr(ship, "__dict__")
+    bitboard = BitBoard()
+    bitboard.place_ship(Ship("Destroyer", 2), [(1, 1), (1, 2)])
+    bitboard.receive_shot(1, 1)
+    bitboard.receive_shot(5, 5)
+    assert bitboard.hits == board.hits and bitboard.misses == board.misses
+    for derived in (ship.hits, board.misses, bitboard.shots_fired, bitboard.hits, bitboard.misses):
+        try:
+            derived.add((9, 9))  # Derived on demand, so writes must fail loudly
+            assert False, "Derived set accepted a write"
+        except AttributeError:
+            pass
+    
+    return True
+
+def test_placement_solver():
+    """Test the backtracking solver for fleets random draws can't place"""
+    print("\nTesting fleet placement solver...")
+    
+    def assert_valid(layout, ships_config, board_size):
+        cells = [cell for positions in layout for cell in positions]
+        assert len(cells) == len(set(cells)), "Ships overlap"
+        for (_, size), positions in zip(ships_config, layout):
+            assert len(positions) == size
+            rows = {row for row, _ in positions}
+            cols = {col for _, col in positions}
+            assert len(rows) == 1 or len(cols) == 1, "Ship is not in a straight line"
+            assert all(0 <= row < board_size and 0 <= col < board_size for row, col in positions)
+    
+    # Seven 5-cell ships on a 6x6 board leave a single spare cell
+    dense = [(f"Ship {i}", 5) for i in range(7)]
+    solution = solve_fleet(6, dense, random.Random(1))
+    assert solution.complete and solution.layout is not None
+    assert_valid(solution.layout, dense, 6)
+    
+    # Mixed sizes covering the board exactly
+    tiling = [("Carrier", 5)] * 4 + [("Battleship", 4)] * 6 + [("Cruiser", 3)] * 6 + [("Destroyer", 2)]
+    solution = solve_fleet(8, tiling, random.Random(2))
+    assert solution.layout is not None
+    assert_valid(solution.layout, tiling, 8)
+    
+    # 25 four-cell ships fill 10x10 by area but can never be placed
+    solution = solve_fleet(10, [("Ship", 4)] * 25)
+    assert solution.impossible and solution.layout is None
+    assert solve_fleet(10, [("Ship", 11)]).impossible
+    
+    # An exhausted time limit is reported as an incomplete search
+    solution = solve_fleet(10, [("Ship", 4)] * 25, time_limit=0)
+    assert not solution.complete and not solution.impossible
+    
+    # auto_place_ships falls back to the solver
+    game = BattleshipGame(board_size=8)
+    game.ships_config = tiling
+    assert game.auto_place_ships(game.player_board)
+    assert len(game.player_board.ships) == len(tiling)
+    assert all(cell != " " for row in game.player_board.grid for cell in row)
+    
+    return True
+
+def test_training_export():
+    """Test the chunked training-data export and its resume"""
+    print("\nTesting training data export...")
+    with tempfile.TemporaryDirectory() as directory:
+        stats = export_games(directory, 5, "ndjson", chunk_games=2, seed=4)
+        assert stats.chunks_written == 3 and stats.games == 5
+        with open(chunk_path(directory, 0, "ndjson")) as f:
+            games = [json.loads(line) for line in f]
+        assert [game["game"] for game in games] == [0, 1]
+        
+        # Each state shows exactly the shooter's earlier shots
+        game = games[0]
+        size = game["board_size"]
+        seen = {0: set(), 1: set()}
+        for (player, row, col, result), state in zip(game["shots"], game["states"]):
+            assert len(state) == size * size
+            marked = {divmod(i, size) for i, cell in enumerate(state) if cell != "."}
+            assert marked == seen[player]
+            assert state[row * size + col] == "."
+            seen[player].add((row, col))
+        assert game["winner"] in (0, 1) and game["shots"][-1][3] == 2  # Won on a sinking shot
+        
+        # A lost chunk is rebuilt identically; finished ones are skipped
+        with open(chunk_path(directory, 1, "ndjson"), "rb") as f:
+            original = f.read()
+        os.remove(chunk_path(directory, 1, "ndjson"))
+        resumed = export_games(directory, 5, "ndjson", chunk_games=2, seed=4)
+        assert resumed.chunks_written == 1 and resumed.chunks_skipped == 2
+        with open(chunk_path(directory, 1, "ndjson"), "rb") as f:
+            assert f.read() == original
+        
+        try:
+            export_games(directory, 5, "ndjson", chunk_games=2, seed=5)
+            assert False, "Mixed seeds should be refused"
+        except ValueError:
+            pass
+    
+    try:
+        import numpy as np
+    except ImportError:
+        print("⚠️  NumPy not installed, skipping NPY export")
+        return True
+    with tempfile.TemporaryDirectory() as directory:
+        stats = export_games(directory, 3, "npy", chunk_games=3, seed=4)
+        data = np.load(chunk_path(directory, 0, "npy"))
+        assert data["fleets"].shape == (3, 2, 10, 10)
+        assert data["state"].shape == (stats.turns, 10, 10)
+        assert len(data["row"]) == len(data["result"]) == stats.turns
+        assert set(np.unique(data["fleets"][0, 0])) == set(range(6))
+    
+    return True
+
+def test_opening_book():
+    """Test building, caching and playing an opening book"""
+    print("\nTesting opening book...")
+    with tempfile.TemporaryDirectory() as directory:
+        book = get_opening_book("density", 6, [("Cruiser", 3), ("Destroyer", 2)], directory)
+        path = book_path("density", 6, [("Cruiser", 3), ("Destroyer", 2)], directory)
+        assert os.path.exists(path) and len(book) > 1
+        assert OpeningBook.load(path).moves == book.moves
+        
+        # The book move is the strategy's own choice, in the line's orientation
+        board = Board(6)
+        board.place_ship(Ship("Cruiser", 3), [(0, 0), (0, 1), (0, 2)])
+        board.place_ship(Ship("Destroyer", 2), [(5, 4), (5, 5)])
+        line = OpeningLine(book)
+        row, col = line.next_shot(board)
+        assert divmod(line._to_board[book.moves[frozenset()]], 6) == (row, col)
+        
+        # Playing on stays in book until the position isn't covered
+        served = 0
+        while line.next_shot(board) is not None:
+            board.receive_shot(*line.next_shot(board))
+            served += 1
+        assert 1 <= served <= book.depth and not line.active
+        
+        # Books with other settings are cached apart and never served in its place
+        shallow = get_opening_book("density", 6, [("Cruiser", 3), ("Destroyer", 2)], directory, depth=3)
+        assert shallow.depth == 3 and len(shallow) < len(book)
+        assert get_opening_book("density", 6, [("Cruiser", 3), ("Destroyer", 2)], directory) is book
+        tuned = book_path("density", 6, [("Cruiser", 3), ("Destroyer", 2)], directory,
+                          strategy_options={"time_budget": 0.01})
+        assert len({path, tuned, book_path("density", 6, [("Cruiser", 3), ("Destroyer", 2)], directory,
+                                           depth=3)}) == 3
+        
+        # A game with the book enabled reads the cache from the environment
+        old = os.environ.get("BATTLESHIP_BOOK_DIR")
+        os.environ["BATTLESHIP_BOOK_DIR"] = directory
+        try:
+            game = BattleshipGame(strategy="density", opening_book=True)
+            game.auto_place_ships(game.player_board)
+            for _ in range(30):
+                game.player_board.receive_shot(*game.get_computer_shot())
+            assert len(game.player_board.shots_fired) == 30
+            assert os.path.exists(book_path("density", 10, game.ships_config, directory))
+        finally:
+            if old is None:
+                del os.environ["BATTLESHIP_BOOK_DIR"]
+            else:
+                os.environ["BATTLESHIP_BOOK_DIR"] = old
+    
+    assert len(set(board_symmetries(4))) == 8
+    return True
+
+def test_per_game_rng():
+    """Test that games draw only from their own generator"""
+    print("\nTesting per-game random streams...")
+    
+    def play(rng, strategy):
+        game = BattleshipGame(strategy=strategy, rng=rng)
+        winner, shots = play_headless_game(game)
+        layout = [ship.positions for ship in game.computer_board.ships]
+        return winner, shots, layout, sorted(game.player_board.shots_fired)
+    
+    for strategy in ("random", "density"):
+        before = random.getstate()
+        first = play(random.Random(11), strategy)
+        assert random.getstate() == before, "Game touched the global generator"
+        assert play(random.Random(11), strategy) == first
+        assert play(FastRandom(11), strategy) == play(FastRandom(11), strategy)
+    
+    # Streams depend on the game index, not on how the batch is split
+    assert game_seed(1, 5) != game_seed(1, 6) and game_seed(1, 5) != game_seed(2, 5)
+    stats = simulate(12, seed=9, workers=1)
+    replayed = SimulationStats()
+    for index in range(12):
+        replayed.record(*replay_game(index, 9))
+    assert replayed.shots_histogram == stats.shots_histogram
+    assert replayed.wins == stats.wins
+    
+    return True
+
+def test_spectator_feed():
+    """Test delta fan-out, snapshots and backpressure of the spectator feed"""
+    print("\nTesting spectator feed...")
+    
+    def new_engine():
+        game = BattleshipGame(rng=random.Random(2))
+        game.auto_place_ships(game.player_board)
+        game.auto_place_ships(game.computer_board)
+        return game, game.start_engine()
+    
+    async def local():
+        game, engine = new_engine()
+        feed = SpectatorFeed(engine, snapshot_interval=0)
+        fast = feed.subscribe(maxsize=1000)
+        slow = feed.subscribe(maxsize=4)
+        for _ in range(10):
+            engine.apply_shot(engine.turn, *game.get_computer_shot(engine.target_of(engine.turn)))
+        late = feed.subscribe()
+        
+        records = [await fast.__anext__() for _ in range(11)]
+        assert isinstance(records[0], Snapshot) and records[0].seq == 0
+        assert [record.seq for record in records[1:]] == list(range(1, 11))
+        
+        # The slow subscriber overflowed and skips straight to the current state
+        resync = await slow.__anext__()
+        assert isinstance(resync, Snapshot) and resync.seq == 10 and slow.dropped > 0
+        snapshot = await late.__anext__()
+        assert snapshot is resync  # One snapshot object is shared until the next shot
+        shot = records[-1]
+        assert snapshot.views[shot.board][shot.row * 10 + shot.col] in "ox#"
+        assert sum(view.count(".") for view in snapshot.views) == 200 - 10
+        
+        # Subscribers drain what is queued and stop when the game ends
+        while not engine.finished:
+            engine.apply_shot(engine.turn, *game.get_computer_shot(engine.target_of(engine.turn)))
+        remaining = [record async for record in fast]
+        assert remaining[-1].winner == engine.winner and remaining[-1].turn is None
+        assert [record async for record in late][-1].seq == sum(engine.shots)
+        after = feed.subscribe()
+        final = await after.next_batch()
+        assert len(final) == 1 and final[0].winner == engine.winner
+        assert await after.next_batch() == []
+        
+        # A feed closing itself mid-dispatch doesn't hide the last shot from later subscribers
+        game, engine = new_engine()
+        SpectatorFeed(engine)
+        seen = []
+        engine.subscribe(seen.append)
+        while not engine.finished:
+            engine.apply_shot(engine.turn, *game.get_computer_shot(engine.target_of(engine.turn)))
+        assert len(seen) == sum(engine.shots) + 1 and seen[-1].kind == GAME_OVER
+    
+    asyncio.run(local())
+    
+    async def over_tcp():
+        server = BattleshipServer(port=0)
+        await server.start()
+        try:
+            host = await asyncio.open_connection("127.0.0.1", server.port)
+            await host[0].readline()
+            host[1].write(b"HOST\n")
+            match_id = (await host[0].readline()).decode().split()[1]
+            viewers = []
+            for _ in range(50):
+                reader, writer = await asyncio.open_connection("127.0.0.1", server.port)
+                await reader.readline()
+                writer.write(f"WATCH {match_id}\n".encode())
+                viewers.append((reader, writer))
+            for reader, _ in viewers:
+                assert (await reader.readline()).decode().split()[2] == "WATCH"
+                line = (await reader.readline()).decode().split()
+                assert line[:4] == ["SNAPSHOT", "0", "0", "-"] and len(line[4]) == 100
+            host[1].close()
+            for reader, writer in viewers:
+                assert (await reader.readline()).decode().split() == ["OPPONENT", "LEFT"]
+                writer.close()
+        finally:
+            await server.close()
+    
+    asyncio.run(over_tcp())
+    return True
+
+def test_heatmaps():
+    """Test memory-mapped heatmaps against counting games one by one"""
+    print("\nTesting heatmaps...")
+    size = 8
+    
+    def expected(games):
+        counts = {name: [0] * (size * size) for name in ("occupancy", "shots", "hits", "first_hit")}
+        first_hit_shots = [0] * (size * size + 1)
+        for data in games:
+            for fleet in data.fleets:
+                for positions in fleet:
+                    for row, col in positions:
+                        counts["occupancy"][row * size + col] += 1
+            shots_at = [0, 0]
+            first = [None, None]
+            for player, row, col, result in zip(data.players, data.rows, data.cols, data.results):
+                board = 1 - player
+                cell = row * size + col
+                shots_at[board] += 1
+                counts["shots"][cell] += 1
+                if result:
+                    counts["hits"][cell] += 1
+                    if first[board] is None:
+                        first[board] = shots_at[board]
+                        counts["first_hit"][cell] += 1
+            for shots in first:
+                first_hit_shots[shots or 0] += 1
+        counts["first_hit_shots"] = first_hit_shots
+        return counts
+    
+    with tempfile.TemporaryDirectory() as directory:
+        store_path = os.path.join(directory, "stats")
+        with HeatmapStore(store_path, size) as store:
+            assert store.simulate(12, seed=3, chunk_games=5) == 12
+        # A seeded re-run continues the sequence instead of recounting games 0..11
+        with HeatmapStore(store_path) as store:
+            assert store.simulate(8, seed=3) == 8
+            assert store.layouts == store.boards == 40
+            want = expected(iter_games(20, board_size=size, seed=3))
+            for name, counter in store.counters.items():
+                assert counter.tolist() == want[name], name
+            heatmaps = store.heatmaps()
+            assert abs(heatmaps["occupancy"].sum() - sum(size for _, size in DEFAULT_SHIPS_CONFIG)) < 1e-9
+            assert store.shots_to_first_hit()["boards"] == 40
+            print(store.summary().splitlines()[0])
+        
+        # Transcripts: only finished games not counted before are added
+        archive = os.path.join(directory, "games.bst")
+        
+        def record_games(count, seed):
+            for index in range(count):
+                game = BattleshipGame(board_size=size, rng=random.Random(seed + index))
+                game.game_mode = "computer_vs_computer"
+                game.transcript = TranscriptWriter(archive)
+                assert game._place_fleets("Computer 1", "Computer 2")
+                engine = game.start_engine()
+                while engine.winner is None:
+                    engine.apply_shot(engine.turn, *game.get_computer_shot(engine.target_of(engine.turn)))
+                game.transcript.close()
+        
+        record_games(3, 100)
+        with HeatmapStore(os.path.join(directory, "archive"), size) as store:
+            assert store.add_transcript(archive, batch_games=2) == 3
+            assert store.add_transcript(archive) == 0
+            record_games(2, 200)
+            assert store.add_transcript(archive) == 2
+            assert store.boards == 10
+            with TranscriptReader(archive) as reader:
+                total_shots = sum(record.shot_count for record in reader)
+            assert int(store.counters["shots"].sum()) == total_shots
+            assert int(store.counters["first_hit_shots"].sum()) == 10
+        try:
+            HeatmapStore(os.path.join(directory, "archive"), 10)
+            assert False, "board size mismatch should be refused"
+        except ValueError:
+            pass
+    print("✅ Heatmaps match per-game counts and grow incrementally")
+    return True
+
+def test_strategy_protocol():
+    """Test the strategy registry, per-side strategies, latency and deadlines"""
+    print("\nTesting strategy protocol...")
+    
+    class ScanStrategy(Strategy):
+        """Fires at cells in reading order, remembering every result"""
+        def __init__(self, board_size, ships_config, rng=random):
+            super().__init__(board_size, ships_config, rng)
+            self.results = []
+        
+        def choose_shot(self, board):
+            for cell in range(self.board_size * self.board_size):
+                if not board.has_been_shot(*divmod(cell, self.board_size)):
+                    return divmod(cell, self.board_size)
+        
+        def observe(self, row, col, result, ship=None):
+            self.results.append(result)
+        
+        def reset(self):
+            self.results = []
+    
+    class SlowStrategy(ScanStrategy):
+        calls = 0
+        
+        def choose_shot(self, board):
+            self.calls += 1
+            time.sleep(0.05)
+            return super().choose_shot(board)
+    
+    register_strategy("scan", ScanStrategy)
+    register_strategy("slow", SlowStrategy)
+    try:
+        try:
+            register_strategy("bad", object)
+            assert False, "only Strategy subclasses can be registered"
+        except ValueError:
+            pass
+        try:
+            BattleshipGame(strategies=("scan", "nope"))
+            assert False, "unknown strategies should be refused"
+        except ValueError:
+            pass
+        
+        # Each side plays its own strategy and hears the result of its own shots
+        game = BattleshipGame(strategies=("scan", "density"), rng=random.Random(5))
+        winner, shots = play_headless_game(game)
+        scan, density = game.computer_players
+        assert isinstance(scan.strategy, ScanStrategy) and isinstance(density.strategy, DensityStrategy)
+        assert len(scan.strategy.results) == game.engine.shots[0]
+        assert scan.latency.count == game.engine.shots[0]
+        assert density.latency.count == game.engine.shots[1]
+        assert 0 < density.latency.p50 <= density.latency.p99 <= density.latency.max
+        print(f"scan vs density: computer {winner} won in {shots} shots; "
+              f"density moves {density.latency.summary()}")
+        
+        # A side handed a new board starts over, even if the old board's id is reused
+        game = BattleshipGame(strategy="density")
+        old_board = Board()
+        game.auto_place_ships(old_board)
+        for _ in range(20):
+            old_board.receive_shot(*game.get_computer_shot(old_board))
+        del old_board
+        new_board = Board()
+        game.auto_place_ships(new_board)
+        game.get_computer_shot(new_board)
+        assert game.computer_players[1].strategy.seen_shots == set()
+        
+        # A strategy that misses the deadline is answered for with a random move
+        board = Board()
+        game.auto_place_ships(board)
+        computer = ComputerPlayer(SlowStrategy(10, []), deadline=0.005)
+        computer.start(board)
+        start = time.perf_counter()
+        for _ in range(3):
+            board.receive_shot(*computer.choose_shot(board))
+        assert time.perf_counter() - start < 0.05
+        # Moves made while the late decision is still running don't start another one
+        assert computer.latency.fallbacks == 3 and computer.strategy.calls == 1
+        time.sleep(0.06)
+        computer.choose_shot(board)
+        assert computer.strategy.calls == 2
+        computer.close()
+        
+        game = BattleshipGame(strategies=("slow", "random"), deadline=0.002, rng=random.Random(1))
+        play_headless_game(game)
+        game.close()
+        assert game.computer_players[0].latency.fallbacks > 0
+        assert game.computer_players[0].latency.max < 0.05
+    finally:
+        del STRATEGIES["scan"], STRATEGIES["slow"]
+    
+    latency = LatencyStats()
+    latency.record([0.001] * 98 + [0.1] * 2)
+    assert abs(latency.p50 - 0.001) / 0.001 < 0.1 and latency.p99 == 0.1
+    
+    stats = simulate(20, seed=2, workers=1, strategies=("random", "density"))
+    assert stats.latency[0].count and stats.latency[1].count
+    assert stats.to_dict()["computer_2_latency"]["moves"] == stats.latency[1].count
+    print("✅ Registered strategies, per-side latency and deadline fallbacks work")
+    return True
+
+def test_session_store():
+    """Test spilling idle games to SQLite and loading them back"""
+    print("\nTesting session store...")
+    
+    game = BattleshipGame(strategy="density", rng=random.Random(3))
+    game.game_mode = "computer_vs_computer"
+    assert game.auto_place_ships(game.player_board) and game.auto_place_ships(game.computer_board)
+    engine = game.start_engine()
+    for _ in range(37):
+        player = engine.turn
+        engine.apply_shot(player, *game.get_computer_shot(engine.target_of(player), player))
+    data = encode_game(game)
+    assert len(data) < 400
+    copy = decode_game(data)
+    assert copy.engine.turn == engine.turn and copy.game_mode == game.game_mode
+    for board, restored in ((game.player_board, copy.player_board), (game.computer_board, copy.computer_board)):
+        assert restored.shots_fired == board.shots_fired
+        assert [(ship.name, ship.hits, ship.is_sunk()) for ship in restored.ships] == \
+            [(ship.name, ship.hits, ship.is_sunk()) for ship in board.ships]
+    player = copy.engine.turn
+    copy.engine.apply_shot(player, *copy.get_computer_shot(copy.engine.target_of(player), player))  # Plays on
+    print(f"Mid-game encoding: {len(data)} bytes")
+    
+    now = [0.0]
+    events = []
+    store = SessionStore(max_hot=2, idle_timeout=60, clock=lambda: now[0],
+                         can_evict=lambda key, game: key != 99,
+                         on_evict=lambda key, game: events.append(("evict", key)),
+                         on_load=lambda key, game: events.append(("load", key)))
+    try:
+        games = {}
+        for key in range(3):
+            games[key] = BattleshipGame()
+            games[key].auto_place_ships(games[key].player_board)
+            store.put(key, games[key])
+            now[0] += 1
+        assert (store.hot, store.spilled, len(store)) == (2, 1, 3)
+        assert events == [("evict", 0)] and not store.is_hot(0)
+        loaded = store.get(0)  # Loads 0 back and spills 1, now the least recently used
+        assert events[1:] == [("load", 0), ("evict", 1)]
+        assert [list(ship.positions) for ship in loaded.player_board.ships] == \
+            [list(ship.positions) for ship in games[0].player_board.ships]
+        store.put(99, BattleshipGame())  # Spills 2
+        now[0] += 120
+        assert store.evict_idle() == 1 and not store.is_hot(0) and store.is_hot(99)  # 99 is vetoed
+        store.discard(1)
+        assert 1 not in store and store.stats()["spilled"] == 2
+        path = store.path
+    finally:
+        store.close()
+    assert not os.path.exists(path)
+    
+    async def spilled_match():
+        server = BattleshipServer(port=0, max_hot=1)
+        await server.start()
+        try:
+            host = await asyncio.open_connection("127.0.0.1", server.port)
+            other = await asyncio.open_connection("127.0.0.1", server.port)
+            guest = await asyncio.open_connection("127.0.0.1", server.port)
+            for reader, _ in (host, other, guest):
+                await reader.readline()
+            host[1].write(b"HOST\n")
+            match_id = (await host[0].readline()).decode().split()[1]
+            other[1].write(b"HOST\n")
+            await other[0].readline()
+            assert server.games.spilled == 1  # The first match waits on disk
+            guest[1].write(f"JOIN {match_id}\n".encode())
+            assert (await guest[0].readline()).decode().split() == ["MATCH", match_id, "SEAT", "1"]
+            host[1].write(b"FIRE B3\n")
+            while (await guest[0].readline()).decode().split() != ["TURN", "1"]:
+                pass
+            assert server.games.loads >= 1
+            assert server.games.get(int(match_id)).rng is server.rng  # Reloaded games share it too
+            for _, writer in (host, other, guest):
+                writer.close()
+        finally:
+            await server.close()
+    
+    asyncio.run(spilled_match())
+    return True
+
+def test_salvo_rules():
+    """Test batched receive_shots and the salvo rule variants"""
+    print("\nTesting salvo rules...")
+    
+    rng = random.Random(11)
+    for board_class in (Board, BitBoard, SparseBoard):
+        for _ in range(20):
+            game = BattleshipGame(board_class, rng=random.Random(rng.getrandbits(32)))
+            batched, single = game.player_board, game.computer_board
+            assert game.auto_place_ships(batched)
+            for ship in batched.ships:
+                single.place_ship(Ship(ship.name, ship.size), list(ship.positions))
+            cells = [(row, col) for row in range(10) for col in range(10)]
+            rng.shuffle(cells)
+            while cells:
+                salvo = cells[:rng.randint(1, 7)]
+                del cells[:len(salvo)]
+                results, ships_hit = batched.receive_shots(salvo)
+                expected = []
+                expected_ships = []
+                for row, col in salvo:
+                    hit, ship = single.receive_shot(row, col)
+                    expected.append(0 if not hit else 2 if ship.is_sunk() else 1)
+                    if hit:
+                        expected_ships.append(ship.name)
+                assert list(results) == expected
+                assert [ship.name for ship in ships_hit] == expected_ships
+                assert batched.ships_afloat == single.ships_afloat
+            assert batched.all_ships_sunk() and batched.hits == single.hits
+        
+        board = board_class(10)
+        board.receive_shot(0, 0)
+        for salvo in ([(1, 1), (0, 0)], [(1, 1), (1, 1)], [(1, 1), (10, 0)]):
+            try:
+                board.receive_shots(salvo)
+                assert False, "Invalid salvo accepted"
+            except ValueError:
+                pass
+            assert board.shots_fired == {(0, 0)}  # Nothing landed
+    print("receive_shots matches receive_shot on every backend")
+    
+    game = BattleshipGame(salvo=SALVO_SHIPS, rng=random.Random(5))
+    assert game.auto_place_ships(game.player_board) and game.auto_place_ships(game.computer_board)
+    engine = game.start_engine()
+    assert engine.salvo_size(0) == len(game.player_board.ships)
+    for bad in (lambda: engine.apply_shot(0, 0, 0), lambda: engine.apply_salvo(0, [(0, 0)]),
+                lambda: engine.apply_salvo(1, [(0, col) for col in range(5)])):
+        try:
+            bad()
+            assert False, "Invalid move accepted"
+        except ValueError:
+            pass
+    assert engine.shots == [0, 0] and engine.turn == 0
+    events = engine.apply_salvo(0, [(0, col) for col in range(5)])
+    assert [(event.row, event.col) for event in events] == [(0, col) for col in range(5)]
+    assert engine.turn == 1 and engine.shots[0] == 5 and engine.salvos == [1, 0]
+    for name in STRATEGIES:
+        player = engine.turn
+        target = engine.target_of(player)
+        count = engine.salvo_size(player)
+        salvo = game.get_computer_salvo(target, player, count)
+        assert len(set(salvo)) == count and not any(target.has_been_shot(*cell) for cell in salvo), name
+        engine.apply_salvo(player, salvo)
+    game.close()
+    
+    stats = simulate(20, seed=3, workers=1, strategy="density", salvo=4)
+    assert stats.n_games == 20 and stats.wins[0] == 0
+    assert all(shots % 4 == 0 for shots in stats.shots_histogram)
+    for index in (0, 7):
+        assert replay_game(index, 3, strategy="density", salvo=4) == \
+            replay_game(index, 3, strategy="density", salvo=4)
+    deadline_stats = simulate(5, seed=3, workers=1, strategies=("random", "density"), salvo=SALVO_SHIPS,
+                              deadline=0.5, backend="bitboard")
+    assert deadline_stats.n_games == 5 and deadline_stats.latency[1].count
+    print(f"Density with 4-shot salvos: mean {stats.mean_shots:.1f} shots to win")
+    
+    game = BattleshipGame(salvo=3, rng=random.Random(9))
+    assert game.auto_place_ships(game.player_board) and game.auto_place_ships(game.computer_board)
+    engine = game.start_engine()
+    engine.apply_salvo(0, game.get_computer_salvo(game.computer_board, 0, 3))
+    copy = decode_game(encode_game(game))
+    assert copy.salvo == 3 and copy.engine.turn == 1 and copy.engine.salvos == [1, 0]
+    assert copy.computer_board.shots_fired == game.computer_board.shots_fired
+    
+    # Spectators get every shot of a salvo, even when its first shot wins the game
+    game = BattleshipGame(salvo=3, rng=random.Random(4))
+    assert game.auto_place_ships(game.player_board) and game.auto_place_ships(game.computer_board)
+    engine = game.start_engine()
+    feed = SpectatorFeed(engine, snapshot_interval=4)
+    viewer = feed.subscribe(maxsize=1000)
+    
+    def cells(board, ships):
+        every = [(row, col) for row in range(10) for col in range(10)]
+        return [cell for cell in every if (cell in board.ship_at) == ships]
+    
+    ships, water = cells(game.computer_board, True), cells(game.computer_board, False)
+    first = ships[:16] + water[:2] + [ships[16]] + water[2:4]  # The winning shot opens the last salvo
+    second = cells(game.player_board, False)
+    for salvo in range(7):
+        engine.apply_salvo(0, first[salvo * 3:salvo * 3 + 3])
+        if salvo < 6:
+            engine.apply_salvo(1, second[salvo * 3:salvo * 3 + 3])
+    assert engine.winner == 0 and feed.closed
+    
+    async def watch():
+        return [record async for record in viewer]
+    
+    records = asyncio.run(watch())
+    deltas = [record for record in records if not isinstance(record, Snapshot)]
+    assert [delta.seq for delta in deltas] == list(range(1, 40))
+    for index, delta in enumerate(deltas[:-1]):
+        # The shooter keeps the turn until the last shot of its salvo
+        assert delta.turn == (delta.board if index % 3 == 2 else delta.player) and delta.winner is None
+    assert deltas[-3].result == SUNK and deltas[-3].player == 0  # The winning shot, then two more
+    assert deltas[-1].turn is None and deltas[-1].winner == 0
+    assert all(record.seq % 3 == 0 for record in records[1:] if isinstance(record, Snapshot))
+    return True
+
 def main():
     """Run all tests"""
     print("=" * 50)
@@ -66,7 +1264,32 @@ def main():
     tests = [
         test_game_initialization,
         test_ship_placement,
-        test_shot_mechanics
+        test_placement_tables,
+        test_shot_mechanics,
+        test_bitboard_matches_board,
+        test_ship_index_and_sunk_counter,
+        test_target_pool,
+        test_density_strategy,
+        test_monte_carlo_strategy,
+        test_large_sparse_board,
+        test_batch_engine_matches_board,
+        test_incremental_renderer,
+        test_strategy_evaluation,
+        test_headless_simulation,
+        test_game_engine,
+        test_game_transcript,
+        test_game_server,
+        test_profiling_hooks,
+        test_memory_per_game,
+        test_placement_solver,
+        test_training_export,
+        test_opening_book,
+        test_per_game_rng,
+        test_spectator_feed,
+        test_heatmaps,
+        test_strategy_protocol,
+        test_session_store,
+        test_salvo_rules
     ]
     
     passed = 0
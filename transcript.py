@@ -0,0 +1,270 @@
+"""
+Compact binary game transcripts for the Battleship game.
+
+A transcript file holds one or more games back to back. Each game is a header
+with both fleet layouts followed by one packed 4-byte record per shot:
+
+    header:  magic "BSGT", version (u8), game mode (u8), board size (u16),
+             shot count (u32, 0xFFFFFFFF while the game is still being written),
+             then for the player board and the computer board:
+             ship count (u8) and per ship: size (u8), vertical (u8), row (u16),
+             col (u16), name length (u8), UTF-8 name
+    shot:    u32 = cell | result << 29 | board << 31
+             (cell = row * board size + col, result 0 miss / 1 hit / 2 sunk,
+             board 0 = player board, 1 = computer board)
+
+All integers are little-endian. Writers append shots as they are fired, so an
+interrupted game can be resumed from its file, and readers go through a
+memory map so large archives are never loaded whole.
+"""
+
+import mmap
+import os
+import struct
+from typing import Iterator, List, Optional, Tuple
+
+from battleship import BattleshipGame, Board, Ship
+
+MAGIC = b"BSGT"
+VERSION = 1
+OPEN_COUNT = 0xFFFFFFFF
+
+GAME_MODES = ["computer_vs_computer", "single_player", "two_player"]
+
+MISS, HIT, SUNK = 0, 1, 2
+
+_HEADER = struct.Struct("<4sBBHI")
+_SHIP = struct.Struct("<BBHHB")
+_SHOT = struct.Struct("<I")
+_COUNT_OFFSET = 8  # Offset of the shot count within a game header
+
+FleetLayout = List[Tuple[str, int, List[Tuple[int, int]]]]
+
+
+def pack_shot(board: int, row: int, col: int, board_size: int, result: int) -> int:
+    """Pack one shot into its 32-bit record value"""
+    return (row * board_size + col) | result << 29 | board << 31
+
+
+def unpack_shot(value: int, board_size: int) -> Tuple[int, int, int, int]:
+    """Unpack a record value into (board, row, col, result)"""
+    row, col = divmod(value & 0x1FFFFFFF, board_size)
+    return value >> 31, row, col, value >> 29 & 3
+
+
+def encode_fleet(board) -> bytes:
+    """A board's ship layout in the transcript header format"""
+    parts = [bytes([len(board.ships)])]
+    for ship in board.ships:
+        row, col = ship.positions[0]
+        vertical = len(ship.positions) > 1 and ship.positions[1][0] != row
+        name = ship.name.encode("utf-8")
+        parts.append(_SHIP.pack(ship.size, vertical, row, col, len(name)) + name)
+    return b"".join(parts)
+
+
+def decode_fleet(data, offset: int) -> Tuple[FleetLayout, int]:
+    """(fleet layout, offset after it) for a layout written by encode_fleet"""
+    count = data[offset]
+    offset += 1
+    fleet = []
+    for _ in range(count):
+        size, vertical, row, col, name_length = _SHIP.unpack_from(data, offset)
+        offset += _SHIP.size
+        name = bytes(data[offset:offset + name_length]).decode("utf-8")
+        offset += name_length
+        if vertical:
+            positions = [(row + i, col) for i in range(size)]
+        else:
+            positions = [(row, col + i) for i in range(size)]
+        fleet.append((name, size, positions))
+    return fleet, offset
+
+
+class TranscriptWriter:
+    """Appends one game to a transcript file as it is played
+
+    Attach it to a game with `game.transcript = writer`; the header is
+    written once both fleets are placed, and start_engine subscribes the game
+    to its engine so every shot event is appended and flushed straight away.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self._file = None
+        self._count_position = None
+        self.board_size = None
+        self.shot_count = 0
+
+    def write_header(self, game: BattleshipGame):
+        """Start a new game at the end of the file"""
+        mode = GAME_MODES.index(game.game_mode) if game.game_mode in GAME_MODES else 0
+        self._file = open(self.path, "ab+")
+        self._file.seek(0, os.SEEK_END)
+        self._count_position = self._file.tell() + _COUNT_OFFSET
+        self.board_size = game.board_size
+        self.shot_count = 0
+        self._file.write(_HEADER.pack(MAGIC, VERSION, mode, game.board_size, OPEN_COUNT)
+                         + encode_fleet(game.player_board) + encode_fleet(game.computer_board))
+        self._file.flush()
+
+    def record(self, board: int, row: int, col: int, hit: bool, sunk: bool):
+        """Append one resolved shot"""
+        if self._file is None:
+            return
+        result = SUNK if sunk else HIT if hit else MISS
+        self._file.write(_SHOT.pack(pack_shot(board, row, col, self.board_size, result)))
+        self._file.flush()
+        self.shot_count += 1
+
+    def close(self):
+        """Finish the game by storing its shot count in the header"""
+        if self._file is None:
+            return
+        # Append mode ignores seeks for writes, so patch the count separately
+        self._file.close()
+        with open(self.path, "r+b") as f:
+            f.seek(self._count_position)
+            f.write(struct.pack("<I", self.shot_count))
+        self._file = None
+
+    @classmethod
+    def resume(cls, path: str, offset: int, records_offset: int, shot_count: int,
+               board_size: int) -> "TranscriptWriter":
+        """Continue writing the unfinished game starting at `offset` (the last in the file)"""
+        writer = cls(path)
+        with open(path, "r+b") as f:
+            # Drop a partially written trailing record
+            f.truncate(records_offset + shot_count * _SHOT.size)
+        writer._file = open(path, "ab")
+        writer._count_position = offset + _COUNT_OFFSET
+        writer.board_size = board_size
+        writer.shot_count = shot_count
+        return writer
+
+
+class GameRecord:
+    """One game inside a memory-mapped transcript"""
+    def __init__(self, data, offset: int):
+        magic, version, mode, board_size, count = _HEADER.unpack_from(data, offset)
+        if magic != MAGIC:
+            raise ValueError(f"Not a transcript at offset {offset}")
+        if version != VERSION:
+            raise ValueError(f"Unsupported transcript version {version}")
+        self._data = data
+        self.offset = offset
+        self.game_mode = GAME_MODES[mode]
+        self.board_size = board_size
+        self.player_fleet, position = decode_fleet(data, offset + _HEADER.size)
+        self.computer_fleet, position = decode_fleet(data, position)
+        self.records_offset = position
+        self.finished = count != OPEN_COUNT
+        if self.finished:
+            self.shot_count = count
+        else:
+            self.shot_count = (len(data) - position) // _SHOT.size
+        self.end = position + self.shot_count * _SHOT.size
+
+    def shots(self, start: int = 0, stop: Optional[int] = None) -> Iterator[Tuple[int, int, int, int]]:
+        """(board, row, col, result) for shots start..stop, read from the map"""
+        if stop is None or stop > self.shot_count:
+            stop = self.shot_count
+        for index in range(start, stop):
+            value, = _SHOT.unpack_from(self._data, self.records_offset + index * _SHOT.size)
+            yield unpack_shot(value, self.board_size)
+
+    def raw_shots(self) -> bytes:
+        """The packed little-endian u32 shot records, for bulk decoding"""
+        return self._data[self.records_offset:self.end]
+
+    def boards_at(self, turn: Optional[int] = None, board_class=Board) -> Tuple[Board, Board]:
+        """(player board, computer board) after the first `turn` shots"""
+        boards = []
+        for fleet in (self.player_fleet, self.computer_fleet):
+            board = board_class(self.board_size)
+            for name, size, positions in fleet:
+                board.place_ship(Ship(name, size), positions)
+            boards.append(board)
+        for board, row, col, _ in self.shots(0, turn):
+            boards[board].receive_shot(row, col)
+        return boards[0], boards[1]
+
+    def to_game(self, turn: Optional[int] = None, **game_options) -> BattleshipGame:
+        """A BattleshipGame in the state after the first `turn` shots
+
+        Transcripts don't record salvo rules; pass the game's salvo again to
+        continue a salvo game.
+        """
+        game = BattleshipGame(board_size=self.board_size, **game_options)
+        game.player_board, game.computer_board = self.boards_at(turn, type(game.player_board))
+        game.game_mode = self.game_mode
+        shots = self.shot_count if turn is None else min(turn, self.shot_count)
+        if game.salvo is not None and shots:
+            # Whole salvos alternate, so whoever was shot at last fires next
+            (board, _, _, _), = self.shots(shots - 1, shots)
+            game.owes_second_shot = board == 1
+        else:
+            # The computer board is shot first each turn
+            game.owes_second_shot = shots % 2 == 1
+        return game
+
+
+class TranscriptReader:
+    """Read-only, memory-mapped view of a transcript file"""
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "rb")
+        if os.fstat(self._file.fileno()).st_size:
+            self._data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            self._data = b""
+        self._offsets = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if isinstance(self._data, mmap.mmap):
+            self._data.close()
+        self._file.close()
+
+    def __iter__(self) -> Iterator[GameRecord]:
+        return self.records()
+
+    def records(self, offset: int = 0) -> Iterator[GameRecord]:
+        """The games from the one starting at byte `offset` onwards"""
+        while offset < len(self._data):
+            record = GameRecord(self._data, offset)
+            yield record
+            if not record.finished:
+                break  # Only the last game can still be open; ignore a torn record
+            offset = record.end
+
+    def _index(self) -> List[int]:
+        if self._offsets is None:
+            self._offsets = [record.offset for record in self]
+        return self._offsets
+
+    def __len__(self) -> int:
+        return len(self._index())
+
+    def __getitem__(self, index: int) -> GameRecord:
+        return GameRecord(self._data, self._index()[index])
+
+
+def resume_game(path: str, **game_options) -> BattleshipGame:
+    """Rebuild the last game in a transcript and keep recording into it
+
+    The game continues from its last complete shot. Raises ValueError if
+    the last game is already finished; use to_game() to inspect it.
+    """
+    with TranscriptReader(path) as reader:
+        record = reader[len(reader) - 1]
+        if record.finished:
+            raise ValueError(f"The last game in {path} is already finished")
+        game = record.to_game(**game_options)
+        resume_args = (record.offset, record.records_offset, record.shot_count, record.board_size)
+    game.transcript = TranscriptWriter.resume(path, *resume_args)
+    return game